@@ -0,0 +1,399 @@
+import copy
+import math
+import time
+import logging
+
+import numpy as np
+
+from cvrptw_data import load_data
+from column_generation import route_cost_terms, schedule
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Operator scores: new best solution, better than the current one, accepted although worse
+SCORE_BEST, SCORE_BETTER, SCORE_ACCEPTED = 33, 9, 13
+
+# Shaw relatedness weights for distance, service start time and demand
+SHAW_DISTANCE, SHAW_TIME, SHAW_DEMAND = 9, 3, 2
+
+
+class RoutePlan:
+    """
+    One solution: the customer sequence of every truck plus, per route, the arrays that make an
+    insertion check O(1).
+
+    For truck k with route depot, s1, ..., sm, depot:
+      earliest[k][p]  service start at position p when every stop starts as early as it can
+                      (forward pass);
+      latest[k][p]    latest service start at p that still keeps every later stop in its window
+                      (backward pass; the return to the depot is not timed);
+      load[k]         cumulative demand of the route.
+    Inserting c between positions p and p + 1 is feasible iff truck k is allowed at c, load[k]
+    plus c's demand fits, c is reached before its window closes and the start at p + 1 it
+    pushes to is no later than latest[k][p + 1]. Customers on no route are in unserved and
+    cost penalty each.
+
+    The search adds tie_break per km to every route, so among solutions of equal objective
+    (all of them for 'vehicles' and 'fixed_cost') shorter routes win and leave room for more
+    stops; cost() reports the objective without it.
+    """
+
+    def __init__(self, data, objective, routes, penalty=None, tie_break=1e-3):
+        self.data = data
+        self.capacity = np.array([float(truck['truck_max_weight']) for truck in data.trucks])
+        terms = np.array([route_cost_terms(objective, capacity) for capacity in self.capacity])
+        self.per_km, self.fixed = terms[:, 0], terms[:, 1]
+        self.search_km = self.per_km + tie_break
+        self.duration = data.service + data.travel.time
+        customers = [i for i in range(len(data.locations)) if i != data.depot]
+        if penalty is None:
+            # Serving a customer on its own truck always beats leaving it out
+            single = data.travel.distance[data.depot, customers] + data.travel.distance[customers, data.depot]
+            penalty = 10 * float((self.fixed + self.per_km * single.max()).max()) + 1
+        self.penalty = penalty
+
+        self.routes = [list(stops) for stops in routes]
+        self.truck_of = {c: k for k, stops in enumerate(self.routes) for c in stops}
+        self.unserved = set(customers) - set(self.truck_of)
+        self.earliest, self.latest = [None] * len(self.routes), [None] * len(self.routes)
+        self.load = np.zeros(len(self.routes))
+        for k in range(len(self.routes)):
+            self.refresh(k)
+
+    def copy(self):
+        plan = copy.copy(self)
+        plan.routes = [list(stops) for stops in self.routes]
+        plan.truck_of = dict(self.truck_of)
+        plan.unserved = set(self.unserved)
+        plan.earliest, plan.latest = list(self.earliest), list(self.latest)
+        plan.load = self.load.copy()
+        return plan
+
+    def refresh(self, k):
+        """
+        Recompute the forward and backward arrays of route k.
+
+        Returns:
+            bool: Whether every stop of the route starts inside its window.
+        """
+        data = self.data
+        sequence = [data.depot] + self.routes[k] + [data.depot]
+        m = len(sequence)
+        earliest = np.empty(m)
+        earliest[0] = data.start[data.depot]
+        for p in range(1, m):
+            i, j = sequence[p - 1], sequence[p]
+            earliest[p] = earliest[p - 1] + self.duration[i, j]
+            if p < m - 1:
+                earliest[p] = max(earliest[p], data.start[j])
+        latest = np.empty(m)
+        latest[-1] = np.inf
+        for p in range(m - 2, -1, -1):
+            latest[p] = min(data.end[sequence[p]], latest[p + 1] - self.duration[sequence[p], sequence[p + 1]])
+        self.earliest[k], self.latest[k] = earliest, latest
+        self.load[k] = data.demand[self.routes[k]].sum()
+        return bool((earliest[:-1] <= data.end[sequence[:-1]]).all())
+
+    def route_cost(self, k, per_km=None):
+        stops = self.routes[k]
+        if not stops:
+            return 0.0
+        per_km = self.per_km if per_km is None else per_km
+        legs = [self.data.depot] + stops + [self.data.depot]
+        return float(self.fixed[k] + per_km[k] * self.data.travel.distance[legs[:-1], legs[1:]].sum())
+
+    def cost(self):
+        return sum(self.route_cost(k) for k in range(len(self.routes)))
+
+    def value(self):
+        """
+        Search objective: cost with the tie-break plus the penalty for unserved customers.
+        """
+        search = sum(self.route_cost(k, self.search_km) for k in range(len(self.routes)))
+        return search + self.penalty * len(self.unserved)
+
+    def served(self):
+        return np.array(sorted(self.truck_of), dtype=np.intp)
+
+    def insertion_costs(self, k, customers):
+        """
+        Cheapest feasible insertion of each customer into route k, all positions checked at once.
+
+        Returns:
+            tuple: (cost increase per customer, inf where no position is feasible; best position)
+        """
+        data = self.data
+        sequence = np.array([data.depot] + self.routes[k] + [data.depot], dtype=np.intp)
+        before, after = sequence[:-1], sequence[1:]
+        customers = np.asarray(customers, dtype=np.intp)
+
+        # (customers, positions): arrival at c, then the pushed start of the next stop
+        arrival = np.maximum(self.earliest[k][None, :-1] + self.duration[np.ix_(before, customers)].T,
+                             data.start[customers, None])
+        pushed = arrival + self.duration[np.ix_(customers, after)]
+        pushed[:, :-1] = np.maximum(pushed[:, :-1], data.start[after[:-1]][None, :])
+        feasible = ((arrival <= data.end[customers, None]) & (pushed <= self.latest[k][None, 1:])
+                    & data.travel.mask[np.ix_(before, customers)].T & data.travel.mask[np.ix_(customers, after)])
+        feasible &= (data.allowed[customers, k] & (self.load[k] + data.demand[customers] <= self.capacity[k]))[:, None]
+
+        distance = data.travel.distance
+        delta = self.search_km[k] * (distance[np.ix_(before, customers)].T + distance[np.ix_(customers, after)]
+                                     - distance[before, after][None, :])
+        if not self.routes[k]:
+            delta += self.fixed[k]
+        delta[~feasible] = np.inf
+        position = np.argmin(delta, axis=1)
+        return delta[np.arange(len(customers)), position], position
+
+    def insert(self, c, k, position):
+        self.routes[k].insert(position, int(c))
+        self.truck_of[int(c)] = k
+        self.unserved.discard(int(c))
+        self.refresh(k)
+
+    def remove(self, c):
+        """
+        Take customer c off its route. Travel times need not obey the triangle inequality, so a
+        removal that would make a later stop miss its window is undone.
+
+        Returns:
+            bool: Whether c was removed.
+        """
+        c = int(c)
+        k = self.truck_of[c]
+        position = self.routes[k].index(c)
+        del self.routes[k][position]
+        if not self.refresh(k):
+            self.routes[k].insert(position, c)
+            self.refresh(k)
+            return False
+        del self.truck_of[c]
+        self.unserved.add(c)
+        return True
+
+    def removal_gains(self):
+        """
+        Cost saved by removing each served customer from its route.
+
+        Returns:
+            tuple: (customers, gains)
+        """
+        distance = self.data.travel.distance
+        customers, gains = [], []
+        for k, stops in enumerate(self.routes):
+            if not stops:
+                continue
+            sequence = np.array([self.data.depot] + stops + [self.data.depot], dtype=np.intp)
+            before, here, after = sequence[:-2], sequence[1:-1], sequence[2:]
+            gain = self.search_km[k] * (distance[before, here] + distance[here, after] - distance[before, after])
+            if len(stops) == 1:
+                gain += self.fixed[k]
+            customers.append(here)
+            gains.append(gain)
+        if not customers:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        return np.concatenate(customers), np.concatenate(gains)
+
+    def start_times(self):
+        """
+        Service start of every served customer (earliest schedule), indexed by location.
+        """
+        start = np.zeros(len(self.data.locations))
+        for k, stops in enumerate(self.routes):
+            start[stops] = self.earliest[k][1:-1]
+        return start
+
+
+def random_removal(plan, q, rng):
+    served = plan.served()
+    for c in rng.choice(served, min(q, len(served)), replace=False):
+        plan.remove(c)
+
+
+def worst_removal(plan, q, rng, randomness=3):
+    """
+    Remove customers with the largest saving, picking rank floor(u^randomness * n) so that the
+    worst one is the most likely but not the only choice.
+    """
+    for _ in range(q):
+        customers, gains = plan.removal_gains()
+        if not len(customers):
+            return
+        order = np.argsort(-gains, kind='stable')
+        plan.remove(customers[order[int(rng.random() ** randomness * len(order))]])
+
+
+def shaw_removal(plan, q, rng, randomness=6):
+    """
+    Remove customers related to each other (Shaw): close by, served at similar times and with
+    similar demand, so the repair can rearrange them together.
+    """
+    data = plan.data
+    served = plan.served()
+    if not len(served):
+        return
+    start = plan.start_times()
+    scale_distance = max(float(data.travel.distance.max()), 1e-9)
+    scale_time = max(float(data.end.max() - data.start.min()), 1e-9)
+    scale_demand = max(float(data.demand.max()), 1e-9)
+
+    removed = [int(rng.choice(served))]
+    remaining = set(served.tolist()) - set(removed)
+    while len(removed) < q and remaining:
+        r = removed[rng.integers(len(removed))]
+        candidates = np.array(sorted(remaining), dtype=np.intp)
+        relatedness = (SHAW_DISTANCE * data.travel.distance[r, candidates] / scale_distance
+                       + SHAW_TIME * np.abs(start[r] - start[candidates]) / scale_time
+                       + SHAW_DEMAND * np.abs(data.demand[r] - data.demand[candidates]) / scale_demand)
+        order = np.argsort(relatedness, kind='stable')
+        c = int(candidates[order[int(rng.random() ** randomness * len(order))]])
+        removed.append(c)
+        remaining.discard(c)
+    for c in removed:
+        plan.remove(c)
+
+
+def insert_pending(plan, rng, regret=1):
+    """
+    Repair: insert the unserved customers one at a time.
+
+    With regret=1 (greedy) the customer with the cheapest insertion goes first; with regret=k the
+    one with the largest sum of differences between its best insertion and its best insertion
+    into the next k - 1 other routes, so customers about to lose their options go first.
+    Insertion costs are kept in a (customers, trucks) table and only the column of the route
+    that changed is recomputed. Customers with no feasible position stay unserved.
+    """
+    pending = np.array(sorted(plan.unserved), dtype=np.intp)
+    if not len(pending):
+        return
+    rng.shuffle(pending)
+    num_trucks = len(plan.routes)
+    cost = np.empty((len(pending), num_trucks))
+    position = np.empty((len(pending), num_trucks), dtype=np.intp)
+    for k in range(num_trucks):
+        cost[:, k], position[:, k] = plan.insertion_costs(k, pending)
+
+    alive = np.ones(len(pending), dtype=bool)
+    while True:
+        best = cost.min(axis=1)
+        candidates = np.flatnonzero(alive & np.isfinite(best))
+        if not len(candidates):
+            return
+        if regret <= 1:
+            i = candidates[np.argmin(best[candidates])]
+        else:
+            ordered = np.sort(cost[candidates], axis=1)[:, :regret]
+            score = (ordered[:, 1:] - ordered[:, :1]).sum(axis=1)
+            i = candidates[np.lexsort((best[candidates], -score))[0]]
+        k = int(np.argmin(cost[i]))
+        plan.insert(pending[i], k, int(position[i, k]))
+        alive[i] = False
+        cost[i] = np.inf
+        rows = np.flatnonzero(alive)
+        if len(rows):
+            cost[rows, k], position[rows, k] = plan.insertion_costs(k, pending[rows])
+
+
+DESTROY_OPERATORS = [('random', random_removal), ('worst', worst_removal), ('shaw', shaw_removal)]
+REPAIR_OPERATORS = [('greedy', 1), ('regret-2', 2), ('regret-3', 3)]
+
+
+def solve_alns(data, objective='distance', time_limit=30, initial=None, seed=0, min_remove=5, max_remove=None,
+               segment=100, reaction=0.1, start_temperature=0.05, end_temperature=0.001):
+    """
+    Adaptive Large Neighbourhood Search for the CVRPTW.
+
+    Every iteration destroys part of the current solution (random, worst-cost or Shaw removal)
+    and repairs it (greedy or regret-k insertion), each operator drawn with probability
+    proportional to its weight. Candidates are accepted by simulated annealing with a
+    temperature that falls with the elapsed share of the time budget; every segment iterations
+    the weights move towards the average score each operator earned.
+
+    Parameters:
+        data (CVRPTWData): Output of cvrptw_data.load_data.
+        objective (str): 'distance', 'vehicles', 'fixed_cost' or 'distance_fixed_cost'.
+        time_limit (float): Time budget in seconds.
+        initial (dict): Optional start solution truck_id -> route, as returned by the other
+            solvers; by default one is built by regret-2 insertion.
+        min_remove, max_remove (int): Range of customers removed per iteration.
+        start_temperature, end_temperature (float): A candidate this fraction worse than the
+            initial solution is accepted with probability 1/2 at the start / end.
+
+    Returns:
+        tuple: (solution dict truck_id -> [(location, arrival, service start)], stats dict)
+    """
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    truck_index = {truck['truck_id']: k for k, truck in enumerate(data.trucks)}
+    routes = [[] for _ in data.trucks]
+    for truck_id, route in (initial or {}).items():
+        routes[truck_index[truck_id]] = [data.travel.index[stop[0]] for stop in route[1:-1]]
+
+    current = RoutePlan(data, objective, routes)
+    insert_pending(current, rng, regret=2)
+    best = current
+    current_value = best_value = current.value()
+    num_customers = len(data.locations) - 1
+    max_remove = max_remove or max(min_remove, min(60, int(0.3 * num_customers)))
+    min_remove = min(min_remove, max_remove)
+    temperature = max(current.cost(), 1e-9) / math.log(2)
+    logging.info(f"Initial solution: {current.cost():.2f}, {len(current.unserved)} unserved")
+
+    destroy_weights, repair_weights = np.ones(len(DESTROY_OPERATORS)), np.ones(len(REPAIR_OPERATORS))
+    destroy_scores, repair_scores = np.zeros(len(DESTROY_OPERATORS)), np.zeros(len(REPAIR_OPERATORS))
+    destroy_uses, repair_uses = np.zeros(len(DESTROY_OPERATORS)), np.zeros(len(REPAIR_OPERATORS))
+    iterations = 0
+    while (elapsed := time.time() - start_time) < time_limit:
+        iterations += 1
+        d = rng.choice(len(DESTROY_OPERATORS), p=destroy_weights / destroy_weights.sum())
+        r = rng.choice(len(REPAIR_OPERATORS), p=repair_weights / repair_weights.sum())
+        candidate = current.copy()
+        DESTROY_OPERATORS[d][1](candidate, int(rng.integers(min_remove, max_remove + 1)), rng)
+        insert_pending(candidate, rng, regret=REPAIR_OPERATORS[r][1])
+        value = candidate.value()
+
+        # Simulated annealing acceptance, cooling geometrically over the time budget
+        fraction = start_temperature * (end_temperature / start_temperature) ** (elapsed / time_limit)
+        score = 0
+        if value < best_value - 1e-9:
+            best, best_value, score = candidate, value, SCORE_BEST
+        elif value < current_value - 1e-9:
+            score = SCORE_BETTER
+        elif rng.random() < math.exp(-(value - current_value) / (fraction * temperature)):
+            score = SCORE_ACCEPTED
+        if score:
+            current, current_value = candidate, value
+
+        destroy_scores[d] += score
+        repair_scores[r] += score
+        destroy_uses[d] += 1
+        repair_uses[r] += 1
+        if iterations % segment == 0:
+            destroy_weights = ((1 - reaction) * destroy_weights
+                               + reaction * np.maximum(destroy_scores / np.maximum(destroy_uses, 1), 1e-3))
+            repair_weights = ((1 - reaction) * repair_weights
+                              + reaction * np.maximum(repair_scores / np.maximum(repair_uses, 1), 1e-3))
+            destroy_scores[:], repair_scores[:], destroy_uses[:], repair_uses[:] = 0, 0, 0, 0
+            logging.info(f"Iteration {iterations}: best {best.cost():.2f} ({len(best.unserved)} unserved), "
+                         f"current {current.cost():.2f}")
+
+    solution = {data.trucks[k]['truck_id']: schedule(data, stops) for k, stops in enumerate(best.routes) if stops}
+    stats = {
+        'iterations': iterations,
+        'objective': best.cost(),
+        'unserved': [data.locations[c] for c in sorted(best.unserved)],
+        'destroy_weights': dict(zip((name for name, _ in DESTROY_OPERATORS), destroy_weights.round(3).tolist())),
+        'repair_weights': dict(zip((name for name, _ in REPAIR_OPERATORS), repair_weights.round(3).tolist())),
+        'seconds': time.time() - start_time,
+    }
+    return solution, stats
+
+
+if __name__ == "__main__":
+    data = load_data()
+    solution, stats = solve_alns(data, objective='distance', time_limit=30)
+    for truck_id, route in solution.items():
+        stops = " -> ".join(f"{location} ({arrival:.0f}/{start:.0f})" for location, arrival, start in route)
+        print(f"Truck {truck_id}: {stops}")
+    print(f"Objective: {stats['objective']:.2f}, unserved: {len(stats['unserved'])}, "
+          f"{stats['iterations']} iterations in {stats['seconds']:.1f} seconds")
@@ -0,0 +1,367 @@
+import time
+import logging
+from collections import deque, namedtuple
+
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+from cvrptw_data import load_data
+from cvrptw_model import reachable_pairs
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# group: index into truck_groups, stops: customer indices in visiting order (depot excluded)
+Route = namedtuple('Route', ['group', 'stops', 'cost'])
+
+
+def truck_groups(trucks):
+    """
+    Indices of identical trucks (same type and capacity), one list per type in file order.
+    """
+    groups = {}
+    for k, truck in enumerate(trucks):
+        groups.setdefault((truck['truck_type'], truck['truck_max_weight']), []).append(k)
+    return list(groups.values())
+
+
+def route_cost_terms(objective, capacity):
+    """
+    (cost per km, fixed cost per route) of a truck, matching cvrptw_model.set_objective.
+    """
+    if objective == 'distance':
+        return 1.0, 0.0
+    if objective == 'vehicles':
+        return 0.0, 1.0
+    if objective == 'fixed_cost':
+        return 0.0, capacity * 2.0
+    if objective == 'distance_fixed_cost':
+        return 20000 - capacity / 1000, capacity * 2.0
+    raise ValueError(f"Unknown objective: {objective}")
+
+
+def schedule(data, stops):
+    """
+    Arrival and service start at every stop of a route that leaves the depot when it opens.
+
+    Returns:
+        list: (location, arrival, service start) from the depot back to the depot, as in
+            cvrptw_model.extract_routes.
+    """
+    depot = data.depot
+    current = float(data.start[depot])
+    route = [(data.locations[depot], current, current)]
+    previous = depot
+    for j in list(stops) + [depot]:
+        arrival = current + data.service[previous, j] + data.travel.time[previous, j]
+        current = arrival if j == depot else max(arrival, float(data.start[j]))
+        route.append((data.locations[j], float(arrival), float(current)))
+        previous = j
+    return route
+
+
+class LabelStore:
+    """
+    Labels of one pricing run in flat, growable arrays.
+
+    A label is a partial route ending at node: reduced cost, load, service start time, its
+    predecessor label and the visited customers as a row of uint64 bit words. at_node holds the
+    active label ids per node so dominance is checked with array operations over that node's
+    labels. With max_per_node, a node keeps only that many labels, those of lowest reduced cost
+    (used for heuristic pricing).
+    """
+
+    def __init__(self, n, capacity=4096, max_per_node=None):
+        self.words = (n + 63) // 64
+        self.node = np.empty(capacity, dtype=np.intp)
+        self.cost = np.empty(capacity)
+        self.load = np.empty(capacity)
+        self.time = np.empty(capacity)
+        self.pred = np.empty(capacity, dtype=np.intp)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.visited = np.zeros((capacity, self.words), dtype=np.uint64)
+        self.at_node = [np.empty(0, dtype=np.intp) for _ in range(n)]
+        self.max_per_node = max_per_node
+        self.size = 0
+
+    def grow(self):
+        extra = len(self.node)
+        for name in ('node', 'cost', 'load', 'time', 'pred', 'active'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, dtype=array.dtype)]))
+        self.visited = np.concatenate([self.visited, np.zeros((extra, self.words), dtype=np.uint64)])
+
+    def add(self, node, cost, load, start, pred, visited):
+        """
+        Store a label unless a label at the same node dominates it (no worse reduced cost, load
+        and time, visited a subset); labels the new one dominates are deactivated.
+
+        Returns:
+            int or None: The new label id.
+        """
+        ids = self.at_node[node]
+        if len(ids):
+            others = self.visited[ids]
+            dominates_new = ((self.cost[ids] <= cost + 1e-9) & (self.load[ids] <= load) & (self.time[ids] <= start)
+                             & ~np.any(others & ~visited, axis=1))
+            if dominates_new.any():
+                return None
+            dominated = ((cost <= self.cost[ids]) & (load <= self.load[ids]) & (start <= self.time[ids])
+                         & ~np.any(visited & ~others, axis=1))
+            self.active[ids[dominated]] = False
+            ids = ids[~dominated]
+            if self.max_per_node and len(ids) >= self.max_per_node:
+                worst = np.argmax(self.cost[ids])
+                if self.cost[ids[worst]] <= cost:
+                    self.at_node[node] = ids
+                    return None
+                self.active[ids[worst]] = False
+                ids = np.delete(ids, worst)
+
+        if self.size == len(self.node):
+            self.grow()
+        label = self.size
+        self.node[label], self.cost[label], self.load[label], self.time[label] = node, cost, load, start
+        self.pred[label], self.active[label], self.visited[label] = pred, True, visited
+        self.at_node[node] = np.append(ids, label)
+        self.size += 1
+        return label
+
+    def path(self, label):
+        stops = []
+        while self.pred[label] >= 0:
+            stops.append(int(self.node[label]))
+            label = self.pred[label]
+        return stops[::-1]
+
+
+def price_routes(data, trucks, duals, fleet_dual, objective, reachable, neighbours=None, max_per_node=None,
+                 max_labels=50000, max_routes=50, deadline=None, tol=1e-6):
+    """
+    Pricing: elementary shortest path with load and time window resources (ESPPRC), solved by
+    forward labelling with dominance for one truck type.
+
+    Parameters:
+        trucks (list): Indices of the identical trucks of this type.
+        duals: Dual value of every location's cover constraint (0 for the depot).
+        fleet_dual (float): Dual of the type's fleet size constraint.
+        neighbours (int): Only extend to this many successors with the lowest reduced arc
+            cost (heuristic pricing); None extends to all.
+        max_per_node (int): Keep only this many labels per node (heuristic pricing).
+        max_labels (int): Stop after creating this many labels.
+        deadline (float): Stop at this time.time().
+
+    Returns:
+        tuple: (routes with negative reduced cost as Route tuples without group, whether the
+            labelling ran to completion, i.e. no negative route was missed)
+    """
+    n, depot = len(data.locations), data.depot
+    k = trucks[0]
+    capacity = float(data.trucks[k]['truck_max_weight'])
+    per_km, fixed = route_cost_terms(objective, capacity)
+    duration = data.service + data.travel.time
+    reduced = per_km * data.travel.distance - duals[None, :]
+
+    allowed = data.allowed[:, k] & (data.demand <= capacity)
+    allowed[depot] = True
+    usable = reachable & allowed[:, None] & allowed[None, :]
+    successors = []
+    for i in range(n):
+        candidates = np.flatnonzero(usable[i])
+        candidates = candidates[candidates != depot]
+        candidates = candidates[np.argsort(reduced[i, candidates], kind='stable')]
+        successors.append(candidates[:neighbours].tolist() if neighbours else candidates.tolist())
+
+    store = LabelStore(n, max_per_node=max_per_node)
+    bits = np.zeros((n, store.words), dtype=np.uint64)
+    bits[np.arange(n), np.arange(n) // 64] = np.left_shift(np.uint64(1), (np.arange(n) % 64).astype(np.uint64))
+    queue = deque([store.add(depot, fixed - fleet_dual, 0.0, float(data.start[depot]), -1, np.zeros(store.words, dtype=np.uint64))])
+    closing = []
+
+    while queue and store.size < max_labels:
+        if deadline is not None and time.time() > deadline:
+            break
+        label = queue.popleft()
+        if not store.active[label]:
+            continue
+        i = int(store.node[label])
+        cost, load, start, visited = store.cost[label], store.load[label], store.time[label], store.visited[label]
+        if i != depot and usable[i, depot] and cost + reduced[i, depot] < -tol:
+            closing.append((cost + reduced[i, depot], label))
+        for j in successors[i]:
+            if (visited & bits[j]).any():
+                continue
+            new_load = load + data.demand[j]
+            arrival = max(start + duration[i, j], data.start[j])
+            if new_load > capacity or arrival > data.end[j]:
+                continue
+            new = store.add(j, cost + reduced[i, j], new_load, arrival, label, visited | bits[j])
+            if new is not None:
+                queue.append(new)
+
+    routes = []
+    for _, label in sorted(closing)[:max_routes]:
+        stops = store.path(label)
+        legs = [depot] + stops + [depot]
+        cost = fixed + per_km * float(data.travel.distance[legs[:-1], legs[1:]].sum())
+        routes.append(Route(None, tuple(stops), cost))
+    return routes, not queue
+
+
+class RouteMaster:
+    """
+    Set-partitioning master over routes: every customer covered exactly once, at most the fleet
+    size of routes per truck type. Artificial cover variables with a large cost keep the LP
+    feasible before enough routes exist.
+    """
+
+    def __init__(self, data, groups, penalty, env=None):
+        self.data, self.groups = data, groups
+        self.customers = [i for i in range(len(data.locations)) if i != data.depot]
+        self.model = gp.Model("CVRPTW_master", env=env)
+        self.model.Params.OutputFlag = 0
+        artificial = self.model.addVars(self.customers, obj=penalty, name='artificial')
+        self.cover = {i: self.model.addLConstr(artificial[i], GRB.EQUAL, 1, name=f"Cover[{data.locations[i]}]")
+                      for i in self.customers}
+        self.fleet = [self.model.addLConstr(gp.LinExpr(), GRB.LESS_EQUAL, len(trucks), name=f"Fleet[{g}]")
+                      for g, trucks in enumerate(groups)]
+        self.artificial = artificial
+        self.routes, self.columns, self.known = [], [], set()
+
+    def add_route(self, route):
+        key = (route.group, route.stops)
+        if key in self.known:
+            return False
+        self.known.add(key)
+        constrs = [self.cover[i] for i in route.stops] + [self.fleet[route.group]]
+        column = gp.Column([1.0] * len(constrs), constrs)
+        self.columns.append(self.model.addVar(obj=route.cost, column=column, name=f"route[{len(self.routes)}]"))
+        self.routes.append(route)
+        return True
+
+    def duals(self):
+        duals = np.zeros(len(self.data.locations))
+        duals[self.customers] = self.model.getAttr('Pi', [self.cover[i] for i in self.customers])
+        return duals, self.model.getAttr('Pi', self.fleet)
+
+
+def initial_routes(data, groups, objective, reachable):
+    """
+    One single-customer route per customer, on the first truck type that can serve it.
+    """
+    depot = data.depot
+    routes = []
+    for i in range(len(data.locations)):
+        if i == depot:
+            continue
+        for g, trucks in enumerate(groups):
+            capacity = float(data.trucks[trucks[0]]['truck_max_weight'])
+            if data.allowed[i, trucks[0]] and data.demand[i] <= capacity and reachable[depot, i]:
+                per_km, fixed = route_cost_terms(objective, capacity)
+                cost = fixed + per_km * float(data.travel.distance[depot, i] + data.travel.distance[i, depot])
+                routes.append(Route(g, (i,), cost))
+                break
+    return routes
+
+
+def solve_column_generation(data, objective='distance', time_limit=300, mip_time_limit=60, neighbours=15,
+                            max_per_node=20, max_labels=50000, max_routes=50, env=None):
+    """
+    Price-and-branch for the CVRPTW: column generation on the LP relaxation of the set-partitioning
+    master, then the master as an integer program over all generated routes.
+
+    Every iteration first prices heuristically (the neighbours cheapest successors and at most
+    max_per_node labels per node); only when that finds nothing is the full labelling run. If the full labelling completes for every truck type
+    without a negative route, the LP value is a valid lower bound. The final integer solve does not
+    branch on the generated routes, so it is a heuristic upper bound (no new columns are priced in
+    the tree).
+
+    Customers no generated route can serve stay on their artificial cover variable. They are
+    reported as unserved and their penalty is left out of the objective; the bound and gap are
+    only reported when neither the LP nor the integer solution needs an artificial variable, as
+    they would otherwise compare penalties rather than route costs.
+
+    Parameters:
+        data (CVRPTWData): Output of cvrptw_data.load_data.
+        objective (str): 'distance', 'vehicles', 'fixed_cost' or 'distance_fixed_cost'.
+        time_limit (float): Wall-clock limit for column generation in seconds.
+        mip_time_limit (float): Time limit of the final integer master.
+
+    Returns:
+        tuple: (solution dict truck_id -> [(location, arrival, service start)], stats dict with
+            the route cost as objective and the unserved location codes)
+    """
+    start_time = time.time()
+    groups = truck_groups(data.trucks)
+    reachable = reachable_pairs(data)
+    routes = initial_routes(data, groups, objective, reachable)
+    penalty = 10 * max([route.cost for route in routes] + [1.0]) * len(data.locations)
+    master = RouteMaster(data, groups, penalty, env=env)
+    for route in routes:
+        master.add_route(route)
+
+    iterations, proven = 0, False
+    while time.time() - start_time < time_limit:
+        iterations += 1
+        master.model.optimize()
+        duals, fleet_duals = master.duals()
+        added = 0
+        for exact in (False, True):
+            complete = True
+            for g, trucks in enumerate(groups):
+                found, finished = price_routes(data, trucks, duals, fleet_duals[g], objective, reachable,
+                                               neighbours=None if exact else neighbours,
+                                               max_per_node=None if exact else max_per_node,
+                                               max_labels=10 * max_labels if exact else max_labels,
+                                               max_routes=max_routes, deadline=start_time + time_limit)
+                complete &= finished
+                added += sum(master.add_route(route._replace(group=g)) for route in found)
+            if added:
+                break
+        logging.info(f"Iteration {iterations}: LP {master.model.ObjVal:.2f}, {added} routes added, "
+                     f"{len(master.routes)} in total")
+        if not added:
+            proven = complete
+            break
+
+    uncovered = sum(v.X > 1e-6 for v in master.artificial.values())
+    # With artificial variables in use the LP value contains penalties, not a route cost bound
+    lp_bound = master.model.ObjVal if proven and not uncovered else None
+
+    # Integer master over the generated routes
+    for var in master.columns:
+        var.VType = GRB.BINARY
+    master.model.Params.TimeLimit = mip_time_limit
+    master.model.optimize()
+
+    solution, route_cost, unserved = {}, None, None
+    if master.model.SolCount:
+        selected = np.flatnonzero(np.array(master.model.getAttr('X', master.columns)) > 0.5)
+        free = [list(trucks) for trucks in groups]
+        for r in selected:
+            route = master.routes[r]
+            solution[data.trucks[free[route.group].pop(0)]['truck_id']] = schedule(data, route.stops)
+        route_cost = sum(master.routes[r].cost for r in selected)
+        unserved = [data.locations[i] for i in master.customers if master.artificial[i].X > 0.5]
+
+    stats = {
+        'iterations': iterations,
+        'routes': len(master.routes),
+        'lp_bound': lp_bound,
+        'objective': route_cost,
+        'unserved': unserved,
+        'uncovered_in_lp': int(uncovered),
+        'seconds': time.time() - start_time,
+    }
+    if lp_bound is not None and route_cost is not None and not unserved:
+        stats['gap'] = (route_cost - lp_bound) / max(abs(route_cost), 1e-10)
+    return solution, stats
+
+
+if __name__ == "__main__":
+    data = load_data()
+    solution, stats = solve_column_generation(data, objective='distance')
+    for truck_id, route in solution.items():
+        stops = " -> ".join(f"{location} ({arrival:.0f}/{start:.0f})" for location, arrival, start in route)
+        print(f"Truck {truck_id}: {stops}")
+    print(stats)
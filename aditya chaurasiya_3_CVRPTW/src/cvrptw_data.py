@@ -0,0 +1,117 @@
+import os
+import ast
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from travel_matrix import TravelMatrix, load_travel_matrix
+
+DATA_DIR = os.path.join('..', 'data', 'MT-CVRPTW_inputs')
+
+# Assuming constant amount of time spent at each location by trucks and customer
+SERVICE_TIME_CUSTOMER = 20
+SERVICE_TIME_DEPOT = 60
+
+DEPOT = "A123"
+
+# All per-location arrays are indexed by position in locations; allowed is (locations, trucks)
+CVRPTWData = namedtuple('CVRPTWData', ['locations', 'locations_df', 'orders', 'trucks', 'travel',
+                                       'start', 'end', 'demand', 'service', 'depot', 'allowed'])
+
+
+def window_minutes(column):
+    """
+    Convert an 'H:MM' time column to minutes after midnight.
+    """
+    times = pd.to_datetime(column, format='%H:%M')
+    return (times.dt.hour * 60 + times.dt.minute).to_numpy(dtype=np.float64)
+
+
+def allowed_trucks(trucks_allowed, trucks):
+    """
+    Which trucks may serve each location, from the trucks_allowed lists in locations.csv.
+
+    A missing entry allows every truck.
+
+    Returns:
+        numpy.ndarray: Boolean array of shape (locations, trucks).
+    """
+    truck_types = [truck['truck_type'] for truck in trucks]
+    allowed = np.ones((len(trucks_allowed), len(trucks)), dtype=bool)
+    for row, entry in enumerate(trucks_allowed):
+        if isinstance(entry, str):
+            types = set(ast.literal_eval(entry))
+            allowed[row] = [truck_type in types for truck_type in truck_types]
+    return allowed
+
+
+def load_data(data_dir=DATA_DIR, depot=DEPOT):
+    """
+    Load the CVRPTW input files and precompute the arrays the model builders need.
+
+    Parameters:
+        data_dir (str): Directory holding locations.csv, order_list.xlsx, travel_matrix.csv and trucks.csv.
+        depot (str): Location code of the depot.
+
+    Returns:
+        CVRPTWData: Input tables plus time windows, demand, service times and allowed trucks as arrays.
+    """
+    locations_df = pd.read_csv(os.path.join(data_dir, 'locations.csv'))
+    order_list_df = pd.read_excel(os.path.join(data_dir, 'order_list.xlsx'))
+    travel_matrix_df = pd.read_csv(os.path.join(data_dir, 'travel_matrix.csv'))
+    trucks_df = pd.read_csv(os.path.join(data_dir, 'trucks.csv'))
+
+    # Convert loading/unloading windows to minutes with explicit format
+    locations_df['start_minutes'] = window_minutes(locations_df['location_loading_unloading_window_start'])
+    locations_df['end_minutes'] = window_minutes(locations_df['location_loading_unloading_window_end'])
+
+    locations = [str(code) for code in locations_df['location_code']]
+    orders = order_list_df.to_dict(orient='records')
+    trucks = trucks_df.to_dict(orient='records')
+    travel = load_travel_matrix(travel_matrix_df, locations)
+    depot_index = travel.index[depot]
+
+    # Total order weight delivered to each location
+    demand = np.zeros(len(locations))
+    for order in orders:
+        demand[travel.index[str(order['Destination Code'])]] += order['Total Weight']
+
+    # Time spent before leaving i for j: longer whenever the depot is involved
+    service = np.full((len(locations), len(locations)), SERVICE_TIME_CUSTOMER, dtype=np.float64)
+    service[depot_index, :] = SERVICE_TIME_DEPOT
+    service[:, depot_index] = SERVICE_TIME_DEPOT
+
+    return CVRPTWData(locations, locations_df, orders, trucks, travel,
+                      locations_df['start_minutes'].to_numpy(), locations_df['end_minutes'].to_numpy(),
+                      demand, service, depot_index, allowed_trucks(locations_df['trucks_allowed'], trucks))
+
+
+def subset_data(data, locations, trucks):
+    """
+    Restrict an instance to some locations and trucks, e.g. one cluster of a decomposition.
+
+    Parameters:
+        data (CVRPTWData): Output of load_data.
+        locations (list): Location indices to keep; must include the depot.
+        trucks (list): Truck indices to keep.
+
+    Returns:
+        CVRPTWData: Arrays indexed by position in locations / trucks.
+    """
+    idx = np.asarray(locations, dtype=np.intp)
+    grid = np.ix_(idx, idx)
+    codes = [data.locations[i] for i in idx]
+    travel = data.travel
+    sub_travel = TravelMatrix(codes, {code: pos for pos, code in enumerate(codes)},
+                              travel.distance[grid], travel.time[grid], travel.mask[grid])
+    kept = set(codes)
+    return data._replace(
+        locations=codes,
+        locations_df=data.locations_df.iloc[idx].reset_index(drop=True),
+        orders=[order for order in data.orders if str(order['Destination Code']) in kept],
+        trucks=[data.trucks[k] for k in trucks],
+        travel=sub_travel,
+        start=data.start[idx], end=data.end[idx], demand=data.demand[idx], service=data.service[grid],
+        depot=int(np.flatnonzero(idx == data.depot)[0]),
+        allowed=data.allowed[np.ix_(idx, np.asarray(trucks, dtype=np.intp))])
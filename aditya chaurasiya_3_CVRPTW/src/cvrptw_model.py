@@ -0,0 +1,247 @@
+import logging
+
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+
+
+def all_arcs(data):
+    """
+    Enumerate every (truck, i, j) arc with i != j and a known travel matrix entry.
+
+    Returns:
+        tuple: (arc_k, arc_i, arc_j) integer arrays of equal length.
+    """
+    n = len(data.locations)
+    pairs = data.travel.mask & ~np.eye(n, dtype=bool)
+    arc_i, arc_j = np.nonzero(pairs)
+    num_trucks = len(data.trucks)
+    arc_k = np.repeat(np.arange(num_trucks), len(arc_i))
+    return arc_k, np.tile(arc_i, num_trucks), np.tile(arc_j, num_trucks)
+
+
+def reachable_pairs(data):
+    """
+    (i, j) pairs with a travel matrix entry where leaving i when its window opens reaches j before
+    j's window closes. Pairs into the depot are always kept: the return trip is not timed.
+
+    Returns:
+        numpy.ndarray: Boolean (locations, locations) array.
+    """
+    n = len(data.locations)
+    pairs = data.travel.mask & ~np.eye(n, dtype=bool)
+    earliest_arrival = data.start[:, None] + data.service + data.travel.time
+    reachable = earliest_arrival <= data.end[None, :]
+    reachable[:, data.depot] = True
+    return pairs & reachable
+
+
+def feasible_arcs(data, capacity=True):
+    """
+    all_arcs without the arcs no solution can use, so the model never creates them.
+
+    Removed are
+      - (i, j) where leaving i at the opening of its window still reaches j after j's window
+        closes (arcs back into the depot are kept, the model does not time the return);
+      - (k, i, j) where truck k is not in trucks_allowed of i or j;
+      - with capacity, (k, i, j) where the demand of i and j together exceeds truck k's capacity.
+
+    Returns:
+        tuple: (arc_k, arc_i, arc_j) integer arrays of equal length.
+    """
+    n = len(data.locations)
+    pairs = data.travel.mask & ~np.eye(n, dtype=bool)
+    reachable = reachable_pairs(data)
+    arc_i, arc_j = np.nonzero(reachable)
+
+    num_trucks = len(data.trucks)
+    arc_k = np.repeat(np.arange(num_trucks), len(arc_i))
+    arc_i, arc_j = np.tile(arc_i, num_trucks), np.tile(arc_j, num_trucks)
+    keep = data.allowed[arc_i, arc_k] & data.allowed[arc_j, arc_k]
+    if capacity:
+        truck_capacity = np.array([int(truck['truck_max_weight']) for truck in data.trucks], dtype=np.float64)
+        keep &= data.demand[arc_i] + data.demand[arc_j] <= truck_capacity[arc_k]
+
+    logging.info(f"Arc pruning kept {int(keep.sum())} of {num_trucks * int(pairs.sum())} arcs "
+                 f"({num_trucks * int((pairs & ~reachable).sum())} removed by time windows)")
+    return arc_k[keep], arc_i[keep], arc_j[keep]
+
+
+def identical_truck_pairs(trucks):
+    """
+    Consecutive pairs (k, l), k < l, of trucks with the same type and capacity.
+
+    Returns:
+        tuple: (first, second) integer arrays.
+    """
+    last_of_type, first, second = {}, [], []
+    for k, truck in enumerate(trucks):
+        key = (truck['truck_type'], truck['truck_max_weight'])
+        if key in last_of_type:
+            first.append(last_of_type[key])
+            second.append(k)
+        last_of_type[key] = k
+    return np.array(first, dtype=np.intp), np.array(second, dtype=np.intp)
+
+
+def set_objective(model, data, arcs, x, I, objective='vehicles'):
+    """
+    Set one of the objectives studied for this dataset.
+
+    'distance'            total distance                               (objective value---915.27)
+    'fixed_cost'          truck_max_weight * 2 for every truck used    (obj value---330,200)
+    'vehicles'            number of vehicles used                      (objective value ------19)
+    'distance_fixed_cost' weighted distance plus fixed costs           (objective value----18,621,966.446)
+    """
+    arc_k, arc_i, arc_j = arcs
+    capacity = np.array([int(truck['truck_max_weight']) for truck in data.trucks], dtype=np.float64)
+    distance = data.travel.distance[arc_i, arc_j]
+
+    if objective == 'distance':
+        model.setObjective(distance @ x, GRB.MINIMIZE)
+    elif objective == 'fixed_cost':
+        model.setObjective((capacity * 2) @ I, GRB.MINIMIZE)
+    elif objective == 'vehicles':
+        model.setObjective(I.sum(), GRB.MINIMIZE)
+    elif objective == 'distance_fixed_cost':
+        model.setObjective((distance * (20000 - capacity[arc_k] / 1000)) @ x + (capacity * 2) @ I, GRB.MINIMIZE)
+    else:
+        raise ValueError(f"Unknown objective: {objective}")
+
+
+def build_model(data, arcs=None, objective='vehicles', symmetry_breaking=False, optional_trucks=False):
+    """
+    Build the CVRPTW arc-flow model with the gurobipy matrix API.
+
+    Variables and constraint blocks are created in bulk from index arrays; time windows are
+    variable bounds on t and each Service_Time row gets its own big-M from the windows.
+
+    Parameters:
+        data (CVRPTWData): Output of cvrptw_data.load_data.
+        arcs (tuple): (arc_k, arc_i, arc_j) arrays; defaults to all_arcs(data).
+        objective (str): See set_objective.
+        symmetry_breaking (bool): Order identical trucks by use and load.
+        optional_trucks (bool): A truck leaves and returns to the depot only if it is used (I = 1);
+            by default every truck does one trip, so all of them are used and the 'vehicles'
+            objective is constant.
+
+    Returns:
+        tuple: (model, x, t, I, arcs) where x is indexed like arcs, t has shape (trucks, locations).
+    """
+    if arcs is None:
+        arcs = all_arcs(data)
+    arc_k, arc_i, arc_j = arcs
+    num_trucks, n, num_arcs = len(data.trucks), len(data.locations), len(arc_k)
+    depot = data.depot
+    customers = np.array([i for i in range(n) if i != depot])
+    cols = np.arange(num_arcs)
+    ones = np.ones(num_arcs)
+
+    model = gp.Model("CVRPTW")
+
+    # Decision variables; time windows are bounds on t instead of separate constraints
+    x = model.addMVar(num_arcs, vtype=GRB.BINARY, name='x')
+    t = model.addMVar((num_trucks, n), lb=np.tile(data.start, (num_trucks, 1)),
+                      ub=np.tile(data.end, (num_trucks, 1)), name='t')
+    I = model.addMVar(num_trucks, vtype=GRB.BINARY, name='I')
+
+    set_objective(model, data, arcs, x, I, objective)
+
+    # Flow balancing constraint: every customer is left and entered exactly once
+    out_arcs = sp.csr_matrix((ones, (arc_i, cols)), shape=(n, num_arcs))
+    in_arcs = sp.csr_matrix((ones, (arc_j, cols)), shape=(n, num_arcs))
+    model.addMConstr(out_arcs[customers], x, '=', np.ones(len(customers)), name='Flow_Balancing_Out')
+    model.addMConstr(in_arcs[customers], x, '=', np.ones(len(customers)), name='Flow_Balancing_In')
+
+    # Demand constraint: load picked up along a truck's arcs fits its capacity
+    capacity = np.array([int(truck['truck_max_weight']) for truck in data.trucks], dtype=np.float64)
+    loaded = data.demand[arc_i] > 0
+    load = sp.csr_matrix((data.demand[arc_i][loaded], (arc_k[loaded], cols[loaded])), shape=(num_trucks, num_arcs))
+    model.addConstr(load @ x - sp.diags(capacity) @ I <= 0, name='Demand')
+
+    # Each vehicle should leave and arrive at the depot once (only if used, with optional_trucks)
+    leave = arc_i == depot
+    arrive = arc_j == depot
+    leave_arcs = sp.csr_matrix((ones[leave], (arc_k[leave], cols[leave])), shape=(num_trucks, num_arcs))
+    arrive_arcs = sp.csr_matrix((ones[arrive], (arc_k[arrive], cols[arrive])), shape=(num_trucks, num_arcs))
+    if optional_trucks:
+        model.addConstr(leave_arcs @ x - I == 0, name='Leave_Depot')
+        model.addConstr(arrive_arcs @ x - I == 0, name='Arrive_Depot')
+    else:
+        model.addMConstr(leave_arcs, x, '=', np.ones(num_trucks), name='Leave_Depot')
+        model.addMConstr(arrive_arcs, x, '=', np.ones(num_trucks), name='Arrive_Depot')
+
+    # Service time and travel time constraints:
+    #   t[k, j] >= t[k, i] + service + travel - M * (1 - x)
+    # t[k, depot] is the departure time, so arcs back into the depot do not propagate time.
+    # M only needs to cover the latest start at i, so rows already implied by the windows are dropped.
+    duration = data.service[arc_i, arc_j] + data.travel.time[arc_i, arc_j]
+    big_m = data.end[arc_i] + duration - data.start[arc_j]
+    rows = np.flatnonzero(~arrive & (big_m > 0))
+    num_rows = len(rows)
+    row_ids = np.arange(num_rows)
+    flat_t = t.reshape(-1)
+    times = sp.csr_matrix((np.r_[np.ones(num_rows), -np.ones(num_rows)],
+                           (np.r_[row_ids, row_ids],
+                            np.r_[arc_k[rows] * n + arc_j[rows], arc_k[rows] * n + arc_i[rows]])),
+                          shape=(num_rows, num_trucks * n))
+    switch = sp.csr_matrix((-big_m[rows], (row_ids, rows)), shape=(num_rows, num_arcs))
+    model.addConstr(times @ flat_t + switch @ x >= duration[rows] - big_m[rows], name='Service_Time')
+
+    # Linking constraint: an arc can only be used by a truck that is in use
+    truck_of_arc = sp.csr_matrix((ones, (cols, arc_k)), shape=(num_arcs, num_trucks))
+    model.addConstr(x - truck_of_arc @ I <= 0, name='Linking')
+
+    # Symmetry breaking: trucks of one type are interchangeable, so any solution can be permuted
+    # to use them in index order with non-increasing loads; branch-and-bound then never
+    # explores the other permutations of the same routes. (Without optional_trucks every I is 1
+    # and only the load order matters.)
+    if symmetry_breaking:
+        first, second = identical_truck_pairs(data.trucks)
+        if len(first):
+            model.addConstr(I[first] - I[second] >= 0, name='Symmetry_Use')
+            model.addConstr((load[first] - load[second]) @ x >= 0, name='Symmetry_Load')
+
+    return model, x, t, I, arcs
+
+
+def extract_routes(data, arcs, x_values, t_values):
+    """
+    Ordered route of every used truck from the solution values, in time linear in the arcs.
+
+    The arc values are thresholded once into a (truck, location) successor array, which is
+    then walked from the depot for each truck.
+
+    Parameters:
+        x_values: Values of x (e.g. x.X), indexed like arcs.
+        t_values: Values of t (e.g. t.X), shape (trucks, locations).
+
+    Returns:
+        dict: truck_id -> list of (location, arrival, service start) in minutes, from the
+            depot departure back to the depot.
+    """
+    arc_k, arc_i, arc_j = arcs
+    selected = np.asarray(x_values) > 0.5
+    n, depot = len(data.locations), data.depot
+    succ = np.full((len(data.trucks), n), -1)
+    succ[arc_k[selected], arc_i[selected]] = arc_j[selected]
+
+    routes = {}
+    for k in np.unique(arc_k[selected]).tolist():
+        departure = float(t_values[k, depot])
+        route = [(data.locations[depot], departure, departure)]
+        i, start = depot, departure
+        for _ in range(n):
+            j = int(succ[k, i])
+            if j < 0:
+                break
+            arrival = start + data.service[i, j] + data.travel.time[i, j]
+            if j == depot:
+                route.append((data.locations[j], float(arrival), float(arrival)))
+                break
+            start = float(t_values[k, j])
+            route.append((data.locations[j], float(arrival), start))
+            i = j
+        routes[data.trucks[k]['truck_id']] = route
+    return routes
@@ -0,0 +1,342 @@
+import os
+import time
+import atexit
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from cvrptw_data import load_data, subset_data
+from cvrptw_model import reachable_pairs
+from column_generation import route_cost_terms, schedule, solve_column_generation
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Gurobi environment of the current worker process, set by init_worker
+_env = None
+
+
+def dissimilarity(data, window_weight=1.0):
+    """
+    Symmetric dissimilarity between locations for clustering.
+
+    Mean travel time of both directions, plus window_weight times the gap in minutes between the
+    two time windows, plus the largest travel time when neither order of the pair fits the
+    windows, so such customers only share a cluster when nothing else is possible.
+    """
+    diss = (data.travel.time + data.travel.time.T) / 2
+    gap = np.maximum(data.start[:, None] - data.end[None, :], data.start[None, :] - data.end[:, None])
+    diss += window_weight * np.maximum(gap, 0)
+    reachable = reachable_pairs(data)
+    diss[~(reachable | reachable.T)] += data.travel.time.max()
+    np.fill_diagonal(diss, 0)
+    return diss
+
+
+def cluster_customers(data, num_clusters, diss, max_size=None, max_iter=20):
+    """
+    Balanced k-medoids over the customers.
+
+    Medoids start farthest-first from the depot. Customers are assigned in order of regret (how
+    much farther their second-nearest medoid is) to the nearest medoid that still has room, then
+    every medoid moves to the member closest to the rest of its cluster, until the assignment
+    stops changing.
+
+    Parameters:
+        num_clusters (int): Number of clusters.
+        diss: (locations, locations) dissimilarity, see dissimilarity.
+        max_size (int): Customers per cluster; defaults to an even split.
+
+    Returns:
+        list: One array of location indices per cluster.
+    """
+    customers = np.array([i for i in range(len(data.locations)) if i != data.depot])
+    k = min(num_clusters, len(customers))
+    max_size = max(max_size or 0, int(np.ceil(len(customers) / k)))
+    d = diss[np.ix_(customers, customers)]
+    rows = np.arange(len(customers))
+
+    medoids = [int(np.argmax(diss[data.depot, customers]))]
+    for _ in range(1, k):
+        medoids.append(int(np.argmax(d[:, medoids].min(axis=1))))
+
+    labels = None
+    for _ in range(max_iter):
+        to_medoid = d[:, medoids]
+        order = np.argsort(to_medoid, axis=1, kind='stable')
+        regret = to_medoid[rows, order[:, 1]] - to_medoid[rows, order[:, 0]] if k > 1 else np.zeros(len(rows))
+        new_labels = np.empty(len(customers), dtype=np.intp)
+        size = np.zeros(k, dtype=np.intp)
+        for c in np.argsort(-regret, kind='stable'):
+            m = next(m for m in order[c] if size[m] < max_size)
+            new_labels[c] = m
+            size[m] += 1
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for m in range(k):
+            members = np.flatnonzero(labels == m)
+            if len(members):
+                medoids[m] = int(members[np.argmin(d[np.ix_(members, members)].sum(axis=1))])
+    return [customers[labels == m] for m in range(k)]
+
+
+def effective_trucks(data):
+    """
+    Fleet size in trucks that may serve every customer: each truck counts with the share of
+    customers whose trucks_allowed lists it.
+    """
+    customers = [i for i in range(len(data.locations)) if i != data.depot]
+    return float(data.allowed[customers].mean(axis=0).sum())
+
+
+def allocate_trucks(data, clusters):
+    """
+    Split the fleet over the clusters by need.
+
+    A cluster needs trucks for its demand (in average truck capacities) and for its working time
+    (service plus travel to each customer's nearest neighbour, in depot opening hours). A truck
+    covers the share of a cluster's customers that allow it. Trucks are handed out most
+    restricted first, each to the cluster where it covers the most still unmet need (ties go to
+    the larger share), so trucks allowed everywhere are kept for the clusters that only they
+    can serve.
+
+    Returns:
+        list: Truck indices per cluster.
+    """
+    capacity = np.array([float(truck['truck_max_weight']) for truck in data.trucks])
+    shift = data.end[data.depot] - data.start[data.depot]
+    legs = data.service + data.travel.time
+    np.fill_diagonal(legs, np.inf)
+    need = np.array([max(data.demand[c].sum() / capacity.mean(),
+                         legs[np.ix_(c, np.r_[c, data.depot])].min(axis=1).sum() / shift)
+                     for c in clusters])
+    share = np.array([data.allowed[c].mean(axis=0) for c in clusters])  # (clusters, trucks)
+
+    allocation = [[] for _ in clusters]
+    for k in sorted(range(len(data.trucks)), key=lambda k: (data.allowed[:, k].sum(), -capacity[k])):
+        cover = np.minimum(share[:, k], np.maximum(need, 0))
+        c = np.lexsort((-share[:, k], -cover))[0]
+        if share[c, k] > 0:
+            allocation[c].append(k)
+            need[c] -= share[c, k]
+    return allocation
+
+
+def route_cost(data, k, stops, objective):
+    """
+    Objective contribution of truck k driving stops (customer indices); 0 for an unused truck.
+    """
+    if not stops:
+        return 0.0
+    per_km, fixed = route_cost_terms(objective, float(data.trucks[k]['truck_max_weight']))
+    legs = [data.depot] + list(stops) + [data.depot]
+    return fixed + per_km * float(data.travel.distance[legs[:-1], legs[1:]].sum())
+
+
+def route_feasible(data, k, stops):
+    """
+    Whether truck k may serve stops in this order: trucks_allowed, capacity and time windows.
+    """
+    stops = list(stops)
+    if not data.allowed[stops, k].all() or data.demand[stops].sum() > data.trucks[k]['truck_max_weight']:
+        return False
+    previous, current = data.depot, data.start[data.depot]
+    for j in stops:
+        if not data.travel.mask[previous, j]:
+            return False
+        current = max(current + data.service[previous, j] + data.travel.time[previous, j], data.start[j])
+        if current > data.end[j]:
+            return False
+        previous = j
+    return bool(data.travel.mask[previous, data.depot])
+
+
+def best_insertion(data, routes, customer, trucks, objective):
+    """
+    Cheapest feasible position for customer in the routes of trucks.
+
+    Returns:
+        tuple: (cost increase, truck, position), or None if no position is feasible.
+    """
+    best = None
+    for k in trucks:
+        stops = routes[k]
+        if not data.allowed[customer, k]:
+            continue
+        if data.demand[stops].sum() + data.demand[customer] > data.trucks[k]['truck_max_weight']:
+            continue
+        old = route_cost(data, k, stops, objective)
+        for position in range(len(stops) + 1):
+            candidate = stops[:position] + [customer] + stops[position:]
+            delta = route_cost(data, k, candidate, objective) - old
+            if (best is None or delta < best[0]) and route_feasible(data, k, candidate):
+                best = (delta, k, position)
+    return best
+
+
+def repair_borders(data, routes, labels, objective, diss, neighbours=10, max_passes=5):
+    """
+    Repair pass over the combined cluster solutions.
+
+    Customers left unserved by their cluster are inserted at the cheapest feasible position of
+    any route, opening an unused truck if needed. Then customers whose nearest neighbours lie in
+    another cluster are moved into those clusters' routes whenever that lowers the objective,
+    until a pass makes no move.
+
+    Parameters:
+        routes (dict): Truck index -> list of customer indices, for every truck; updated in place.
+        labels: Cluster number per location (-1 for the depot).
+        neighbours (int): Nearest customers that decide whether a customer is on a border.
+
+    Returns:
+        list: Customers that could not be placed in any route.
+    """
+    customers = np.array([i for i in range(len(data.locations)) if i != data.depot])
+    served = {c for stops in routes.values() for c in stops}
+    unserved = [c for c in customers if c not in served]
+    failed = []
+    for c in sorted(unserved, key=lambda c: data.allowed[c].sum()):
+        best = best_insertion(data, routes, c, routes.keys(), objective)
+        if best is None:
+            failed.append(int(c))
+            continue
+        _, k, position = best
+        routes[k].insert(position, int(c))
+    if unserved:
+        logging.info(f"Repair inserted {len(unserved) - len(failed)} of {len(unserved)} unserved customers")
+
+    order = np.argsort(diss[np.ix_(customers, customers)], axis=1, kind='stable')[:, 1:neighbours + 1]
+    near = {int(c): customers[row] for c, row in zip(customers, order)}
+    border = [c for c, others in near.items() if (labels[others] != labels[c]).any()]
+    moves = 0
+    for _ in range(max_passes):
+        truck_of = {c: k for k, stops in routes.items() for c in stops}
+        improved = False
+        for c in border:
+            k = truck_of.get(c)
+            if k is None:
+                continue
+            targets = {truck_of[o] for o in near[c] if o in truck_of and labels[o] != labels[c]} - {k}
+            if not targets:
+                continue
+            reduced = [s for s in routes[k] if s != c]
+            if reduced and not route_feasible(data, k, reduced):
+                continue
+            saving = route_cost(data, k, routes[k], objective) - route_cost(data, k, reduced, objective)
+            best = best_insertion(data, routes, c, sorted(targets), objective)
+            if best is not None and best[0] < saving - 1e-9:
+                _, target, position = best
+                routes[k] = reduced
+                routes[target].insert(position, c)
+                truck_of[c] = target
+                moves += 1
+                improved = True
+        if not improved:
+            break
+    logging.info(f"Repair moved {moves} customers across cluster borders")
+    return failed
+
+
+def init_worker(threads):
+    global _env
+    import gurobipy as gp
+
+    _env = gp.Env(empty=True)
+    _env.setParam('OutputFlag', 0)
+    _env.setParam('Threads', threads)
+    _env.start()
+    atexit.register(_env.dispose)
+
+
+def solve_cluster(sub, objective, time_limit, mip_time_limit):
+    """
+    Route one cluster with column generation in the worker's environment.
+
+    Returns:
+        tuple: (truck_id -> list of location codes without the depot, stats dict)
+    """
+    solution, stats = solve_column_generation(sub, objective, time_limit=time_limit, mip_time_limit=mip_time_limit,
+                                              env=_env)
+    return {truck_id: [stop[0] for stop in route[1:-1]] for truck_id, route in solution.items()}, stats
+
+
+def solve_decomposed(data, objective='distance', cluster_size=20, num_clusters=None, window_weight=1.0,
+                     workers=None, time_limit=60, mip_time_limit=30, repair_passes=5):
+    """
+    Cluster-first, route-second CVRPTW.
+
+    Customers are clustered by travel time and time-window compatibility into at most one
+    cluster per effective truck (effective_trucks), the fleet is split over the clusters
+    (allocate_trucks), each cluster is
+    routed by column generation in its own worker process, and repair_borders stitches the
+    results together. Clusters are independent, so wall time falls with the number of cores.
+
+    Parameters:
+        data (CVRPTWData): Output of cvrptw_data.load_data.
+        objective (str): 'distance', 'vehicles', 'fixed_cost' or 'distance_fixed_cost'.
+        cluster_size (int): Target customers per cluster; sets the number of clusters unless
+            num_clusters is given.
+        workers (int): Worker processes (default: one per core, at most one per cluster).
+        time_limit, mip_time_limit (float): Column generation and integer master limits per cluster.
+
+    Returns:
+        tuple: (solution dict truck_id -> [(location, arrival, service start)], stats dict)
+    """
+    start_time = time.time()
+    num_customers = len(data.locations) - 1
+    num_clusters = num_clusters or max(1, min(int(effective_trucks(data)),
+                                              int(np.ceil(num_customers / cluster_size))))
+    diss = dissimilarity(data, window_weight)
+    clusters = cluster_customers(data, num_clusters, diss)
+    allocation = allocate_trucks(data, clusters)
+    labels = np.full(len(data.locations), -1, dtype=np.intp)
+    for c, members in enumerate(clusters):
+        labels[members] = c
+    logging.info(f"{len(clusters)} clusters of {min(map(len, clusters))}-{max(map(len, clusters))} customers, "
+                 f"trucks per cluster {[len(trucks) for trucks in allocation]}")
+
+    # Route every cluster that received trucks; the others are left to the repair pass
+    jobs = [c for c in range(len(clusters)) if allocation[c]]
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    routes = {k: [] for k in range(len(data.trucks))}
+    truck_index = {truck['truck_id']: k for k, truck in enumerate(data.trucks)}
+    cluster_stats = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(threads,)) as executor:
+        futures = {executor.submit(solve_cluster, subset_data(data, np.r_[data.depot, clusters[c]], allocation[c]),
+                                   objective, time_limit, mip_time_limit): c for c in jobs}
+        for future in as_completed(futures):
+            c = futures[future]
+            cluster_routes, cluster_stats[c] = future.result()
+            for truck_id, codes in cluster_routes.items():
+                routes[truck_index[truck_id]] = [data.travel.index[code] for code in codes]
+            logging.info(f"Cluster {c}: objective {cluster_stats[c]['objective']}, "
+                         f"{len(cluster_stats[c]['unserved'] or [])} unserved in {cluster_stats[c]['seconds']:.1f}s")
+
+    before = sum(route_cost(data, k, stops, objective) for k, stops in routes.items())
+    unserved = repair_borders(data, routes, labels, objective, diss, max_passes=repair_passes)
+    if unserved:
+        logging.warning(f"{len(unserved)} customers could not be served: "
+                        f"{[data.locations[c] for c in unserved]}")
+
+    solution = {data.trucks[k]['truck_id']: schedule(data, stops) for k, stops in routes.items() if stops}
+    stats = {
+        'clusters': len(clusters),
+        'cluster_stats': cluster_stats,
+        'objective_before_repair': before,
+        'objective': sum(route_cost(data, k, stops, objective) for k, stops in routes.items()),
+        'unserved': [data.locations[c] for c in unserved],
+        'seconds': time.time() - start_time,
+    }
+    return solution, stats
+
+
+if __name__ == "__main__":
+    data = load_data()
+    solution, stats = solve_decomposed(data, objective='distance')
+    for truck_id, route in solution.items():
+        stops = " -> ".join(f"{location} ({arrival:.0f}/{start:.0f})" for location, arrival, start in route)
+        print(f"Truck {truck_id}: {stops}")
+    print(f"Objective: {stats['objective']:.2f}, unserved: {len(stats['unserved'])}, "
+          f"{stats['seconds']:.1f} seconds")
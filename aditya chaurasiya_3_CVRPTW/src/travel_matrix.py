@@ -0,0 +1,46 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+# codes: location codes in matrix order, index: location_code -> row/column,
+# distance/time: dense n x n arrays, mask: True where the pair exists in travel_matrix.csv
+TravelMatrix = namedtuple('TravelMatrix', ['codes', 'index', 'distance', 'time', 'mask'])
+
+
+def load_travel_matrix(travel_matrix_df, locations, dtype=np.float64):
+    """
+    Convert the long-format travel matrix into dense distance and time arrays.
+
+    Parameters:
+        travel_matrix_df (DataFrame): Rows of source/destination code, distance and time.
+        locations (list): Location codes; their order defines the array index.
+        dtype: dtype of the distance and time arrays.
+
+    Returns:
+        TravelMatrix: Arrays indexed by position in locations, plus the mask of known pairs.
+    """
+    codes = [str(code) for code in locations]
+    index = {code: pos for pos, code in enumerate(codes)}
+    n = len(codes)
+
+    src = travel_matrix_df['source_location_code'].astype(str).map(index)
+    dst = travel_matrix_df['destination_location_code'].astype(str).map(index)
+    known = (src.notna() & dst.notna()).to_numpy()
+    if not known.all():
+        logging.warning(f"Ignoring {int((~known).sum())} travel matrix rows for unknown locations")
+    rows = src.to_numpy()[known].astype(np.intp)
+    cols = dst.to_numpy()[known].astype(np.intp)
+
+    distance = np.zeros((n, n), dtype=dtype)
+    time = np.zeros((n, n), dtype=dtype)
+    mask = np.zeros((n, n), dtype=bool)
+    distance[rows, cols] = travel_matrix_df['travel_distance_in_km'].to_numpy()[known]
+    time[rows, cols] = travel_matrix_df['travel_time_in_min'].to_numpy()[known]
+    mask[rows, cols] = True
+
+    missing = n * (n - 1) - int(mask.sum() - mask.diagonal().sum())
+    if missing:
+        logging.warning(f"{missing} location pairs have no travel matrix entry")
+
+    return TravelMatrix(codes, index, distance, time, mask)
@@ -0,0 +1,72 @@
+import os
+import sys
+from itertools import combinations, permutations
+
+import numpy as np
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+
+@pytest.fixture(scope='session')
+def data():
+    from cvrptw_data import load_data
+
+    return load_data(os.path.join(SRC, '..', 'data', 'MT-CVRPTW_inputs'))
+
+
+def sample(data, customers, trucks, seed):
+    """
+    Sub-instance with the depot, random customers that have orders and the given trucks.
+    """
+    from cvrptw_data import subset_data
+
+    rng = np.random.default_rng(seed)
+    with_orders = [i for i in range(len(data.locations)) if i != data.depot and data.demand[i] > 0]
+    chosen = sorted(rng.choice(with_orders, customers, replace=False).tolist())
+    return subset_data(data, [data.depot] + chosen, trucks)
+
+
+@pytest.fixture
+def small(data):
+    """
+    Five customers and six trucks: four identical 3 tonners and two identical 10 tonners.
+    """
+    return sample(data, 5, [0, 1, 2, 3, 8, 9], seed=0)
+
+
+def brute_force(data, objective):
+    """
+    (most customers served, least route cost) over every assignment of customers to routes.
+    """
+    from column_generation import truck_groups
+    from decomposition import route_cost, route_feasible
+
+    customers = [i for i in range(len(data.locations)) if i != data.depot]
+    groups = truck_groups(data.trucks)
+    # Cheapest feasible order of every customer set, per truck type
+    best = {}
+    for g, trucks in enumerate(groups):
+        k = trucks[0]
+        for size in range(1, len(customers) + 1):
+            for stops in combinations(customers, size):
+                costs = [route_cost(data, k, order, objective) for order in permutations(stops)
+                         if route_feasible(data, k, order)]
+                if costs:
+                    best[g, frozenset(stops)] = min(costs)
+
+    def search(remaining, free):
+        if not remaining:
+            return 0, 0.0
+        first = min(remaining)
+        served, cost = search(remaining - {first}, free)  # first stays unserved
+        options = [(served, -cost)]
+        for (g, stops), route in best.items():
+            if first in stops and stops <= remaining and free[g]:
+                more, rest = search(remaining - stops, free[:g] + (free[g] - 1,) + free[g + 1:])
+                options.append((more + len(stops), -(rest + route)))
+        served, cost = max(options)
+        return served, -cost
+
+    return search(frozenset(customers), tuple(len(trucks) for trucks in groups))
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from conftest import sample, brute_force
+from alns import RoutePlan, insert_pending, random_removal, solve_alns
+from decomposition import route_cost, route_feasible
+
+
+def routes_of(data, solution):
+    index = {truck['truck_id']: k for k, truck in enumerate(data.trucks)}
+    location = {code: i for i, code in enumerate(data.locations)}
+    return {index[truck_id]: [location[stop[0]] for stop in route[1:-1]] for truck_id, route in solution.items()}
+
+
+@pytest.mark.parametrize('objective', ['distance', 'distance_fixed_cost'])
+def test_insertion_costs_match_brute_force(data, objective):
+    sub = sample(data, 20, [0, 1, 2, 3, 8, 9], seed=3)
+    rng = np.random.default_rng(0)
+    plan = RoutePlan(sub, objective, [[] for _ in sub.trucks], tie_break=0)
+    insert_pending(plan, rng, regret=2)
+    random_removal(plan, 10, rng)
+    pending = sorted(plan.unserved)
+
+    for k, stops in enumerate(plan.routes):
+        assert not stops or route_feasible(sub, k, stops)
+        delta, position = plan.insertion_costs(k, pending)
+        for c, fast, p in zip(pending, delta, position):
+            old = route_cost(sub, k, stops, objective)
+            slow = [route_cost(sub, k, stops[:q] + [c] + stops[q:], objective) - old
+                    for q in range(len(stops) + 1) if route_feasible(sub, k, stops[:q] + [c] + stops[q:])]
+            if not slow:
+                assert fast == np.inf
+            else:
+                assert fast == pytest.approx(min(slow))
+                assert route_feasible(sub, k, stops[:p] + [c] + stops[p:])
+
+
+@pytest.mark.parametrize('objective', ['distance', 'fixed_cost'])
+@pytest.mark.parametrize('trucks, seed', [([0, 1, 2, 3, 8, 9], 0), ([0, 1, 8], 1), ([8, 9], 2)])
+def test_small_instances_reach_brute_force(data, objective, trucks, seed):
+    sub = sample(data, 5, trucks, seed)
+    # Removing every customer each iteration would only rebuild the regret start solution
+    solution, stats = solve_alns(sub, objective, time_limit=1, min_remove=1, max_remove=3)
+    served, cost = brute_force(sub, objective)
+
+    assert len(sub.locations) - 1 - len(stats['unserved']) == served
+    assert stats['objective'] == pytest.approx(cost)
+    routes = routes_of(sub, solution)
+    assert all(route_feasible(sub, k, stops) for k, stops in routes.items())
+    visited = [sub.locations[i] for stops in routes.values() for i in stops]
+    assert sorted(visited + stats['unserved']) == sorted(sub.locations[1:])
+
+
+def test_initial_solution_is_not_worsened(data):
+    from column_generation import solve_column_generation
+
+    sub = sample(data, 8, [0, 1, 8], seed=4)
+    initial, initial_stats = solve_column_generation(sub, 'distance', time_limit=30, mip_time_limit=10)
+    solution, stats = solve_alns(sub, 'distance', time_limit=1, initial=initial)
+
+    assert len(stats['unserved']) <= len(initial_stats['unserved'])
+    if len(stats['unserved']) == len(initial_stats['unserved']):
+        assert stats['objective'] <= initial_stats['objective'] + 1e-6
@@ -0,0 +1,30 @@
+import pytest
+
+from conftest import sample, brute_force
+from column_generation import solve_column_generation
+from decomposition import route_cost, route_feasible
+
+
+@pytest.mark.parametrize('objective', ['distance', 'fixed_cost'])
+@pytest.mark.parametrize('trucks, seed', [([0, 1, 2, 3, 8, 9], 0), ([0, 1, 8], 1), ([8, 9], 2)])
+def test_matches_brute_force(data, objective, trucks, seed):
+    sub = sample(data, 5, trucks, seed)
+    solution, stats = solve_column_generation(sub, objective, time_limit=60, mip_time_limit=30)
+    served, cost = brute_force(sub, objective)
+
+    assert len(sub.locations) - 1 - len(stats['unserved']) == served
+    assert stats['objective'] == pytest.approx(cost)
+
+    # The objective is the cost of the returned routes, without the penalty of unserved customers
+    index = {truck['truck_id']: k for k, truck in enumerate(sub.trucks)}
+    location = {code: i for i, code in enumerate(sub.locations)}
+    routes = {index[truck_id]: [location[stop[0]] for stop in route[1:-1]] for truck_id, route in solution.items()}
+    assert sum(route_cost(sub, k, stops, objective) for k, stops in routes.items()) == pytest.approx(cost)
+    assert all(route_feasible(sub, k, stops) for k, stops in routes.items())
+    visited = sorted(sub.locations[i] for stops in routes.values() for i in stops)
+    assert sorted(visited + stats['unserved']) == sorted(sub.locations[1:])
+
+    if stats['unserved']:
+        assert 'gap' not in stats
+    elif stats['lp_bound'] is not None:
+        assert stats['lp_bound'] <= cost + 1e-6 and stats['gap'] >= -1e-9
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from gurobipy import GRB
+
+from cvrptw_model import build_model, feasible_arcs, identical_truck_pairs, all_arcs
+
+
+def test_feasible_arcs_is_subset_of_all_arcs(small):
+    every = set(zip(*all_arcs(small)))
+    kept = set(zip(*feasible_arcs(small)))
+    assert kept <= every
+    for k, i, j in kept:
+        assert small.allowed[i, k] and small.allowed[j, k]
+
+
+def test_optional_trucks_lets_vehicles_objective_use_fewer_trucks(small):
+    model, x, t, I, arcs = build_model(small, arcs=feasible_arcs(small), objective='vehicles',
+                                       symmetry_breaking=True, optional_trucks=True)
+    model.Params.OutputFlag = 0
+    model.optimize()
+    assert model.Status == GRB.OPTIMAL
+    assert model.ObjVal < len(small.trucks)
+
+    # Identical trucks are used in index order
+    used = np.round(I.X)
+    first, second = identical_truck_pairs(small.trucks)
+    assert (used[first] >= used[second]).all()
+    model.dispose()
+
+
+def test_symmetry_breaking_keeps_the_optimum(small):
+    values = []
+    for symmetry_breaking in (False, True):
+        model, *_ = build_model(small, arcs=feasible_arcs(small), objective='distance',
+                                symmetry_breaking=symmetry_breaking, optional_trucks=True)
+        model.Params.OutputFlag = 0
+        model.optimize()
+        values.append(model.ObjVal)
+        model.dispose()
+    assert values[0] == pytest.approx(values[1])
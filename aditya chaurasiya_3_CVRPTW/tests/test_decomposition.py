@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from conftest import sample
+from decomposition import (dissimilarity, cluster_customers, allocate_trucks, repair_borders, route_cost,
+                           route_feasible, solve_decomposed)
+
+
+@pytest.fixture
+def medium(data):
+    """
+    Sixteen customers, five 3 tonners, a 5 tonner and four 10 tonners.
+    """
+    return sample(data, 16, [0, 1, 2, 3, 4, 5, 8, 9, 10, 11], seed=1)
+
+
+def test_clusters_partition_the_customers(medium):
+    diss = dissimilarity(medium)
+    assert np.allclose(diss, diss.T)
+    clusters = cluster_customers(medium, 3, diss)
+
+    members = np.concatenate(clusters)
+    assert sorted(members) == [i for i in range(len(medium.locations)) if i != medium.depot]
+    assert max(map(len, clusters)) <= int(np.ceil(len(members) / 3))
+
+    allocation = allocate_trucks(medium, clusters)
+    trucks = [k for cluster in allocation for k in cluster]
+    assert len(trucks) == len(set(trucks))
+
+
+def test_repair_inserts_unserved_customers(medium):
+    routes = {k: [] for k in range(len(medium.trucks))}
+    labels = np.zeros(len(medium.locations), dtype=np.intp)
+    labels[medium.depot] = -1
+    failed = repair_borders(medium, routes, labels, 'distance', dissimilarity(medium))
+
+    served = [c for stops in routes.values() for c in stops]
+    assert len(served) == len(set(served))
+    assert sorted(served + failed) == [i for i in range(len(medium.locations)) if i != medium.depot]
+    assert all(route_feasible(medium, k, stops) for k, stops in routes.items() if stops)
+
+
+def test_solution_is_feasible_and_costed(medium):
+    solution, stats = solve_decomposed(medium, 'distance', num_clusters=3, workers=1, time_limit=10,
+                                       mip_time_limit=5)
+
+    index = {truck['truck_id']: k for k, truck in enumerate(medium.trucks)}
+    location = {code: i for i, code in enumerate(medium.locations)}
+    routes = {index[truck_id]: [location[stop[0]] for stop in route[1:-1]] for truck_id, route in solution.items()}
+    assert all(route_feasible(medium, k, stops) for k, stops in routes.items())
+    visited = [medium.locations[i] for stops in routes.values() for i in stops]
+    assert len(visited) == len(set(visited))
+    assert sorted(visited + stats['unserved']) == sorted(medium.locations[1:])
+    assert stats['objective'] == pytest.approx(sum(route_cost(medium, k, stops, 'distance')
+                                                   for k, stops in routes.items()))
+    assert stats['clusters'] == 3 and all(c['unserved'] is not None for c in stats['cluster_stats'].values())
@@ -0,0 +1,165 @@
+"""
+Solve many TSP instances in a bounded pool of worker processes.
+
+    python batch.py ../data --workers 4 --backend lazy --output ../output/batch_results.jsonl
+    python batch.py manifest.txt --time-limit 60
+
+The source is a directory (every *.csv in it) or a manifest file with one CSV path per line,
+relative to the manifest. Every worker creates one Gurobi environment when it starts and reuses
+it for all instances it solves; results are appended to a JSONL file as each instance finishes.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+DEFAULT_OUTPUT = os.path.join('..', 'output', 'batch_results.jsonl')
+
+# Long-lived state of the current worker process, set by init_worker
+_env = None
+_backend = None
+
+
+def find_instances(source):
+    """
+    CSV paths from a directory or from a manifest file (one path per line, '#' comments).
+    """
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source) if name.endswith('.csv'))
+    base = os.path.dirname(source)
+    with open(source) as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith('#')]
+
+
+def worker_threads(workers, cpu_count=None):
+    """
+    Gurobi Threads per worker so that all workers together use every core once.
+    """
+    return max(1, (cpu_count or os.cpu_count() or 1) // workers)
+
+
+def solve_status(status, found):
+    """
+    Record status for a Gurobi status code: optimal, time_limit or no_solution.
+    """
+    from gurobipy import GRB
+
+    if not found:
+        return 'no_solution'
+    if status == GRB.OPTIMAL:
+        return 'optimal'
+    if status == GRB.TIME_LIMIT:
+        return 'time_limit'
+    return f'status {status}'
+
+
+def init_worker(backend, threads, time_limit):
+    global _env, _backend
+    import gurobipy as gp
+
+    _backend = backend
+    _env = gp.Env(empty=True)
+    _env.setParam('OutputFlag', 0)
+    _env.setParam('Threads', threads)
+    _env.setParam('TimeLimit', time_limit)
+    _env.start()
+    atexit.register(_env.dispose)
+
+
+def solve_instance(path):
+    """
+    Solve one instance in the worker's environment and return its result record.
+    """
+    from cli import read_places
+    from distance_cache import cached_distance_matrix
+
+    start = time.perf_counter()
+    record = {'instance': path, 'pid': os.getpid()}
+    try:
+        places, coordinates = read_places(path)
+        distance_matrix = cached_distance_matrix(coordinates)
+        if _backend == 'lazy':
+            from tsp_lazy import solve_tsp_model
+
+            stats = {}
+            route = solve_tsp_model(places, dict(zip(places, coordinates)), user_cuts=True, env=_env,
+                                    stats=stats)
+            index = {place: i for i, place in enumerate(places)}
+            tour = None if route is None else [index[place] for place in route]
+            status = solve_status(stats['status'], route is not None)
+        else:
+            from cli import mtz_tour
+            from tsp_model import build_mtz_model
+
+            model, x, u, arcs = build_mtz_model(distance_matrix, env=_env)
+            model.optimize()
+            tour = mtz_tour(model, x, arcs, len(places))
+            status = solve_status(model.Status, tour is not None)
+            model.dispose()
+        record.update(cities=len(places), status=status)
+        if tour is not None:
+            tour = np.asarray(tour)
+            record['objective'] = float(distance_matrix[tour, np.roll(tour, -1)].sum())
+            record['route'] = [places[i] for i in tour] + [places[tour[0]]]
+    except Exception as e:
+        record.update(status='error', error=f"{type(e).__name__}: {e}")
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def solve_batch(paths, output_path=DEFAULT_OUTPUT, workers=None, backend='lazy', time_limit=300):
+    """
+    Solve every instance in a pool of workers and stream the results to a JSONL file.
+
+    Returns:
+        list: Result records in completion order.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths)) or 1
+    threads = worker_threads(workers)
+    logging.info(f"Solving {len(paths)} instances with {workers} workers x {threads} threads")
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    records = []
+    with open(output_path, 'w') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                initargs=(backend, threads, time_limit)) as executor:
+        futures = [executor.submit(solve_instance, path) for path in paths]
+        for future in as_completed(futures):
+            record = future.result()
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            records.append(record)
+            logging.info(f"{record['instance']}: {record['status']}, "
+                         f"{record.get('objective', float('nan')):.2f} in {record['seconds']:.2f}s")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a directory or manifest of TSP instances in parallel")
+    parser.add_argument('source', help="Directory of CSV files or manifest with one CSV path per line")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per core)")
+    parser.add_argument('--backend', choices=['lazy', 'mtz'], default='lazy')
+    parser.add_argument('--time-limit', type=float, default=300, help="Time limit per instance in seconds")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="JSONL file the results are streamed to")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    paths = find_instances(args.source)
+    if not paths:
+        print(f"No instances found in {args.source}")
+        return 1
+    records = solve_batch(paths, args.output, args.workers, args.backend, args.time_limit)
+    return 0 if all(record['status'] != 'error' for record in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
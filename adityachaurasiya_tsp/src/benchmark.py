@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import PhaseTimer, ProgressRecorder
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DATA_DIR = os.path.join('..', 'data')
+RESULT_DIR = os.path.join('..', 'output', 'benchmark')
+BASELINE_PATH = os.path.join('..', 'benchmark', 'baseline.json')
+
+DATASETS = ['sample_tsp_20city.csv', 'sample_tsp_30city.csv', 'sample_tsp_40city.csv',
+            'sample_tsp_50city.csv', 'sample_tsp_70city.csv', 'tsp_input.csv']
+PHASES = ['read', 'distance', 'build', 'optimize', 'extract']
+
+
+def split_build_solve(timer, runtime):
+    """
+    The scripts optimize inside build_model; split that time using the solver's own Runtime.
+    """
+    total = timer.timings.pop('build_solve')
+    timer.add('optimize', runtime)
+    timer.add('build', max(total - runtime, 0.0))
+
+
+def gurobi_stats(model):
+    stats = {'status': model.Status, 'bound': model.ObjBound if model.SolCount else None,
+             'nodes': model.NodeCount}
+    stats['gap'] = model.MIPGap if model.SolCount else None
+    return stats
+
+
+def route_indices(route, places):
+    index = {place: i for i, place in enumerate(places)}
+    return [index[place] for place in route]
+
+
+# Every solve path takes (places, coordinates, distance_matrix, timer, time_limit, progress) and
+# returns a dict with the route (place names, closing the loop) and whatever statistics it has
+
+def solve_mtz(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    import gurobi
+    with timer.phase('build_solve'):
+        model, x, arcs = gurobi.build_model(places, distance_matrix)
+    split_build_solve(timer, model.Runtime)
+    with timer.phase('extract'):
+        route, _ = gurobi.solve_tsp(model, x, arcs, places)
+    return dict(gurobi_stats(model), route=route)
+
+
+def solve_pulp(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    import tsp_solver
+    with timer.phase('build'):
+        problem, x = tsp_solver.build_model(places, distance_matrix)
+    with timer.phase('optimize_extract'):
+        route, _ = tsp_solver.solve_tsp(problem, x, places, write_lp=False, time_limit=time_limit)
+    timer.add('optimize', timer.timings.pop('optimize_extract'))
+    return {'status': problem.status, 'route': route}
+
+
+def solve_lazy_dfj(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    import tsp_lazy
+    stats = {}
+    tour = tsp_lazy.solve_tsp_model(places, dict(zip(places, coordinates)), user_cuts=True,
+                                    timer=timer, progress=progress, time_limit=time_limit, stats=stats)
+    return {'route': None if tour is None else tour + [tour[0]],
+            'status': stats['status'], 'bound': stats['bound'], 'gap': stats['gap']}
+
+
+def solve_warm_start(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    import warm_p
+    with timer.phase('build_solve'):
+        model, x, arcs = warm_p.build_model(places, distance_matrix)
+    split_build_solve(timer, model.Runtime)
+    with timer.phase('extract'):
+        route, _ = warm_p.solve_tsp(model, x, arcs, places)
+    return dict(gurobi_stats(model), route=route)
+
+
+def solve_warm_vec(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    import warm_performance_vec_restriction as warm_vec
+    with timer.phase('build_solve'):
+        model, x = warm_vec.build_model(places, distance_matrix, time_limit=time_limit)
+    split_build_solve(timer, model.Runtime)
+    with timer.phase('extract'):
+        route, _ = warm_vec.solve_tsp(model, x, places)
+    return dict(gurobi_stats(model), route=route)
+
+
+def solve_ortools_warm(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    import warm2
+    with timer.phase('build'):
+        initial_solution, _ = warm2.solve_tsp_ortools(distance_matrix)
+        model, x = warm2.build_gurobi_model(places, distance_matrix, initial_solution, write_lp=False)
+    with timer.phase('optimize_extract'):
+        solution = warm2.extract_solution(model, x, len(places))
+    timer.add('optimize', model.Runtime)
+    timer.add('extract', max(timer.timings.pop('optimize_extract') - model.Runtime, 0.0))
+    route = None
+    if solution:
+        succ = dict(solution)
+        route = [places[0]]
+        current = succ[0]
+        while current != 0:
+            route.append(places[current])
+            current = succ[current]
+        route.append(places[0])
+    return dict(gurobi_stats(model), route=route)
+
+
+def solve_candidate(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    from candidate_graph import solve_candidate_tsp
+    stats = {}
+    with timer.phase('optimize'):
+        route, _ = solve_candidate_tsp(places, coordinates, time_limit=time_limit, stats=stats)
+    return {'route': route, 'status': stats['status'], 'bound': stats['bound'], 'gap': stats['gap']}
+
+
+def solve_heuristic(places, coordinates, distance_matrix, timer, time_limit, progress=None):
+    from heuristic_solver import solve_heuristic_tsp
+    with timer.phase('optimize'):
+        route, _, stats = solve_heuristic_tsp(places, coordinates, time_budget=min(time_limit, 5))
+    return {'route': route, 'improvements_per_second': stats['improvements_per_second']}
+
+
+SOLVE_PATHS = {
+    'mtz': solve_mtz,
+    'pulp': solve_pulp,
+    'lazy_dfj': solve_lazy_dfj,
+    'warm_start': solve_warm_start,
+    'warm_vec': solve_warm_vec,
+    'ortools_warm': solve_ortools_warm,
+    'candidate': solve_candidate,
+    'heuristic': solve_heuristic,
+}
+
+
+def peak_rss():
+    """
+    Peak resident set size in bytes of this process and its finished children (None on Windows).
+    """
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is in KiB on Linux
+    return scale * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def run_case(solver, dataset, time_limit, seed, progress_path=None):
+    """
+    Run one solve path on one dataset in the current process and return its record.
+
+    With progress_path, paths that accept a Gurobi callback stream their progress there.
+    """
+    import gurobipy as gp
+    from distance_matrix import calculate_distance_matrix
+
+    random.seed(seed)
+    np.random.seed(seed)
+    # Models created after this inherit the default environment parameters
+    gp.setParam('OutputFlag', 0)
+    gp.setParam('Seed', seed)
+    gp.setParam('TimeLimit', time_limit)
+
+    timer = PhaseTimer(enabled=True)
+    progress = ProgressRecorder(progress_path) if progress_path else None
+    with timer.phase('read'):
+        df = pd.read_csv(os.path.join(DATA_DIR, dataset))
+        places = df['Place_Name'].unique().tolist()
+        coordinates = list(zip(df['Latitude'], df['Longitude']))
+    with timer.phase('distance'):
+        distance_matrix = calculate_distance_matrix(coordinates)
+
+    result = SOLVE_PATHS[solver](places, coordinates, distance_matrix, timer, time_limit, progress)
+    if progress is not None:
+        progress.close()
+    route = result.pop('route')
+    if route:
+        tour = route_indices(route[:-1], places)
+        # Judge every path by the length of the tour it returns, on the same matrix
+        result['objective'] = float(distance_matrix[tour, np.roll(tour, -1)].sum())
+        result['valid_tour'] = sorted(tour) == list(range(len(places)))
+    return dict(result, solver=solver, dataset=dataset, cities=len(places), seed=seed,
+                **{f'{phase}_time': timer.timings.get(phase) for phase in PHASES},
+                total_time=sum(timer.timings.values()), peak_rss=peak_rss())
+
+
+def run_isolated(solver, dataset, time_limit, seed, progress_dir=None):
+    """
+    Run one case in a fresh interpreter so timings and peak RSS are not shared between cases.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'result.json')
+        command = [sys.executable, os.path.abspath(__file__), '--case', solver, dataset,
+                   '--time-limit', str(time_limit), '--seed', str(seed), '--json', output]
+        if progress_dir:
+            name = f"{os.path.splitext(dataset)[0]}_{solver}.jsonl"
+            command += ['--progress', os.path.abspath(os.path.join(progress_dir, name))]
+        try:
+            completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                       text=True, timeout=3 * time_limit + 120)
+        except subprocess.TimeoutExpired:
+            return {'solver': solver, 'dataset': dataset, 'error': 'timeout'}
+        if completed.returncode != 0 or not os.path.exists(output):
+            message = completed.stderr.strip().splitlines()
+            return {'solver': solver, 'dataset': dataset, 'error': message[-1] if message else 'failed'}
+        with open(output) as f:
+            return json.load(f)
+
+
+def compare_with_baseline(records, baseline, time_tolerance=0.25, time_slack=1.0, objective_tolerance=1e-6):
+    """
+    Regressions against a stored baseline: failures, longer tours or slower total time.
+
+    A case is slower only if it exceeds the baseline by time_tolerance (relative) plus
+    time_slack seconds, so timer noise on the small instances is not reported.
+    """
+    previous = {(record['solver'], record['dataset']): record for record in baseline}
+    regressions = []
+    for record in records:
+        base = previous.get((record['solver'], record['dataset']))
+        if base is None or base.get('error'):
+            continue
+        key = f"{record['solver']} on {record['dataset']}"
+        if record.get('error'):
+            regressions.append(f"{key}: {record['error']}")
+            continue
+        if base.get('objective') is not None and (record.get('objective') is None or record['objective'] >
+                                                  base['objective'] * (1 + objective_tolerance) + objective_tolerance):
+            regressions.append(f"{key}: objective {record.get('objective')} vs {base['objective']:.2f}")
+        if record['total_time'] > base['total_time'] * (1 + time_tolerance) + time_slack:
+            regressions.append(f"{key}: {record['total_time']:.2f}s vs {base['total_time']:.2f}s")
+    return regressions
+
+
+def write_results(records, result_dir=RESULT_DIR):
+    os.makedirs(result_dir, exist_ok=True)
+    with open(os.path.join(result_dir, 'results.json'), 'w') as f:
+        json.dump(records, f, indent=2)
+    pd.DataFrame(records).to_csv(os.path.join(result_dir, 'results.csv'), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TSP solve paths on the sample datasets")
+    parser.add_argument('--solvers', nargs='+', default=list(SOLVE_PATHS), choices=list(SOLVE_PATHS))
+    parser.add_argument('--datasets', nargs='+', default=DATASETS)
+    parser.add_argument('--time-limit', type=float, default=300)
+    parser.add_argument('--seed', type=int, default=1517)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--progress', help="Directory for the solver progress streams (JSONL per case)")
+    parser.add_argument('--case', nargs=2, metavar=('SOLVER', 'DATASET'), help=argparse.SUPPRESS)
+    parser.add_argument('--json', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        record = run_case(*args.case, args.time_limit, args.seed, args.progress)
+        with open(args.json, 'w') as f:
+            json.dump(record, f)
+        return 0
+
+    records = []
+    for dataset in args.datasets:
+        for solver in args.solvers:
+            record = run_isolated(solver, dataset, args.time_limit, args.seed, args.progress)
+            records.append(record)
+            if record.get('error'):
+                print(f"{solver:>13} {dataset:<24} error: {record['error']}")
+            else:
+                print(f"{solver:>13} {dataset:<24} {record.get('objective') or float('nan'):12.2f} "
+                      f"{record['total_time']:8.2f}s")
+    write_results(records)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(records, f, indent=2)
+        return 0
+    if not os.path.exists(args.baseline):
+        # Without a baseline nothing can be compared, which must not pass as "no regressions"
+        print(f"WARNING no baseline at {args.baseline}; store one with --save-baseline", file=sys.stderr)
+        return 1
+    with open(args.baseline) as f:
+        regressions = compare_with_baseline(records, json.load(f))
+    for regression in regressions:
+        print("REGRESSION", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import logging
+
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+
+from distance_matrix import haversine_block
+from local_search import unit_sphere, neighbour_lists, greedy_tour
+from tsp_lazy import prepare_callback, subtourelim, fractional_subtours, ordered_cycle
+
+
+def edge_distances(coordinates, tails, heads, unit='km'):
+    """
+    Haversine length of each edge (tails[e], heads[e]).
+    """
+    coords = np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    return haversine_block(coords[tails, 0], coords[tails, 1], coords[heads, 0], coords[heads, 1], unit)
+
+
+def knn_candidate_edges(coordinates, k=8):
+    """
+    Undirected candidate edges joining every city to its k nearest neighbours.
+
+    Returns:
+        tuple: (tails, heads) with tails < heads and no duplicates.
+    """
+    neighbours = neighbour_lists(coordinates, k)
+    n = len(neighbours)
+    tails = np.repeat(np.arange(n), neighbours.shape[1])
+    heads = neighbours.ravel()
+    return unique_edges(tails, heads, n)
+
+
+def unique_edges(tails, heads, n):
+    """
+    Normalise edges to tails < heads and drop duplicates.
+    """
+    low, high = np.minimum(tails, heads), np.maximum(tails, heads)
+    keys = np.unique(low.astype(np.int64) * n + high)
+    return keys // n, keys % n
+
+
+def solve_sparse_model(n, tails, heads, costs, cuts, start_tour, time_limit=None):
+    """
+    Solve the symmetric DFJ model over the given edges with lazy subtour elimination.
+
+    Previously found subtour sets are added up front as ordinary constraints.
+
+    Returns:
+        tuple: (tour as city indices, objective, list of all cut sets, Gurobi status, MIP gap).
+    """
+    m = gp.Model("TSP_candidate")
+    m.Params.LogToConsole = 0
+    if time_limit is not None:
+        m.Params.TimeLimit = time_limit
+    x = m.addVars(len(tails), obj=costs, vtype=GRB.BINARY, name='x')
+    xlist = [x[e] for e in range(len(tails))]
+
+    # Constraints: two edges incident to each city
+    incident = [[] for _ in range(n)]
+    for e, (a, b) in enumerate(zip(tails.tolist(), heads.tolist())):
+        incident[a].append(xlist[e])
+        incident[b].append(xlist[e])
+    for city in range(n):
+        m.addConstr(gp.quicksum(incident[city]) == 2)
+
+    prepare_callback(m, n, tails, heads, xlist)
+    m._cuts = list(cuts)
+    for component in cuts:
+        inside = np.zeros(n, dtype=bool)
+        inside[component] = True
+        positions = np.flatnonzero(inside[tails] & inside[heads])
+        m.addConstr(gp.quicksum(xlist[p] for p in positions) <= len(component) - 1)
+
+    # MIP start from the current tour; all of its edges are candidates
+    position = {(a, b): e for e, (a, b) in enumerate(zip(tails.tolist(), heads.tolist()))}
+    for var in xlist:
+        var.Start = 0
+    for a, b in zip(start_tour, np.roll(start_tour, -1)):
+        xlist[position[min(a, b), max(a, b)]].Start = 1
+
+    m.optimize(lambda model, where: subtourelim(model, where, range(n)))
+    if m.SolCount == 0:
+        raise RuntimeError("No tour found on the candidate graph")
+    selected = np.array(m.getAttr('X', xlist)) > 0.5
+    tour = np.array(ordered_cycle(n, tails[selected], heads[selected]))
+    objective, status, gap = m.ObjVal, m.Status, m.MIPGap
+    cuts = m._cuts
+    m.dispose()
+    return tour, objective, cuts, status, gap
+
+
+def lp_duals(n, tails, heads, costs, cuts, max_rounds=50):
+    """
+    Solve the LP relaxation over the candidate edges with subtour cutting planes.
+
+    Separation (tsp_lazy.fractional_subtours) and the cut rows only touch the candidate edges,
+    so a round stays linear in memory in the number of edges.
+
+    Returns:
+        tuple: (degree constraint duals, LP objective, cut sets including new ones).
+    """
+    lp = gp.Model("TSP_candidate_lp")
+    lp.Params.LogToConsole = 0
+    # No upper bound on x: every reduced cost at the LP optimum is then non-negative
+    x = lp.addMVar(len(tails), obj=costs, name='x')
+    cols = np.arange(len(tails))
+    degree = sp.csr_matrix((np.ones(2 * len(tails)), (np.r_[tails, heads], np.r_[cols, cols])),
+                           shape=(n, len(tails)))
+    degree_constrs = lp.addMConstr(degree, x, '=', np.full(n, 2.0))
+
+    cuts = list(cuts)
+
+    def add_cut(component):
+        inside = np.zeros(n, dtype=bool)
+        inside[component] = True
+        positions = np.flatnonzero(inside[tails] & inside[heads])
+        row = sp.csr_matrix((np.ones(len(positions)), (np.zeros(len(positions), dtype=np.intp), positions)),
+                            shape=(1, len(tails)))
+        lp.addMConstr(row, x, '<', np.array([len(component) - 1.0]))
+
+    for component in cuts:
+        add_cut(component)
+    for _ in range(max_rounds):
+        lp.optimize()
+        components = fractional_subtours(n, tails, heads, x.X)
+        if not components:
+            break
+        for component in components:
+            add_cut(component)
+            cuts.append(component)
+
+    duals = np.array(degree_constrs.Pi)
+    objective = lp.ObjVal
+    lp.dispose()
+    return duals, objective, cuts
+
+
+def price_missing_edges(coordinates, tails, heads, duals, slack, block_size=512, unit='km'):
+    """
+    Candidate edges whose reduced-cost lower bound c_ij - pi_i - pi_j is below slack.
+
+    Subtour duals can only raise a reduced cost, so an edge with bound >= slack cannot be
+    part of a tour shorter than the incumbent. tails/heads are the edges already in the model.
+
+    Returns:
+        tuple: (tails, heads) of the edges to add, with tails < heads.
+    """
+    coords = np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    lat, lon = coords[:, 0], coords[:, 1]
+    n = len(coords)
+    in_graph = np.sort(tails.astype(np.int64) * n + heads)
+    found_tails, found_heads = [], []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = haversine_block(lat[start:stop, None], lon[start:stop, None], lat[None, :], lon[None, :], unit)
+        reduced = block - duals[start:stop, None] - duals[None, :]
+        rows, cols = np.nonzero(reduced < slack)
+        rows += start
+        keep = rows < cols
+        rows, cols = rows[keep], cols[keep]
+        keep = ~np.isin(rows.astype(np.int64) * n + cols, in_graph, assume_unique=True)
+        found_tails.append(rows[keep])
+        found_heads.append(cols[keep])
+    return np.concatenate(found_tails), np.concatenate(found_heads)
+
+
+def solve_candidate_tsp(places, coordinates, k=8, max_rounds=20, max_new_edges=None, time_limit=None,
+                        stats=None):
+    """
+    Solve the TSP over a k-nearest-neighbour candidate graph and price missing edges back in.
+
+    After each solve the LP relaxation of the sparse model provides duals; every missing edge
+    whose reduced cost could still lead to a shorter tour is added and the model re-solved,
+    until no such edge remains and the tour is optimal for the complete graph. The pricing
+    argument needs the sparse tour to be optimal, so if the sparse model stops on time_limit
+    the tour is returned without that proof.
+
+    Parameters:
+        stats (dict): If given, filled with the last sparse status, whether the tour is proven
+            optimal for the complete graph, the bound (only known when proven) and the gap
+            (0 when proven, the sparse MIPGap when the sparse model stopped early).
+
+    Returns:
+        tuple: (optimal_route as place names closing the loop, total distance)
+    """
+    n = len(places)
+    neighbours = neighbour_lists(coordinates, k)
+    tails, heads = knn_candidate_edges(coordinates, k)
+
+    # Add the edges of a greedy tour so the sparse model always has a feasible solution
+    tour = greedy_tour(coordinates, neighbours)
+    tails, heads = unique_edges(np.r_[tails, tour], np.r_[heads, np.roll(tour, -1)], n)
+    cuts = []
+    if max_new_edges is None:
+        max_new_edges = 10 * n
+
+    proven = False
+    for round_number in range(max_rounds):
+        costs = edge_distances(coordinates, tails, heads)
+        tour, objective, cuts, status, sparse_gap = solve_sparse_model(n, tails, heads, costs, cuts, tour, time_limit)
+        if status != GRB.OPTIMAL:
+            logging.warning(f"Round {round_number}: sparse model stopped with status {status}, "
+                            f"tour {objective:.2f} is not proven optimal")
+            break
+        duals, lp_objective, cuts = lp_duals(n, tails, heads, costs, cuts)
+        new_tails, new_heads = price_missing_edges(coordinates, tails, heads, duals,
+                                                   objective - lp_objective - 1e-6)
+        logging.info(f"Round {round_number}: {len(tails)} edges, tour {objective:.2f}, "
+                     f"LP bound {lp_objective:.2f}, {len(new_tails)} edges priced in")
+        if len(new_tails) == 0:
+            proven = True
+            break
+        if len(new_tails) > max_new_edges:
+            reduced = (edge_distances(coordinates, new_tails, new_heads) - duals[new_tails] - duals[new_heads])
+            best = np.argsort(reduced)[:max_new_edges]
+            new_tails, new_heads = new_tails[best], new_heads[best]
+        tails, heads = np.r_[tails, new_tails], np.r_[heads, new_heads]
+    else:
+        logging.warning("Edge pricing stopped at max_rounds before proving optimality")
+
+    if stats is not None:
+        stats.update(status=status, proven=proven, objective=objective,
+                     bound=objective if proven else None,
+                     gap=0.0 if proven else sparse_gap if status != GRB.OPTIMAL else None)
+    optimal_route = [places[i] for i in tour] + [places[tour[0]]]
+    return optimal_route, objective
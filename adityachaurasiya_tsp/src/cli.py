@@ -0,0 +1,231 @@
+"""
+Single command-line entry point for the TSP solve paths.
+
+    python cli.py heuristic --input ../data/tsp_input.csv --time-limit 30 --no-plot
+    python cli.py warm --input ../data/tsp_input.csv --cities 40 --no-write
+
+Heavy dependencies (gurobipy, pandas, folium, pulp, ortools) are imported inside the backend or
+step that needs them, so e.g. a heuristic run without a map only loads NumPy and SciPy.
+"""
+import os
+import csv
+import sys
+import logging
+import argparse
+
+import numpy as np
+
+from instrumentation import PhaseTimer
+
+DEFAULT_INPUT = os.path.join('..', 'data', 'tsp_input.csv')
+DEFAULT_MAP = os.path.join('..', 'output', 'tsp_route_cli.html')
+
+
+def read_places(file_path, num_places=None):
+    """
+    Read Place_Name / Latitude / Longitude rows with the csv module (no pandas import).
+
+    Like read_data in the scripts, only the first num_places rows are used and duplicate
+    place names are dropped.
+    """
+    places, coordinates, seen = [], [], set()
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        for count, row in enumerate(csv.DictReader(f)):
+            if num_places is not None and count >= num_places:
+                break
+            if row['Place_Name'] in seen:
+                continue
+            seen.add(row['Place_Name'])
+            places.append(row['Place_Name'])
+            coordinates.append((float(row['Latitude']), float(row['Longitude'])))
+    return places, coordinates
+
+
+def mtz_tour(model, x, arcs, n):
+    from tsp_model import successors, follow_successors
+
+    if model.SolCount == 0:
+        return None
+    return follow_successors(successors(x.X, arcs, n))
+
+
+# Backends take (places, coordinates, distance_matrix, args) and return a tour of city indices
+
+def solve_mtz(places, coordinates, distance_matrix, args):
+    from tsp_model import build_mtz_model
+
+    if args.cache:
+        from solution_cache import cached_mtz_tsp
+
+        return cached_mtz_tsp(places, coordinates, time_limit=args.time_limit)['tour']
+    model, x, u, arcs = build_mtz_model(distance_matrix)
+    model.Params.TimeLimit = args.time_limit
+    model.optimize()
+    return mtz_tour(model, x, arcs, len(places))
+
+
+def solve_warm(places, coordinates, distance_matrix, args):
+    from tsp_model import build_mtz_model, set_mip_starts
+    from construction import multi_start_tours
+    from local_search import improve_matrix_tour
+
+    model, x, u, arcs = build_mtz_model(distance_matrix)
+    model.Params.TimeLimit = args.time_limit
+    model.Params.MIPFocus = 1
+    tours = [tour for _, tour in multi_start_tours(distance_matrix, min(10, args.time_limit / 10), top_k=3)]
+    if tours:
+        tours[0], _ = improve_matrix_tour(tours[0], distance_matrix, time_budget=2)
+        set_mip_starts(model, x, tours)
+    model.optimize()
+    return mtz_tour(model, x, arcs, len(places))
+
+
+def solve_portfolio(places, coordinates, distance_matrix, args):
+    from construction import multi_start_tours
+    from portfolio import solve_portfolio as run_portfolio
+
+    tours = multi_start_tours(distance_matrix, min(10, args.time_limit / 10))
+    tour, _, _, _ = run_portfolio(distance_matrix, time_limit=args.time_limit,
+                                  start_tour=tours[0][1] if tours else None)
+    return None if tour is None else tour.tolist()
+
+
+def solve_lazy(places, coordinates, distance_matrix, args):
+    from tsp_lazy import solve_tsp_model
+
+    if args.cache:
+        from solution_cache import cached_lazy_tsp
+
+        return cached_lazy_tsp(places, dict(zip(places, coordinates)), time_limit=args.time_limit,
+                               user_cuts=True)['tour']
+    tour = solve_tsp_model(places, dict(zip(places, coordinates)), user_cuts=True, time_limit=args.time_limit)
+    if tour is None:
+        return None
+    index = {place: i for i, place in enumerate(places)}
+    return [index[place] for place in tour]
+
+
+def solve_candidate(places, coordinates, distance_matrix, args):
+    from candidate_graph import solve_candidate_tsp
+
+    route, _ = solve_candidate_tsp(places, coordinates, time_limit=args.time_limit)
+    index = {place: i for i, place in enumerate(places)}
+    return [index[place] for place in route[:-1]]
+
+
+def solve_heuristic(places, coordinates, distance_matrix, args):
+    from heuristic_solver import solve_heuristic_tsp
+
+    route, _, _ = solve_heuristic_tsp(places, coordinates, time_budget=args.time_limit)
+    index = {place: i for i, place in enumerate(places)}
+    return [index[place] for place in route[:-1]]
+
+
+def solve_pulp(places, coordinates, distance_matrix, args):
+    import tsp_solver
+
+    problem, x = tsp_solver.build_model(places, distance_matrix)
+    route, _ = tsp_solver.solve_tsp(problem, x, places, write_lp=not args.no_write,
+                                      time_limit=args.time_limit)
+    if route is None:
+        return None
+    index = {place: i for i, place in enumerate(places)}
+    return [index[place] for place in route[:-1]]
+
+
+def solve_ortools(places, coordinates, distance_matrix, args):
+    import warm2
+
+    initial_solution, _ = warm2.solve_tsp_ortools(distance_matrix)
+    model, x = warm2.build_gurobi_model(places, distance_matrix, initial_solution, write_lp=not args.no_write)
+    model.Params.TimeLimit = args.time_limit
+    solution = warm2.extract_solution(model, x, len(places))
+    if not solution:
+        return None
+    succ = dict(solution)
+    tour = [0]
+    while len(tour) < len(places):
+        tour.append(succ[tour[-1]])
+    return tour
+
+
+# name: (backend, needs the full distance matrix)
+BACKENDS = {
+    'mtz': (solve_mtz, True),
+    'warm': (solve_warm, True),
+    'portfolio': (solve_portfolio, True),
+    'lazy': (solve_lazy, False),
+    'candidate': (solve_candidate, False),
+    'heuristic': (solve_heuristic, False),
+    'pulp': (solve_pulp, True),
+    'ortools': (solve_ortools, True),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a TSP instance with one of the solve paths")
+    parser.add_argument('backend', choices=list(BACKENDS))
+    parser.add_argument('--input', default=DEFAULT_INPUT, help="CSV with Place_Name, Latitude, Longitude")
+    parser.add_argument('--cities', type=int, help="Only use the first N rows of the input")
+    parser.add_argument('--time-limit', type=float, default=300, help="Solver time limit in seconds")
+    parser.add_argument('--map', default=DEFAULT_MAP, help="Output path of the HTML route map")
+    parser.add_argument('--no-plot', action='store_true', help="Do not render the HTML map")
+    parser.add_argument('--clustered', action='store_true', help="Draw the stops as a marker cluster layer")
+    parser.add_argument('--no-write', action='store_true', help="Solve only: write no map or LP file")
+    parser.add_argument('--timings', action='store_true', help="Log the time spent in every phase")
+    parser.add_argument('--cache', action='store_true',
+                        help="mtz / lazy: reuse solutions of identical instances from ../cache/solutions")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    timer = PhaseTimer(enabled=args.timings)
+    backend, needs_matrix = BACKENDS[args.backend]
+
+    with timer.phase('read'):
+        places, coordinates = read_places(args.input, args.cities)
+    distance_matrix = None
+    if needs_matrix:
+        from distance_cache import cached_distance_matrix
+
+        with timer.phase('distance'):
+            distance_matrix = cached_distance_matrix(coordinates)
+
+    with timer.phase('optimize'):
+        tour = backend(places, coordinates, distance_matrix, args)
+    if tour is None:
+        print("No solution found.")
+        return 1
+
+    with timer.phase('extract'):
+        optimal_route = [places[i] for i in tour] + [places[tour[0]]]
+    # The map is rendered and written in a background thread while the results are reported
+    writer = None
+    if not (args.no_plot or args.no_write):
+        from route_map import save_route_map
+
+        writer = save_route_map(optimal_route, coordinates, places, args.map, background=True,
+                                clustered=args.clustered)
+    with timer.phase('extract'):
+        tour = np.asarray(tour)
+        if distance_matrix is None:
+            from distance_matrix import haversine_block
+
+            lat, lon = np.radians(np.asarray(coordinates)[tour]).T
+            total_distance = float(haversine_block(lat, lon, np.roll(lat, -1), np.roll(lon, -1)).sum())
+        else:
+            total_distance = float(np.asarray(distance_matrix)[tour, np.roll(tour, -1)].sum())
+    print("Optimal Route:", " -> ".join(optimal_route))
+    print("Total Distance:", total_distance)
+
+    if writer is not None:
+        with timer.phase('plot'):
+            writer.join()
+    timer.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+# Distance matrix of the current worker process, set once by init_worker
+_distance_matrix = None
+
+
+def nearest_neighbour(distance_matrix, start, deadline=None):
+    """
+    Nearest neighbour tour from the given start city.
+    """
+    n = len(distance_matrix)
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        if deadline is not None and time.time() > deadline:
+            return None
+        row = np.where(visited, np.inf, distance_matrix[tour[-1]])
+        nxt = int(np.argmin(row))
+        tour.append(nxt)
+        visited[nxt] = True
+    return np.array(tour)
+
+
+def insertion(distance_matrix, start, rule='farthest', deadline=None):
+    """
+    Farthest or cheapest insertion tour grown from the given start city.
+
+    For every city not yet in the tour the cheapest insertion edge is kept up to date, so each
+    step only rescans the cities whose best edge was just split.
+
+    Parameters:
+        rule (str): 'farthest' inserts the city farthest from the tour, 'cheapest' the city
+            with the smallest insertion cost; both at their cheapest position.
+    """
+    D = np.asarray(distance_matrix)
+    n = len(D)
+    succ = np.full(n, -1)
+    succ[start] = start
+    in_tour = np.zeros(n, dtype=bool)
+    in_tour[start] = True
+    # Cheapest insertion of every city: after best_tail[u] at cost best_cost[u]
+    best_tail = np.full(n, start)
+    best_cost = D[start] + D[:, start]
+    nearest = D[start].astype(np.float64)  # Distance to the closest tour city
+
+    for _ in range(n - 1):
+        if deadline is not None and time.time() > deadline:
+            return None
+        if rule == 'farthest':
+            u = int(np.argmax(np.where(in_tour, -np.inf, nearest)))
+        else:
+            u = int(np.argmin(np.where(in_tour, np.inf, best_cost)))
+        i = best_tail[u]
+        j = succ[i]
+        succ[i], succ[u] = u, j
+        in_tour[u] = True
+        nearest = np.minimum(nearest, D[u])
+
+        # Edge (i, j) was replaced by (i, u) and (u, j): rescan the cities that used it
+        stale = np.flatnonzero(~in_tour & (best_tail == i))
+        if len(stale):
+            tails = np.flatnonzero(in_tour)
+            cost = (D[np.ix_(tails, stale)] + D[np.ix_(stale, succ[tails])].T
+                    - D[tails, succ[tails]][:, None])
+            pick = np.argmin(cost, axis=0)
+            best_tail[stale] = tails[pick]
+            best_cost[stale] = cost[pick, np.arange(len(stale))]
+        for a, b in ((i, u), (u, j)):
+            cost = D[a] + D[:, b] - D[a, b]
+            better = ~in_tour & (cost < best_cost)
+            best_tail[better] = a
+            best_cost[better] = cost[better]
+
+    tour = [start]
+    while len(tour) < n:
+        tour.append(int(succ[tour[-1]]))
+    return np.array(tour)
+
+
+def greedy_edge(distance_matrix, deadline=None):
+    """
+    Greedy matching tour: add the shortest edges that keep degrees <= 2 and create no cycle.
+    """
+    D = np.asarray(distance_matrix)
+    n = len(D)
+    if n < 3:
+        return np.arange(n)
+    tails, heads = np.triu_indices(n, 1)
+    order = np.argsort(D[tails, heads], kind='stable')
+    degree = np.zeros(n, dtype=int)
+    parent = list(range(n))
+    adjacent = [[] for _ in range(n)]
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    added = 0
+    for count, e in enumerate(order):
+        if count % 10000 == 0 and deadline is not None and time.time() > deadline:
+            return None
+        a, b = int(tails[e]), int(heads[e])
+        if degree[a] == 2 or degree[b] == 2:
+            continue
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        parent[root_a] = root_b
+        degree[a] += 1
+        degree[b] += 1
+        adjacent[a].append(b)
+        adjacent[b].append(a)
+        added += 1
+        if added == n - 1:
+            break
+
+    # The edges form one Hamiltonian path; walk it from one end and close the loop
+    tour = [int(np.flatnonzero(degree < 2)[0])]
+    previous = -1
+    while len(tour) < n:
+        nxt = next(c for c in adjacent[tour[-1]] if c != previous)
+        previous = tour[-1]
+        tour.append(nxt)
+    return np.array(tour)
+
+
+def tour_cost(distance_matrix, tour):
+    D = np.asarray(distance_matrix)
+    return float(D[tour, np.roll(tour, -1)].sum())
+
+
+def init_worker(distance_matrix):
+    global _distance_matrix
+    _distance_matrix = np.asarray(distance_matrix)
+
+
+def construct(rule, start, deadline):
+    """
+    Run one construction rule in a worker; returns (rule, start, length, tour) or None on timeout.
+    """
+    if rule == 'nearest_neighbour':
+        tour = nearest_neighbour(_distance_matrix, start, deadline)
+    elif rule in ('farthest_insertion', 'cheapest_insertion'):
+        tour = insertion(_distance_matrix, start, rule.split('_')[0], deadline)
+    elif rule == 'greedy_edge':
+        tour = greedy_edge(_distance_matrix, deadline)
+    else:
+        raise ValueError(f"Unknown construction rule: {rule}")
+    if tour is None:
+        return None
+    return rule, start, tour_cost(_distance_matrix, tour), tour
+
+
+# Cheapest rules first, so a single worker still returns tours before the deadline
+RULES = ('nearest_neighbour', 'greedy_edge', 'farthest_insertion', 'cheapest_insertion')
+
+
+def multi_start_tours(distance_matrix, time_limit=10.0, rules=RULES, num_starts=None, top_k=1,
+                      max_workers=None, seed=1517):
+    """
+    Build tours from many start cities and several construction rules in a process pool.
+
+    Every task checks the shared wall-clock deadline, so the stage never runs much past
+    time_limit; tasks still queued at the deadline are cancelled.
+
+    Parameters:
+        distance_matrix: n x n array of travel distances.
+        time_limit (float): Wall-clock limit in seconds for the whole stage.
+        rules (tuple): Construction rules from RULES; greedy_edge does not depend on the start.
+        num_starts (int): Start cities per rule, city 0 always included; defaults to the worker count.
+        top_k (int): Number of distinct tours to return.
+
+    Returns:
+        list: Up to top_k (length, tour) pairs, shortest first.
+    """
+    distance_matrix = np.asarray(distance_matrix)
+    n = len(distance_matrix)
+    start_time = time.time()
+    deadline = start_time + time_limit
+    max_workers = max_workers or os.cpu_count()
+    num_starts = min(num_starts or max_workers, n)
+    rng = np.random.default_rng(seed)
+    starts = [0] + rng.choice(np.arange(1, n), num_starts - 1, replace=False).tolist()
+
+    tasks = [(rule, start) for rule in rules for start in (starts if rule != 'greedy_edge' else [0])]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                             initargs=(distance_matrix,)) as executor:
+        pending = {executor.submit(construct, rule, start, deadline) for rule, start in tasks}
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.time(), 0) + 1,
+                                 return_when=FIRST_COMPLETED)
+            results += [future.result() for future in done if future.result() is not None]
+            if time.time() > deadline:
+                for future in pending:
+                    future.cancel()
+                break
+
+    # Keep the shortest distinct tours (same cycle = same set of edges)
+    best, seen = [], set()
+    for rule, start, length, tour in sorted(results, key=lambda result: result[2]):
+        edges = frozenset(map(frozenset, zip(tour.tolist(), np.roll(tour, -1).tolist())))
+        if edges not in seen:
+            seen.add(edges)
+            best.append((length, tour))
+            logging.info(f"Construction: {rule} from city {start}, length {length:.2f}")
+        if len(best) == top_k:
+            break
+    logging.info(f"Construction stage: {len(results)}/{len(tasks)} tours in {time.time() - start_time:.1f}s")
+    return best
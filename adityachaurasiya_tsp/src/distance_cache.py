@@ -0,0 +1,106 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from distance_matrix import calculate_distance_matrix
+
+DEFAULT_CACHE_DIR = os.environ.get('TSP_CACHE_DIR', os.path.join('..', 'cache', 'distance_matrix'))
+DEFAULT_MAX_BYTES = int(os.environ.get('TSP_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+
+def coordinate_fingerprint(coordinates, unit='km', dtype=np.float64):
+    """
+    Hash the (Latitude, Longitude) column together with the distance unit and dtype.
+    """
+    coords = np.ascontiguousarray(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    digest = hashlib.sha256()
+    digest.update(coords.tobytes())
+    digest.update(f'|{unit}|{np.dtype(dtype).str}'.encode())
+    return digest.hexdigest()
+
+
+def evict_lru(cache_dir, max_bytes, suffix='.npy', keep=()):
+    """
+    Delete the least recently used files in cache_dir until their total size is at most max_bytes.
+
+    Access time is tracked through the file mtime, which readers bump on every hit.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(suffix):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Another worker evicted it first
+        total -= size
+
+
+class DistanceMatrixCache:
+    """
+    On-disk cache of distance matrices keyed by coordinate fingerprint.
+
+    Matrices are stored as .npy files and opened read-only with memory mapping, so repeated
+    solves and worker processes on the same host share a single page-cache copy.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            matrix = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            pass
+        return matrix
+
+    def store(self, key, matrix):
+        path = self.path(key)
+        # Write to a temporary file and rename it so readers never see a partial matrix
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        evict_lru(self.cache_dir, self.max_bytes, keep=(path,))
+        return np.load(path, mmap_mode='r')
+
+    def get_or_compute(self, coordinates, unit='km', dtype=np.float64):
+        key = coordinate_fingerprint(coordinates, unit, dtype)
+        matrix = self.load(key)
+        if matrix is None:
+            matrix = self.store(key, calculate_distance_matrix(coordinates, unit=unit, dtype=dtype))
+        return matrix
+
+
+def cached_distance_matrix(coordinates, unit='km', dtype=np.float64, cache_dir=DEFAULT_CACHE_DIR,
+                           max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Return the distance matrix for coordinates, reusing a memory-mapped copy from disk when possible.
+
+    The returned array is read-only; copy it before modifying.
+    """
+    return DistanceMatrixCache(cache_dir, max_bytes).get_or_compute(coordinates, unit, dtype)
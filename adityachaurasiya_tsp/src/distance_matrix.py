@@ -0,0 +1,53 @@
+import numpy as np
+
+# Mean earth radius per unit, the same constants the haversine package uses
+EARTH_RADIUS = {
+    'km': 6371.0088,
+    'm': 6371008.8,
+    'mi': 3958.7613,
+    'nmi': 3440.0695,
+}
+
+
+def haversine_block(lat1, lon1, lat2, lon2, unit='km'):
+    """
+    Vectorized haversine distance between two sets of points given in radians.
+
+    The inputs broadcast against each other, so a column of rows against a row of
+    columns gives a full block of the distance matrix in one call.
+    """
+    d = (np.sin((lat2 - lat1) * 0.5) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2)
+    return 2 * EARTH_RADIUS[unit] * np.arcsin(np.sqrt(d))
+
+
+def calculate_distance_matrix(coordinates, unit='km', dtype=np.float64, block_size=512):
+    """
+    Calculate the symmetric haversine distance matrix for a list of coordinates.
+
+    Only the upper triangle (plus the small diagonal blocks) is evaluated; every block is
+    written to both halves of the matrix, so no pair is computed twice.
+
+    Parameters:
+        coordinates (list): (Latitude, Longitude) pairs in decimal degrees.
+        unit (str): One of 'km', 'm', 'mi' or 'nmi'.
+        dtype: Output dtype, np.float64 (default) or np.float32 to halve memory.
+        block_size (int): Number of rows evaluated per vectorized pass.
+
+    Returns:
+        numpy.ndarray: n x n matrix with a zero diagonal.
+    """
+    coords = np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    lat, lon = coords[:, 0], coords[:, 1]
+    n = len(coords)
+    distance_matrix = np.empty((n, n), dtype=dtype)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = haversine_block(lat[start:stop, None], lon[start:stop, None],
+                                lat[None, start:], lon[None, start:], unit)
+        distance_matrix[start:stop, start:] = block
+        distance_matrix[start:, start:stop] = block.T
+
+    np.fill_diagonal(distance_matrix, 0.0)
+    return distance_matrix
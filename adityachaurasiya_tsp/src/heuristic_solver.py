@@ -0,0 +1,147 @@
+import time
+import logging
+
+import numpy as np
+
+from local_search import TourSearch, coordinate_distance, tour_length, neighbour_lists, greedy_tour
+from route_map import save_route_map
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def read_data(file_path):
+    import pandas as pd
+
+    df = pd.read_csv(file_path)
+    places = df['Place_Name'].unique().tolist()
+    coordinates = list(zip(df['Latitude'], df['Longitude']))
+    return places, coordinates
+
+
+def segment_kick(search, rng, max_segment=50):
+    """
+    Local double-bridge move: swap two adjacent tour segments A B -> B A.
+
+    Both segments are at most max_segment long, so only the three joins and the cities around
+    them change and the don't-look-bit queue stays small.
+
+    Returns:
+        float: Change in tour length.
+    """
+    n, tour, dist = search.n, search.tour, search.dist
+    first = int(rng.integers(1, min(max_segment, n // 3) + 1))
+    second = int(rng.integers(1, min(max_segment, n // 3) + 1))
+    start = int(rng.integers(0, n - first - second))
+    mid, stop = start + first, start + first + second
+
+    # Removed joins (p, a), (a_end, b), (b_end, q); added (p, b), (b_end, a), (a_end, q)
+    p, a, a_end, b, b_end, q = tour[[start - 1, start, mid - 1, mid, stop - 1, stop % n]]
+    delta = (dist(p, b) + dist(b_end, a) + dist(a_end, q)
+             - dist(p, a) - dist(a_end, b) - dist(b_end, q))
+
+    tour[start:stop] = np.r_[tour[mid:stop], tour[start:mid]]
+    search.pos[tour[start:stop]] = np.arange(start, stop)
+    search.push(p, a, a_end, b, b_end, q)
+    return float(delta)
+
+
+def solve_heuristic_tsp(places, coordinates, time_budget=60.0, k=10, max_segment=50, seed=1517):
+    """
+    Heuristic-only TSP for instances far beyond the MIP scripts; Gurobi is never called.
+
+    A nearest neighbour tour is improved with 2-opt / Or-opt (local_search.TourSearch) and
+    then by iterated local search: every iteration applies a local double-bridge kick,
+    repairs the tour with the same moves and keeps the result only if it is shorter.
+    Distances are evaluated on demand, so memory stays O(n k). pandas and folium are only
+    imported by the reading / plotting helpers, so cli.py can call this without loading them.
+
+    Parameters:
+        places (list): List of place names.
+        coordinates (list): (Latitude, Longitude) for every place.
+        time_budget (float): Wall-clock limit in seconds, including construction.
+        k (int): Neighbour list length.
+
+    Returns:
+        tuple: (optimal_route as place names closing the loop, total distance, stats) where stats
+        holds iteration counts, improvements per second and the (seconds, objective) trace.
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + time_budget
+    rng = np.random.default_rng(seed)
+    dist = coordinate_distance(coordinates)
+    neighbours = neighbour_lists(coordinates, k)
+
+    search = TourSearch(greedy_tour(coordinates, neighbours), dist, neighbours)
+    objective = tour_length(search.tour, dist)
+    trace = [(time.perf_counter() - start_time, objective)]
+    search.run(deadline - time.perf_counter())
+    objective += search.delta
+    trace.append((time.perf_counter() - start_time, objective))
+
+    # Iterated local search: kick, repair, keep only improvements
+    iterations = improvements = 0
+    if search.n >= 8:
+        best_tour = search.tour.copy()
+        while time.perf_counter() < deadline:
+            iterations += 1
+            search.delta = segment_kick(search, rng, max_segment)
+            search.run(deadline - time.perf_counter())
+            if search.delta < -1e-9:
+                objective += search.delta
+                improvements += 1
+                best_tour[:] = search.tour
+                trace.append((time.perf_counter() - start_time, objective))
+            else:
+                # Drop the unfinished queue as well, the restored tour is locally optimal
+                search.tour[:] = best_tour
+                search.pos[best_tour] = np.arange(search.n)
+                search.queue.clear()
+                search.queued[:] = False
+        search.tour = best_tour
+
+    elapsed = time.perf_counter() - start_time
+    stats = {
+        'seconds': elapsed,
+        'iterations': iterations,
+        'improvements': improvements,
+        'moves': search.moves,
+        'improvements_per_second': improvements / elapsed,
+        'trace': trace,
+    }
+    logging.info(f"{iterations} kicks, {improvements} improvements "
+                 f"({stats['improvements_per_second']:.1f}/s), {search.moves} moves in {elapsed:.1f}s")
+
+    tour = search.tour
+    optimal_route = [places[i] for i in tour] + [places[tour[0]]]
+    # Report the exact length rather than the accumulated deltas
+    return optimal_route, tour_length(tour, dist), stats
+
+
+def save_trace(trace, file_path):
+    """
+    Write the objective-vs-time trace as CSV.
+    """
+    import pandas as pd
+
+    pd.DataFrame(trace, columns=['seconds', 'objective']).to_csv(file_path, index=False)
+
+
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, '../output/tsp_route_heuristic.html',
+                          background=background)
+
+
+if __name__ == "__main__":
+    data_file_path = '../data/tsp_input.csv'
+    time_budget = 60
+    places, coordinates = read_data(data_file_path)
+    optimal_route, total_distance, stats = solve_heuristic_tsp(places, coordinates, time_budget)
+    print("Optimal Route:", " -> ".join(optimal_route))
+    print("Total Distance:", total_distance)
+    print(f"Improvements per second: {stats['improvements_per_second']:.1f}")
+    save_trace(stats['trace'], '../output/tsp_heuristic_trace.csv')
+
+    if optimal_route:
+        plot_route(optimal_route, coordinates, places)
+    print(f'Execution complete')
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import logging
+from itertools import combinations
+
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+from distance_matrix import haversine_block
+from distance_cache import cached_distance_matrix
+from local_search import improve_matrix_tour
+from tsp_lazy import prepare_callback, subtourelim, ordered_cycle
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class IncrementalTSP:
+    """
+    Symmetric DFJ model (as in tsp_lazy.py) that is kept alive between solves, so a few added or
+    removed cities only touch their own edge variables and degree constraints.
+
+    Every subtour cut found by the callback is kept as a lazy constraint (Lazy = 1) and stays in
+    the model for the next solve; cuts through a removed city are shrunk to the remaining cities,
+    which keeps them valid. Before re-optimizing, the previous tour is repaired (removed cities
+    dropped, new ones placed by cheapest insertion), polished with 2-opt / Or-opt and passed to
+    Gurobi as MIP start. save() / load() keep cities, tour and cuts on disk between runs.
+
+    Usage:
+        tsp = IncrementalTSP(places, coordinates)
+        tsp.solve()
+        tsp.add_cities(['Hassan, Karnataka, India'], [(13.00, 76.10)])
+        tsp.remove_cities(['Sagar, Karnataka, India'])
+        tour = tsp.solve()
+    """
+
+    def __init__(self, places, coordinates, env=None, user_cuts=True, polish_time=1.0):
+        """
+        Parameters:
+            places (list): City names.
+            coordinates (list): (Latitude, Longitude) for every city.
+            env (gurobipy.Env): Environment to build the model in; the caller keeps ownership.
+            user_cuts (bool): Also separate subtour cuts on fractional node relaxations.
+            polish_time (float): Local search budget in seconds for the repaired start tour.
+        """
+        self.places = list(places)
+        self.coordinates = {place: tuple(map(float, c)) for place, c in zip(self.places, coordinates)}
+        self.distance_matrix = np.array(cached_distance_matrix([self.coordinates[p] for p in self.places]))
+        self.user_cuts = user_cuts
+        self.polish_time = polish_time
+        self.tour = None
+        self.objective = None
+        self.cuts = {}  # frozenset of city names -> lazy constraint
+
+        self.model = gp.Model("TSP_incremental", env=env)
+        self.model.Params.LogToConsole = 0
+        self.x = {}  # (a, b) with a listed before b in self.places -> edge variable
+        n = len(self.places)
+        for i, j in combinations(range(n), 2):
+            self.x[self.places[i], self.places[j]] = self.model.addVar(
+                obj=round(float(self.distance_matrix[i, j]), 2), vtype=GRB.BINARY,
+                name=f"x[{self.places[i]},{self.places[j]}]")
+        self.degree = {}
+        incident = self.incident_edges()
+        for place in self.places:
+            self.degree[place] = self.model.addConstr(gp.quicksum(incident[place]) == 2, name=f"degree[{place}]")
+
+    def incident_edges(self):
+        incident = {place: [] for place in self.places}
+        for (a, b), var in self.x.items():
+            incident[a].append(var)
+            incident[b].append(var)
+        return incident
+
+    def edge(self, a, b):
+        return self.x[a, b] if (a, b) in self.x else self.x[b, a]
+
+    def add_cities(self, places, coordinates):
+        """
+        Add new cities: one edge variable per existing city, added to that city's degree
+        constraint as a column, and a degree constraint for the new city.
+
+        Existing cuts stay valid unchanged, since no new edge lies inside an old cut set.
+        """
+        for place, (lat, lon) in zip(places, coordinates):
+            if place in self.coordinates:
+                raise ValueError(f"City already in the model: {place}")
+            old = np.radians(np.array([self.coordinates[p] for p in self.places]))
+            row = haversine_block(np.radians(lat), np.radians(lon), old[:, 0], old[:, 1])
+            new_vars = [self.model.addVar(obj=round(float(d), 2), vtype=GRB.BINARY, name=f"x[{other},{place}]",
+                                          column=gp.Column(1.0, self.degree[other]))
+                        for other, d in zip(self.places, row)]
+            self.x.update({(other, place): var for other, var in zip(self.places, new_vars)})
+            self.degree[place] = self.model.addConstr(gp.quicksum(new_vars) == 2, name=f"degree[{place}]")
+
+            n = len(self.places)
+            matrix = np.zeros((n + 1, n + 1))
+            matrix[:n, :n] = self.distance_matrix
+            matrix[n, :n] = matrix[:n, n] = row
+            self.distance_matrix = matrix
+            self.places.append(place)
+            self.coordinates[place] = (float(lat), float(lon))
+
+    def remove_cities(self, places):
+        """
+        Remove cities with their edge variables and degree constraints.
+
+        A cut through a removed city is replaced by the cut on the remaining cities of its set
+        (still a valid subtour inequality) if that set has at least three cities. Any other cut
+        whose set now holds every remaining city (x(E(V)) <= |V| - 1 would rule out all tours)
+        is dropped.
+        """
+        removed = set(places)
+        missing = removed - set(self.places)
+        if missing:
+            raise ValueError(f"Cities not in the model: {sorted(missing)}")
+        keep = [i for i, place in enumerate(self.places) if place not in removed]
+        self.places = [self.places[i] for i in keep]
+        self.distance_matrix = self.distance_matrix[np.ix_(keep, keep)]
+        for place in removed:
+            del self.coordinates[place]
+            self.model.remove(self.degree.pop(place))
+
+        n = len(self.places)
+        affected = [cut for cut in self.cuts if cut & removed]
+        invalid = [cut for cut in self.cuts if not cut & removed and not 3 <= len(cut) <= n - 1]
+        for cut in affected + invalid:
+            self.model.remove(self.cuts.pop(cut))
+        edges = [key for key in self.x if key[0] in removed or key[1] in removed]
+        self.model.remove([self.x.pop(key) for key in edges])
+        self.model.update()
+        self.add_cuts(cut - removed for cut in affected)
+
+        if self.tour is not None:
+            self.tour = [place for place in self.tour if place not in removed]
+
+    def add_cuts(self, cuts):
+        """
+        Add subtour inequalities on sets of city names as lazy constraints, skipping known and
+        trivial sets.
+        """
+        n = len(self.places)
+        for cut in map(frozenset, cuts):
+            if cut in self.cuts or not 3 <= len(cut) <= n - 1:
+                continue
+            members = sorted(cut, key=self.places.index)
+            expr = gp.quicksum(self.edge(a, b) for a, b in combinations(members, 2))
+            constr = self.model.addConstr(expr <= len(cut) - 1)
+            constr.Lazy = 1
+            self.cuts[cut] = constr
+
+    def repair_tour(self):
+        """
+        Insert every city missing from the previous tour at its cheapest position.
+
+        Returns:
+            list: City indices (positions in self.places) in visiting order, or None.
+        """
+        if not self.tour:
+            return None
+        index = {place: i for i, place in enumerate(self.places)}
+        tour = [index[place] for place in self.tour]
+        D = self.distance_matrix
+        for city in sorted(set(range(len(self.places))) - set(tour)):
+            if len(tour) < 2:
+                tour.append(city)
+                continue
+            here, after = np.array(tour), np.roll(tour, -1)
+            cost = D[here, city] + D[city, after] - D[here, after]
+            tour.insert(int(np.argmin(cost)) + 1, city)
+        return tour
+
+    def solve(self, time_limit=None):
+        """
+        Optimize the current model, warm-started from the repaired previous tour.
+
+        Returns:
+            list: City names in visiting order.
+        """
+        m = self.model
+        n = len(self.places)
+        if time_limit is not None:
+            m.Params.TimeLimit = time_limit
+        m.update()
+
+        start = self.repair_tour()
+        if start is not None and n > 3:
+            start, _ = improve_matrix_tour(start, self.distance_matrix, time_budget=self.polish_time)
+            m.setAttr('Start', list(self.x.values()), [0.0] * len(self.x))
+            for a, b in zip(start, np.roll(start, -1)):
+                self.edge(self.places[a], self.places[b]).Start = 1.0
+
+        # Edge arrays for the tsp_lazy callback, rebuilt because indices shift with every change
+        tails, heads = (np.array(side, dtype=np.intp) for side in zip(*combinations(range(n), 2)))
+        xlist = [self.edge(self.places[i], self.places[j]) for i, j in zip(tails, heads)]
+        prepare_callback(m, n, tails, heads, xlist, self.user_cuts)
+        m.optimize(lambda model, where: subtourelim(model, where, self.places))
+        if m.SolCount == 0:
+            raise RuntimeError(f"No tour found (status {m.Status})")
+
+        selected = np.array(m.getAttr('x', xlist)) > 0.5
+        self.tour = [self.places[i] for i in ordered_cycle(n, tails[selected], heads[selected])]
+        self.objective = m.ObjVal
+        self.add_cuts(frozenset(self.places[i] for i in component) for component in m._cuts)
+        return self.tour
+
+    def save(self, path):
+        """
+        Write cities, coordinates, the last tour and all cuts to a JSON file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'places': self.places,
+            'coordinates': [self.coordinates[place] for place in self.places],
+            'tour': self.tour,
+            'objective': self.objective,
+            'cuts': [sorted(cut) for cut in self.cuts],
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, env=None, **kwargs):
+        """
+        Rebuild the model from a file written by save(), with its cuts and start tour.
+        """
+        with open(path) as f:
+            state = json.load(f)
+        tsp = cls(state['places'], state['coordinates'], env=env, **kwargs)
+        tsp.add_cuts(state['cuts'])
+        tsp.tour, tsp.objective = state['tour'], state['objective']
+        return tsp
+
+    def dispose(self):
+        self.model.dispose()
+
+
+def main():
+    from cli import read_places
+
+    places, coordinates = read_places(os.path.join('..', 'data', 'tsp_input.csv'))
+
+    # Solve without the last three cities, then add them and drop two others
+    start_time = time.time()
+    tsp = IncrementalTSP(places[:-3], coordinates[:-3])
+    tsp.solve()
+    logging.info(f"Full solve: {tsp.objective:.2f} in {time.time() - start_time:.2f} seconds, "
+                 f"{len(tsp.cuts)} cuts kept")
+    tsp.save(os.path.join('..', 'output', 'tsp_incremental.json'))
+
+    start_time = time.time()
+    tsp.add_cities(places[-3:], coordinates[-3:])
+    tsp.remove_cities(places[1:3])
+    tour = tsp.solve()
+    logging.info(f"Incremental solve: {tsp.objective:.2f} in {time.time() - start_time:.2f} seconds")
+    print("Optimal Route:", " -> ".join(tour + [tour[0]]))
+    tsp.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import csv
+import json
+import time
+import logging
+from contextlib import contextmanager, nullcontext
+
+# Set TSP_INSTRUMENT=1 to turn on phase timing in the scripts without editing them
+ENABLED = os.environ.get('TSP_INSTRUMENT', '0') not in ('', '0')
+
+_DISABLED_PHASE = nullcontext()
+
+
+class PhaseTimer:
+    """
+    Context-managed wall-clock timers for the phases of a run (read, distance, build, optimize,
+    extract, plot). Repeated phases accumulate.
+
+    When disabled, phase() hands back one shared no-op context manager, so the instrumented code
+    costs a method call per phase.
+
+    Usage:
+        timer = PhaseTimer()
+        with timer.phase('build'):
+            model = ...
+        timer.report()
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = ENABLED if enabled is None else enabled
+        self.timings = {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def add(self, name, seconds):
+        """
+        Record a duration measured elsewhere, e.g. the solver's own Runtime.
+        """
+        if self.enabled:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def report(self):
+        if self.enabled:
+            for name, seconds in self.timings.items():
+                logging.info(f"Phase {name}: {seconds:.3f} seconds")
+
+
+class ProgressRecorder:
+    """
+    Gurobi callback that streams solver progress to a JSONL or CSV file (chosen by extension).
+
+    One row is written for every integer solution found (with its objective as candidate; it may
+    still be cut off by a lazy constraint) and at most one per interval seconds otherwise: elapsed
+    time, incumbent, best bound, gap, explored nodes and the number of lazy constraints and user
+    cuts the subtour callback has added (model._lazy_cuts / model._cuts, when present).
+
+    The file is only created once the first row is written.
+    """
+
+    FIELDS = ['time', 'event', 'candidate', 'incumbent', 'bound', 'gap', 'nodes', 'lazy_cuts', 'user_cuts']
+
+    def __init__(self, path, interval=1.0):
+        # Imported here so scripts that only use PhaseTimer do not load gurobipy
+        from gurobipy import GRB
+
+        self.GRB = GRB
+        self.path = path
+        self.interval = interval
+        self.last = -float('inf')
+        self.file = None
+        self.writer = None
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, 'w', newline='')
+        if self.path.endswith('.csv'):
+            self.writer = csv.DictWriter(self.file, self.FIELDS)
+            self.writer.writeheader()
+
+    def __call__(self, model, where):
+        GRB = self.GRB
+        if where == GRB.Callback.MIP:
+            runtime = model.cbGet(GRB.Callback.RUNTIME)
+            if runtime - self.last < self.interval:
+                return
+            self.record(model, runtime, 'progress', None, model.cbGet(GRB.Callback.MIP_OBJBST),
+                        model.cbGet(GRB.Callback.MIP_OBJBND), model.cbGet(GRB.Callback.MIP_NODCNT))
+        elif where == GRB.Callback.MIPSOL:
+            self.record(model, model.cbGet(GRB.Callback.RUNTIME), 'solution',
+                        model.cbGet(GRB.Callback.MIPSOL_OBJ), model.cbGet(GRB.Callback.MIPSOL_OBJBST),
+                        model.cbGet(GRB.Callback.MIPSOL_OBJBND), model.cbGet(GRB.Callback.MIPSOL_NODCNT))
+
+    def record(self, model, runtime, event, candidate, incumbent, bound, nodes):
+        if self.file is None:
+            self.open()
+        self.last = runtime
+        GRB = self.GRB
+        incumbent = incumbent if abs(incumbent) < GRB.INFINITY else None
+        bound = bound if abs(bound) < GRB.INFINITY else None
+        lazy_cuts = getattr(model, '_lazy_cuts', 0)
+        row = {
+            'time': round(runtime, 4),
+            'event': event,
+            'candidate': candidate,
+            'incumbent': incumbent,
+            'bound': bound,
+            'gap': None,
+            'nodes': int(nodes),
+            'lazy_cuts': lazy_cuts,
+            'user_cuts': len(getattr(model, '_cuts', ())) - lazy_cuts,
+        }
+        if incumbent is not None and bound is not None:
+            row['gap'] = abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+        if self.writer is not None:
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def with_progress(callback, progress):
+    """
+    Chain an existing model callback with a ProgressRecorder; either may be None.
+    """
+    if progress is None:
+        return callback
+    if callback is None:
+        return progress
+
+    def chained(model, where):
+        callback(model, where)
+        progress(model, where)
+    return chained
@@ -0,0 +1,299 @@
+import time
+from collections import deque
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from distance_matrix import haversine_block
+
+EPS = 1e-9
+
+
+def matrix_distance(distance_matrix):
+    """
+    Pairwise distance function backed by a full distance matrix.
+    """
+    matrix = np.asarray(distance_matrix)
+    return lambda a, b: matrix[a, b]
+
+
+def coordinate_distance(coordinates, unit='km'):
+    """
+    Pairwise haversine distance function that never materialises the n x n matrix.
+    """
+    coords = np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    lat, lon = coords[:, 0], coords[:, 1]
+    return lambda a, b: haversine_block(lat[a], lon[a], lat[b], lon[b], unit)
+
+
+def matrix_neighbours(distance_matrix, k=10):
+    """
+    The k nearest other cities of every city, nearest first.
+    """
+    matrix = np.array(distance_matrix, dtype=np.float64)
+    np.fill_diagonal(matrix, np.inf)
+    k = min(k, len(matrix) - 1)
+    nearest = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(matrix, nearest, axis=1), axis=1)
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+def unit_sphere(coordinates):
+    """
+    Map (Latitude, Longitude) pairs in degrees to points on the unit sphere.
+
+    Chord length is monotone in great-circle distance, so nearest neighbours on the sphere
+    are exactly the haversine nearest neighbours.
+    """
+    coords = np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    lat, lon = coords[:, 0], coords[:, 1]
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def neighbour_lists(coordinates, k):
+    """
+    The k nearest other cities of every city, from a KD-tree on unit-sphere coordinates.
+
+    Returns:
+        numpy.ndarray: n x k array of city indices, nearest first.
+    """
+    points = unit_sphere(coordinates)
+    k = min(k, len(points) - 1)
+    _, neighbours = cKDTree(points).query(points, k=k + 1)
+    return neighbours[:, 1:]
+
+
+def greedy_tour(coordinates, neighbours=None):
+    """
+    Nearest neighbour tour that looks up candidates in neighbour lists and only scans all
+    unvisited cities when every listed neighbour is already visited.
+    """
+    points = unit_sphere(coordinates)
+    n = len(points)
+    if neighbours is None:
+        neighbours = neighbour_lists(coordinates, 10)
+    visited = np.zeros(n, dtype=bool)
+    tour = [0]
+    visited[0] = True
+    for _ in range(n - 1):
+        current = tour[-1]
+        candidates = neighbours[current][~visited[neighbours[current]]]
+        if len(candidates):
+            nxt = candidates[0]
+        else:
+            unvisited = np.flatnonzero(~visited)
+            nxt = unvisited[np.argmin(((points[unvisited] - points[current]) ** 2).sum(axis=1))]
+        tour.append(int(nxt))
+        visited[nxt] = True
+    return np.array(tour)
+
+
+def tour_length(tour, dist):
+    tour = np.asarray(tour)
+    return float(dist(tour, np.roll(tour, -1)).sum())
+
+
+def tour_from_matrix(solution_matrix, start=0):
+    """
+    Convert a 0/1 successor matrix (as built by nearest_neighbor_solution) into a city order.
+    """
+    succ = np.argmax(np.asarray(solution_matrix), axis=1)
+    tour = [start]
+    while len(tour) < len(succ) and succ[tour[-1]] != start:
+        tour.append(int(succ[tour[-1]]))
+    return np.array(tour)
+
+
+def matrix_from_tour(tour, n):
+    """
+    Inverse of tour_from_matrix: n x n list of lists with 1 on every tour arc.
+    """
+    solution_matrix = np.zeros((n, n), dtype=int)
+    solution_matrix[tour, np.roll(tour, -1)] = 1
+    return solution_matrix.tolist()
+
+
+def report_start_gap(start_objective, final_objective):
+    gap = 100 * (start_objective - final_objective) / final_objective if final_objective else 0.0
+    print(f"Warm start objective: {start_objective:.2f}, final objective: {final_objective:.2f}, "
+          f"start gap: {gap:.2f}%")
+    return gap
+
+
+class TourSearch:
+    """
+    2-opt and Or-opt local search on a tour array with neighbour lists and don't-look bits.
+
+    For every city taken from the work queue, all moves joining it to one of its neighbours
+    are scored in one vectorized distance call and the best improving one is applied.
+    """
+
+    def __init__(self, tour, dist, neighbours, or_opt_max=3):
+        self.tour = np.array(tour, dtype=np.intp)
+        self.n = len(self.tour)
+        self.pos = np.empty(self.n, dtype=np.intp)
+        self.pos[self.tour] = np.arange(self.n)
+        self.dist = dist
+        self.neighbours = np.asarray(neighbours)
+        self.or_opt_max = or_opt_max
+        self.queue = deque(self.tour.tolist())
+        self.queued = np.ones(self.n, dtype=bool)
+        self.moves = 0
+        self.delta = 0.0  # Total change in tour length from the applied moves
+
+    def push(self, *cities):
+        for city in cities:
+            if not self.queued[city]:
+                self.queued[city] = True
+                self.queue.append(int(city))
+
+    def succ(self, cities):
+        return self.tour[(self.pos[cities] + 1) % self.n]
+
+    def pred(self, cities):
+        return self.tour[(self.pos[cities] - 1) % self.n]
+
+    def reverse(self, start, end):
+        """
+        Reverse tour positions start..end (cyclic, inclusive), or the complementary segment
+        when that is shorter; both give the same cycle.
+        """
+        length = (end - start) % self.n + 1
+        if 2 * length > self.n:
+            start, end = (end + 1) % self.n, (start - 1) % self.n
+            length = self.n - length
+        idx = (start + np.arange(length)) % self.n
+        self.tour[idx] = self.tour[idx[::-1]]
+        self.pos[self.tour[idx]] = idx
+
+    def two_opt(self, a):
+        dist = self.dist
+        cands = self.neighbours[a]
+        a_vec = np.full(len(cands), a)
+
+        # Successor side: (a, b), (c, d) -> (a, c), (b, d)
+        b = self.succ(a)
+        d = self.succ(cands)
+        gain_next = dist(a_vec, cands) + dist(np.full(len(cands), b), d) - dist(a, b) - dist(cands, d)
+        gain_next[(cands == b) | (d == a)] = np.inf
+
+        # Predecessor side: (b, a), (d, c) -> (c, a), (d, b)
+        bp = self.pred(a)
+        dp = self.pred(cands)
+        gain_prev = dist(a_vec, cands) + dist(np.full(len(cands), bp), dp) - dist(bp, a) - dist(dp, cands)
+        gain_prev[(cands == bp) | (dp == a)] = np.inf
+
+        best_next, best_prev = np.argmin(gain_next), np.argmin(gain_prev)
+        if min(gain_next[best_next], gain_prev[best_prev]) >= -EPS:
+            return False
+        if gain_next[best_next] <= gain_prev[best_prev]:
+            self.delta += float(gain_next[best_next])
+            c, d = cands[best_next], d[best_next]
+            self.reverse(self.pos[b], self.pos[c])
+            self.push(a, b, c, d)
+        else:
+            self.delta += float(gain_prev[best_prev])
+            c, d = cands[best_prev], dp[best_prev]
+            self.reverse(self.pos[c], self.pos[bp])
+            self.push(a, bp, c, d)
+        return True
+
+    def or_opt(self, a):
+        n, dist = self.n, self.dist
+        cands = self.neighbours[a]
+        i = self.pos[a]
+        p = self.tour[(i - 1) % n]
+        best = (-EPS, None)
+        for length in range(1, min(self.or_opt_max, n - 3) + 1):
+            seg = self.tour[(i + np.arange(length)) % n]
+            s2 = seg[-1]
+            q = self.tour[(i + length) % n]
+            removal = dist(p, a) + dist(s2, q) - dist(p, q)
+            valid = ~np.isin(cands, seg)
+            # Forward: c, a .. s2, succ(c)
+            e = self.succ(cands)
+            gain_fwd = (dist(cands, np.full(len(cands), a)) + dist(np.full(len(cands), s2), e)
+                        - dist(cands, e) - removal)
+            gain_fwd[~valid | (cands == p)] = np.inf
+            # Reversed: pred(c), s2 .. a, c
+            ep = self.pred(cands)
+            gain_rev = (dist(ep, np.full(len(cands), s2)) + dist(np.full(len(cands), a), cands)
+                        - dist(ep, cands) - removal)
+            gain_rev[~valid | (cands == q)] = np.inf
+            for gains, forward in ((gain_fwd, True), (gain_rev, False)):
+                k = np.argmin(gains)
+                if gains[k] < best[0]:
+                    best = (gains[k], (length, cands[k], forward))
+        if best[1] is None:
+            return False
+
+        self.delta += float(best[0])
+        length, c, forward = best[1]
+        rotated = np.roll(self.tour, -i)
+        seg, rest = rotated[:length], rotated[length:]
+        k = int(np.flatnonzero(rest == c)[0])
+        if forward:
+            new_tour = np.concatenate((rest[:k + 1], seg, rest[k + 1:]))
+        else:
+            new_tour = np.concatenate((rest[:k], seg[::-1], rest[k:]))
+        self.tour = new_tour
+        self.pos[self.tour] = np.arange(n)
+        ends = seg[[0, -1]]
+        self.push(p, rotated[length], c, *seg, *self.pred(ends), *self.succ(ends))
+        return True
+
+    def run(self, time_budget=1.0):
+        """
+        Apply improving moves until no city has one left or the time budget runs out.
+        """
+        deadline = time.perf_counter() + time_budget
+        while self.queue and time.perf_counter() < deadline:
+            a = self.queue.popleft()
+            self.queued[a] = False
+            if self.two_opt(a) or self.or_opt(a):
+                self.moves += 1
+                self.push(a)
+        return self.tour
+
+
+def improve_tour(tour, dist, neighbours, time_budget=1.0, or_opt_max=3):
+    """
+    Improve a tour with 2-opt and Or-opt moves restricted to neighbour lists.
+
+    Parameters:
+        tour: City indices in visiting order.
+        dist: Vectorized distance function dist(a, b) on index arrays.
+        neighbours: n x k array of candidate neighbours per city.
+        time_budget (float): Wall-clock limit in seconds.
+
+    Returns:
+        tuple: (improved tour array, its length)
+    """
+    search = TourSearch(tour, dist, neighbours, or_opt_max)
+    improved = search.run(time_budget)
+    return improved, tour_length(improved, dist)
+
+
+def improve_matrix_tour(tour, distance_matrix, k=10, time_budget=1.0, max_distance=None):
+    """
+    improve_tour for callers that already hold a full distance matrix.
+
+    With max_distance, arcs longer than it cost more than any tour of allowed arcs during the
+    search, so the moves never add one and remove those in the start tour where they can.
+    The returned length is always measured on distance_matrix.
+    """
+    matrix = np.asarray(distance_matrix, dtype=np.float64)
+    search_matrix = matrix
+    if max_distance is not None:
+        search_matrix = np.where(matrix <= max_distance, matrix, matrix + len(matrix) * matrix.max())
+    improved, _ = improve_tour(tour, matrix_distance(search_matrix), matrix_neighbours(search_matrix, k),
+                               time_budget)
+    return improved, tour_length(improved, matrix_distance(matrix))
+
+
+def tour_within(tour, distance_matrix, max_distance):
+    """
+    Whether every arc of the closed tour is at most max_distance long.
+    """
+    tour = np.asarray(tour)
+    return bool(np.all(np.asarray(distance_matrix)[tour, np.roll(tour, -1)] <= max_distance))
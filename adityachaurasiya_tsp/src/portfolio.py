@@ -0,0 +1,148 @@
+import os
+import time
+import queue
+import logging
+import multiprocessing as mp
+
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+from tsp_model import build_mtz_model, successors, follow_successors, tour_start_vector
+
+# Settings from the Task 2 tuning experiments (performance tunning.xlsx)
+PARAMETER_SETS = [
+    {},
+    {'MIPFocus': 1},
+    {'Cuts': 2, 'Presolve': 2},
+    {'Heuristics': 0.5, 'MIPFocus': 1, 'Cuts': 2, 'Presolve': 2},
+    {'MIPFocus': 2, 'Cuts': 2},
+    {'MIPFocus': 3, 'Presolve': 2},
+]
+
+
+def share_progress(model, where):
+    """
+    Callback: publish incumbents and bounds to the shared state, pick up better incumbents found
+    by other workers and stop once the portfolio reached the target gap or another worker finished.
+    """
+    shared = model._shared
+    if where == GRB.Callback.MIPSOL:
+        objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        with shared['objective'].get_lock():
+            if objective < shared['objective'].value:
+                shared['objective'].value = objective
+                shared['tour'][:] = follow_successors(successors(model.cbGetSolution(model._x), model._arcs, model._n))
+                shared['owner'].value = model._index
+    elif where == GRB.Callback.MIP:
+        bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        with shared['bound'].get_lock():
+            shared['bound'].value = max(shared['bound'].value, bound)
+        objective, bound = shared['objective'].value, shared['bound'].value
+        # Without an incumbent or a bound yet the gap is undefined (inf - inf would stop at once)
+        reached = (objective < float('inf') and bound > -float('inf')
+                   and objective - bound <= model._target_gap * abs(objective))
+        if shared['stop'].is_set() or reached:
+            shared['stop'].set()
+            model.terminate()
+    elif where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL:
+        if shared['owner'].value != model._index and shared['objective'].value < model._last_shared - 1e-6:
+            with shared['objective'].get_lock():
+                model._last_shared = shared['objective'].value
+                tour = np.array(shared['tour'][:])
+            model.cbSetSolution(model._x, tour_start_vector(model._n, tour))
+
+
+def portfolio_worker(index, distance_matrix, params, start_tour, time_limit, threads, target_gap, shared, results):
+    """
+    Solve the MTZ model with one parameter set and report (index, status, objective, bound, runtime).
+    """
+    n = len(distance_matrix)
+    model, x, u, arcs = build_mtz_model(distance_matrix, name=f"TSP_portfolio_{index}")
+    model.Params.OutputFlag = 0
+    model.Params.TimeLimit = time_limit
+    model.Params.Threads = threads
+    model.Params.Seed = index
+    for name, value in params.items():
+        model.setParam(name, value)
+    if start_tour is not None:
+        x.Start = tour_start_vector(n, start_tour)
+
+    model._shared, model._x, model._arcs, model._n = shared, x, arcs, n
+    model._index, model._target_gap, model._last_shared = index, target_gap, shared['objective'].value
+    model.optimize(share_progress)
+
+    with shared['bound'].get_lock():
+        shared['bound'].value = max(shared['bound'].value, model.ObjBound)
+    if model.Status == GRB.OPTIMAL:
+        shared['stop'].set()
+    objective = model.ObjVal if model.SolCount else float('inf')
+    results.put((index, model.Status, objective, model.ObjBound, model.Runtime))
+    model.dispose()
+
+
+def solve_portfolio(distance_matrix, parameter_sets=PARAMETER_SETS, time_limit=300, target_gap=1e-4,
+                    start_tour=None, max_workers=None):
+    """
+    Solve the same TSP with several parameter sets in parallel worker processes.
+
+    The workers share the best incumbent (objective and tour) and the best bound through
+    multiprocessing Values and an Array; as soon as one proves optimality or the shared gap
+    reaches target_gap, all of them stop.
+
+    Parameters:
+        distance_matrix: n x n array of travel distances.
+        parameter_sets (list): One dict of Gurobi parameters per worker.
+        time_limit (float): Time limit of every worker in seconds.
+        target_gap (float): Relative gap between shared incumbent and bound at which to stop.
+        start_tour: Optional tour of city indices used as MIP start by every worker.
+
+    Returns:
+        tuple: (tour as city indices or None, objective, bound, list of per-worker results)
+    """
+    distance_matrix = np.asarray(distance_matrix)
+    n = len(distance_matrix)
+    parameter_sets = parameter_sets[:max_workers or len(parameter_sets)]
+    threads = max(1, (os.cpu_count() or 1) // len(parameter_sets))
+
+    shared = {
+        'objective': mp.Value('d', float('inf')),
+        'bound': mp.Value('d', -float('inf')),
+        'tour': mp.Array('i', n, lock=False),
+        'owner': mp.Value('i', -1, lock=False),
+        'stop': mp.Event(),
+    }
+    if start_tour is not None:
+        shared['objective'].value = float(distance_matrix[start_tour, np.roll(start_tour, -1)].sum())
+        shared['tour'][:] = list(start_tour)
+    results = mp.Queue()
+
+    workers = [mp.Process(target=portfolio_worker,
+                          args=(index, distance_matrix, params, start_tour, time_limit, threads, target_gap,
+                                shared, results))
+               for index, params in enumerate(parameter_sets)]
+    for worker in workers:
+        worker.start()
+
+    # Collect results; the first finished worker stops the others through the shared event
+    finished = []
+    deadline = time.time() + time_limit + 60
+    while len(finished) < len(workers) and time.time() < deadline:
+        try:
+            finished.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                break
+            continue
+        shared['stop'].set()
+    for worker in workers:
+        worker.join(timeout=10)
+        if worker.is_alive():
+            worker.terminate()
+
+    for index, status, objective, bound, runtime in sorted(finished):
+        logging.info(f"Worker {index} {parameter_sets[index]}: status {status}, objective {objective:.2f}, "
+                     f"bound {bound:.2f}, {runtime:.1f}s")
+    if shared['objective'].value == float('inf'):
+        return None, float('inf'), shared['bound'].value, finished
+    return np.array(shared['tour'][:]), shared['objective'].value, shared['bound'].value, finished
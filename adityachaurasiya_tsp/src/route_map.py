@@ -0,0 +1,104 @@
+import os
+import logging
+import threading
+
+# Marker factory for FastMarkerCluster: rows are [lat, lon, name]
+CLUSTER_CALLBACK = """
+function (row) {
+    return L.marker(new L.LatLng(row[0], row[1])).bindTooltip(row[2]);
+}
+"""
+
+
+def route_points(optimal_route, coordinates, places=None):
+    """
+    (Latitude, Longitude) of every stop of the route, looked up through one name -> index map.
+
+    Parameters:
+        optimal_route (list): Place names in visiting order (may repeat the first at the end).
+        coordinates: Coordinates in the order of places, or a dict place -> coordinates.
+        places (list): Place names; leave out when coordinates is a dict.
+    """
+    if places is None:
+        return [tuple(coordinates[place]) for place in optimal_route]
+    index = {place: i for i, place in enumerate(places)}
+    return [tuple(coordinates[index[place]]) for place in optimal_route]
+
+
+def route_geojson(optimal_route, points):
+    """
+    One FeatureCollection with the route as a LineString and every stop as a Point.
+
+    GeoJSON positions are (longitude, latitude).
+    """
+    closed = len(optimal_route) > 1 and optimal_route[0] == optimal_route[-1]
+    stops = len(optimal_route) - 1 if closed else len(optimal_route)
+    features = [{
+        'type': 'Feature',
+        'properties': {'name': 'route', 'stop': None},
+        'geometry': {'type': 'LineString', 'coordinates': [[lon, lat] for lat, lon in points]},
+    }]
+    features += [{
+        'type': 'Feature',
+        'properties': {'name': optimal_route[i], 'stop': i},
+        'geometry': {'type': 'Point', 'coordinates': [points[i][1], points[i][0]]},
+    } for i in range(stops)]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def render_route_map(optimal_route, coordinates, places=None, clustered=False, zoom_start=6):
+    """
+    Build a folium map of the route that stays small for thousands of stops.
+
+    By default route and stops are one GeoJSON layer (circle markers with a name tooltip);
+    with clustered=True the stops go into a FastMarkerCluster, which builds the markers in the
+    browser from a plain coordinate array.
+
+    Returns:
+        folium.Map: Map object with the plotted route.
+    """
+    import folium
+
+    points = route_points(optimal_route, coordinates, places)
+    m = folium.Map(location=points[0], zoom_start=zoom_start)
+    if clustered:
+        from folium.plugins import FastMarkerCluster
+
+        folium.PolyLine(points, color='blue', weight=2.5).add_to(m)
+        stops = len(points) - 1 if optimal_route[0] == optimal_route[-1] else len(points)
+        FastMarkerCluster([[lat, lon, name] for (lat, lon), name in zip(points[:stops], optimal_route)],
+                          callback=CLUSTER_CALLBACK).add_to(m)
+    else:
+        folium.GeoJson(
+            route_geojson(optimal_route, points),
+            style_function=lambda feature: {'color': 'blue', 'weight': 2.5},
+            marker=folium.CircleMarker(radius=4, fill=True, fill_opacity=0.8),
+            tooltip=folium.GeoJsonTooltip(fields=['name', 'stop']),
+        ).add_to(m)
+    return m
+
+
+def save_route_map(optimal_route, coordinates, places, file_path, background=False, **kwargs):
+    """
+    Render the route map and write it to file_path.
+
+    With background=True rendering and HTML serialization run in a (non-daemon) thread, so the
+    caller can carry on, e.g. with the next solve, and the interpreter still waits for the file
+    before exiting. Join the returned thread to wait explicitly.
+
+    Returns:
+        threading.Thread or None: The writer thread when background is set.
+    """
+    def write():
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        render_route_map(optimal_route, coordinates, places, **kwargs).save(file_path)
+        logging.info(f"Route map written to {file_path}")
+
+    if not background:
+        write()
+        return None
+    thread = threading.Thread(target=write, name='route-map-writer')
+    thread.start()
+    return thread
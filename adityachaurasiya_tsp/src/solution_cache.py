@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from distance_cache import evict_lru
+
+DEFAULT_CACHE_DIR = os.environ.get('TSP_SOLUTION_CACHE_DIR', os.path.join('..', 'cache', 'solutions'))
+DEFAULT_MAX_BYTES = int(os.environ.get('TSP_SOLUTION_CACHE_MAX_BYTES', 64 * 1024 ** 2))
+
+
+def solution_fingerprint(places, coordinates, formulation, settings=None):
+    """
+    Hash the instance (place names and coordinates), the formulation and the solver settings.
+
+    The time limit is deliberately left out: it decides whether a cached result can be
+    returned as is or only used as a MIP start, see cached_solve.
+    """
+    coords = np.ascontiguousarray(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    settings = {k: v for k, v in (settings or {}).items() if k != 'TimeLimit'}
+    digest = hashlib.sha256()
+    digest.update(coords.tobytes())
+    digest.update(json.dumps([list(places), formulation, settings], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    """
+    On-disk cache of solved instances: one JSON file per fingerprint with the tour (city indices),
+    objective, status, bound, gap and the time limit it was solved with.
+
+    Files are written to a temporary name and renamed, so readers never see a partial entry, and
+    the directory is bounded with the same LRU eviction as the distance matrix cache. lock()
+    serializes solves of the same key across worker processes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            pass
+        return entry
+
+    def store(self, key, entry):
+        path = self.path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        evict_lru(self.cache_dir, self.max_bytes, suffix='.json', keep=(path,))
+
+    @contextmanager
+    def lock(self, key, poll=0.1, stale=3600):
+        """
+        Exclusive lock on a key through an O_EXCL lock file (works on Windows and POSIX).
+
+        A lock file older than stale seconds is assumed to be left behind by a crashed worker.
+        """
+        path = os.path.join(self.cache_dir, key + '.lock')
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > stale:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(poll)
+        try:
+            os.close(fd)
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def cached_solve(key, solve, time_limit=None, cache=None):
+    """
+    Return the cached result for key, or solve and store it.
+
+    A cached entry is returned without solving if it is optimal or was solved with the same time
+    limit. Otherwise its tour is handed to solve as MIP start and the new result replaces it.
+    While one process solves a key, others asking for the same key wait for its result.
+
+    Parameters:
+        key (str): solution_fingerprint of the instance and settings.
+        solve: Function solve(start_tour) returning a dict with tour, objective, status
+            ('optimal' or other), bound and gap.
+        time_limit (float): Time limit the solve function uses.
+
+    Returns:
+        dict: The entry, with cached=True if no solve was needed.
+    """
+    cache = cache or SolutionCache()
+    with cache.lock(key, stale=3600 if time_limit is None else 2 * time_limit + 60):
+        entry = cache.load(key)
+        if entry is not None and (entry['status'] == 'optimal' or entry['time_limit'] == time_limit):
+            return dict(entry, cached=True)
+
+        result = solve(entry['tour'] if entry is not None else None)
+        result['time_limit'] = time_limit
+        if result.get('tour') is not None:
+            cache.store(key, result)
+        return dict(result, cached=False)
+
+
+def cached_lazy_tsp(capitals, coordinates, time_limit=None, cache=None, env=None, **settings):
+    """
+    tsp_lazy.solve_tsp_model behind the solution cache.
+
+    Parameters:
+        coordinates (dict): Coordinates per city name, as for solve_tsp_model.
+        settings: Cut separation settings passed on to solve_tsp_model (part of the key).
+
+    Returns:
+        dict: Cache entry; tour is a list of indices into capitals.
+    """
+    from gurobipy import GRB
+    from tsp_lazy import solve_tsp_model
+
+    key = solution_fingerprint(capitals, [coordinates[c] for c in capitals], 'lazy_dfj', settings)
+
+    def solve(start_tour):
+        stats = {}
+        start = None if start_tour is None else [capitals[i] for i in start_tour]
+        tour = solve_tsp_model(capitals, coordinates, env=env, time_limit=time_limit, start_tour=start,
+                               stats=stats, **settings)
+        index = {place: i for i, place in enumerate(capitals)}
+        return {'tour': None if tour is None else [index[place] for place in tour],
+                'objective': stats['objective'],
+                'status': 'optimal' if stats['status'] == GRB.OPTIMAL else str(stats['status']),
+                'bound': stats['bound'], 'gap': stats['gap']}
+
+    return cached_solve(key, solve, time_limit, cache)
+
+
+def cached_mtz_tsp(places, coordinates, time_limit=None, cache=None):
+    """
+    gurobi.build_model + solve_tsp (MTZ) behind the solution cache.
+
+    Returns:
+        dict: Cache entry; tour is a list of indices into places.
+    """
+    from gurobipy import GRB
+    from gurobi import build_model
+    from distance_cache import cached_distance_matrix
+    from tsp_model import successors, follow_successors
+
+    key = solution_fingerprint(places, coordinates, 'mtz')
+
+    def solve(start_tour):
+        distance_matrix = cached_distance_matrix(coordinates)
+        model, x, arcs = build_model(places, distance_matrix, start_tour=start_tour, time_limit=time_limit)
+        result = {'tour': None, 'objective': None, 'bound': model.ObjBound, 'gap': None,
+                  'status': 'optimal' if model.Status == GRB.OPTIMAL else str(model.Status)}
+        if model.SolCount:
+            tour = follow_successors(successors(x.X, arcs, len(places)))
+            result.update(tour=tour, objective=model.ObjVal, gap=model.MIPGap)
+        model.dispose()
+        return result
+
+    return cached_solve(key, solve, time_limit, cache)
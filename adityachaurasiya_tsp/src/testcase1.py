@@ -1,8 +1,9 @@
-import folium
 import gurobipy as gp
 import pandas as pd
 from gurobipy import GRB
-from haversine import haversine
+from distance_cache import cached_distance_matrix
+from local_search import improve_matrix_tour, tour_from_matrix, matrix_from_tour, report_start_gap, tour_within
+from route_map import save_route_map
 
 
 def read_data(file_path):
@@ -12,16 +13,6 @@ def read_data(file_path):
     return places, coordinates
 
 
-def calculate_distance_matrix(coordinates):
-    n = len(coordinates)
-    distance_matrix = [[0.0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = haversine(coordinates[i], coordinates[j])
-    return distance_matrix
-
-
 def vechical_restriction(places, distance_matrix):
     n = len(places)
     initial_solution = [[0] * n for _ in range(n)]
@@ -65,13 +56,22 @@ def build_model(places, distance_matrix, max_distance=500, warmstart=True, time_
     model.addConstrs((s[i] - s[j] + n * x[i, j] <= n - 1) for i in range(1, n) for j in range(1, n) if i != j and distance_matrix[i][j] <= max_distance)
 
     # Warm start
+    start_objective = None
     if warmstart:
         initial_solution = vechical_restriction(places, distance_matrix)
         if initial_solution:
-            for i in range(n):
-                for j in range(n):
-                    if distance_matrix[i][j] <= max_distance:
-                        x[i, j].start = initial_solution[i][j]
+            # Polish the greedy tour with 2-opt / Or-opt on the allowed arcs before handing it to Gurobi
+            tour, start_objective = improve_matrix_tour(tour_from_matrix(initial_solution), distance_matrix,
+                                                        time_budget=2, max_distance=max_distance)
+            if tour_within(tour, distance_matrix, max_distance):
+                initial_solution = matrix_from_tour(tour, n)
+                for i in range(n):
+                    for j in range(n):
+                        if distance_matrix[i][j] <= max_distance:
+                            x[i, j].start = initial_solution[i][j]
+            else:
+                print(f"Warm start skipped: the polished tour still uses arcs longer than {max_distance}")
+                start_objective = None
 
     # Set the time limit
     model.setParam('TimeLimit', time_limit)
@@ -84,6 +84,8 @@ def build_model(places, distance_matrix, max_distance=500, warmstart=True, time_
 
     # Optimize the model
     model.optimize()
+    if start_objective is not None and model.SolCount:
+        report_start_gap(start_objective, model.ObjVal)
 
     return model, x
 
@@ -119,31 +121,16 @@ def solve_tsp(model, x, places):
         return None, None
 
 
-def plot_route(optimal_route, coordinates, places):
-    # Create a map centered around the first place
-    start_coord = coordinates[places.index(optimal_route[0])]
-    m = folium.Map(location=start_coord, zoom_start=6)
-
-    # Add markers for each place with tooltips
-    for idx in optimal_route:
-        folium.Marker(
-            location=coordinates[places.index(idx)],
-            popup=coordinates[places.index(idx)],
-            tooltip=coordinates[places.index(idx)]
-        ).add_to(m)
-
-    # Add lines to show the route
-    route_coords = [coordinates[places.index(i)] for i in optimal_route]
-    folium.PolyLine(locations=route_coords, color='blue').add_to(m)
-
-    # Save the map
-    m.save('../output/tsp_route_warm_tunning_vec.html')
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, '../output/tsp_route_warm_tunning_vec.html',
+                          background=background)
 
 
 if __name__ == "__main__":
     data_file_path = '../data/tsp_input.csv'
     places, coordinates = read_data(data_file_path)
-    distance_matrix = calculate_distance_matrix(coordinates)
+    distance_matrix = cached_distance_matrix(coordinates)
     model, x = build_model(places, distance_matrix)
     optimal_route, total_distance = solve_tsp(model, x, places)
 
@@ -1,112 +1,166 @@
-import haversine as hv
 import gurobipy as gp
 from gurobipy import GRB
-import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse import csgraph
 from itertools import combinations
 import time
 import logging
-import folium
-import random
 import os
+from distance_cache import cached_distance_matrix
+from instrumentation import ENABLED, PhaseTimer, ProgressRecorder, with_progress
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-random.seed(1517)
 
 
 def main():
+    # Only the script needs pandas and folium; the solver functions are imported by other modules
+    import pandas as pd
+
     start_time = time.time()
+    # Phase timings and the solver progress stream; only active with TSP_INSTRUMENT=1
+    timer = PhaseTimer()
+    progress = ProgressRecorder(os.path.join('..', 'output', 'tsp_lazy_progress.jsonl')) if ENABLED else None
 
     try:
         # Load data
         logging.info("Loading data from CSV")
-        data_path = os.path.join('..', 'data', 'tsp_input.csv')
-        data = pd.read_csv(data_path)
-
-        # Prepare data: Extract capitals and their coordinates
-        logging.info("Extracting capitals and coordinates")
-        capitals, coordinates = [], {}
-        for ind, row in data.iterrows():
-            capital = row['Place_Name']
-            capitals.append(capital)
-            coordinates[capital] = (float(row['Latitude']), float(row['Longitude']))
+        with timer.phase('read'):
+            data_path = os.path.join('..', 'data', 'tsp_input.csv')
+            data = pd.read_csv(data_path)
+
+            # Prepare data: Extract capitals and their coordinates
+            logging.info("Extracting capitals and coordinates")
+            capitals, coordinates = [], {}
+            for ind, row in data.iterrows():
+                capital = row['Place_Name']
+                capitals.append(capital)
+                coordinates[capital] = (float(row['Latitude']), float(row['Longitude']))
 
         # Solve the optimization model
         logging.info("Solving the TSP model")
-        tour = solve_tsp_model(capitals, coordinates)
+        tour = solve_tsp_model(capitals, coordinates, user_cuts=True, timer=timer, progress=progress)
+        if progress is not None:
+            progress.close()
 
         # Display the optimal route on a map
         logging.info("Mapping the solution")
-        map = plot_solution_on_map(tour, coordinates)
+        with timer.phase('plot'):
+            map = plot_solution_on_map(tour, coordinates)
 
-        # Save the map
-        output_path = os.path.join('..', 'output', 'tsp_lazy.html')
-        map.save(output_path)
+            # Save the map
+            output_path = os.path.join('..', 'output', 'tsp_lazy.html')
+            map.save(output_path)
 
+        timer.report()
         logging.info(f"Runtime: {round(time.time() - start_time)} seconds")
 
     except Exception as e:
         logging.error(f"An error occurred: {e}")
 
 
-def solve_tsp_model(capitals, coordinates):
+def solve_tsp_model(capitals, coordinates, user_cuts=False, cut_node_limit=1000, cut_frequency=1,
+                    cut_rounds=5, timer=None, progress=None, env=None, time_limit=None, start_tour=None,
+                    stats=None):
     """
     Solve the Traveling Salesman Problem (TSP) using Gurobi.
 
     Parameters:
         capitals (list): List of city names.
         coordinates (dict): Dictionary of city coordinates.
+        user_cuts (bool): Also separate subtour cuts on fractional node relaxations (MIPNODE).
+        cut_node_limit (int): Stop separating user cuts once this many nodes have been explored.
+        cut_frequency (int): Only separate at every cut_frequency-th node.
+        cut_rounds (int): Maximum separation rounds at a single node.
+        timer (PhaseTimer): Records the distance, build, optimize and extract phases.
+        progress (ProgressRecorder): Streams incumbent, bound, gap, nodes and cut counts.
+        env (gurobipy.Env): Environment to build the model in; the caller keeps ownership.
+        time_limit (float): Optional solver time limit in seconds.
+        start_tour (list): Optional tour of city names passed to Gurobi as MIP start.
+        stats (dict): If given, filled with status, objective, bound, gap, runtime, nodes and the
+            number of subtour cuts; objective and gap are None if no tour was found.
 
     Returns:
-        list: Ordered list of cities representing the optimal tour.
+        list: Ordered list of cities representing the optimal tour, or None if the solver stopped
+            (e.g. on time_limit) before finding any tour.
     """
+    timer = timer or PhaseTimer(enabled=False)
+
     # Calculate distances between all pairs of capitals
     logging.info("Calculating distances between cities")
-    dist = {(c1, c2): distance(c1, c2, coordinates) for c1, c2 in combinations(capitals, 2)}
+    with timer.phase('distance'):
+        matrix = cached_distance_matrix([coordinates[c] for c in capitals])
+        dist = {(capitals[i], capitals[j]): round(float(matrix[i, j]), 2)
+                for i, j in combinations(range(len(capitals)), 2)}
 
     # Create and solve the model
     logging.info("Building the optimization model")
-    m = gp.Model()
+    with timer.phase('build'):
+        m = gp.Model(env=env)
+
+        # Variables: is city 'i' adjacent to city 'j' on the tour?
+        logging.info("Adding variables")
+        vars = m.addVars(dist.keys(), obj=dist, vtype=GRB.BINARY, name='x')
+
+        # Symmetric direction: use dict.update to alias variable with new key
+        logging.info("Setting symmetric constraints")
+        vars.update({(j, i): vars[i, j] for i, j in vars.keys()})
 
-    # Variables: is city 'i' adjacent to city 'j' on the tour?
-    logging.info("Adding variables")
-    vars = m.addVars(dist.keys(), obj=dist, vtype=GRB.BINARY, name='x')
+        # Constraints: two edges incident to each city
+        logging.info("Adding constraints")
+        m.addConstrs(vars.sum(c, '*') == 2 for c in capitals)
 
-    # Symmetric direction: use dict.update to alias variable with new key
-    logging.info("Setting symmetric constraints")
-    vars.update({(j, i): vars[i, j] for i, j in vars.keys()})
+        # Edge arrays so the callback can work on the raw solution vector
+        n = len(capitals)
+        tails, heads = (np.array(side, dtype=np.intp) for side in zip(*combinations(range(n), 2)))
+        m._vars = vars
+        prepare_callback(m, n, tails, heads, [vars[capitals[i], capitals[j]] for i, j in zip(tails, heads)],
+                         user_cuts, cut_node_limit, cut_frequency, cut_rounds)
 
-    # Constraints: two edges incident to each city
-    logging.info("Adding constraints")
-    m.addConstrs(vars.sum(c, '*') == 2 for c in capitals)
+        if start_tour is not None:
+            m.setAttr('Start', m._xlist, [0.0] * len(m._xlist))
+            for a, b in zip(start_tour, start_tour[1:] + start_tour[:1]):
+                vars[a, b].Start = 1.0
 
     # Optimize the model using a callback for subtour elimination
     logging.info("Optimizing the model")
-    m._vars = vars
-    m.Params.lazyConstraints = 1
     m.Params.LogToConsole = 0
-    m.optimize(lambda model, where: subtourelim(model, where, capitals))
+    if time_limit is not None:
+        m.Params.TimeLimit = time_limit
+    with timer.phase('optimize'):
+        m.optimize(with_progress(lambda model, where: subtourelim(model, where, capitals), progress))
 
     # Retrieve the solution
     logging.info("Retrieving the solution")
-    vals = m.getAttr('x', vars)
-    selected = gp.tuplelist((i, j) for i, j in vals.keys() if vals[i, j] > 0.5)
-
-    # Ensure a valid tour
-    logging.info("Finding the optimal tour")
-    tour = subtour(selected, capitals)
-    assert len(tour) == len(capitals), f"Tour does not include all capitals: {len(tour)} vs {len(capitals)}"
-
-    # Dispose of the model and environment
+    tour = None
+    if m.SolCount == 0:
+        logging.warning(f"No tour found, solver stopped with status {m.Status}")
+    else:
+        with timer.phase('extract'):
+            selected = np.array(m.getAttr('x', m._xlist)) > 0.5
+
+            # Ensure a valid tour
+            logging.info("Finding the optimal tour")
+            tour = [capitals[i] for i in ordered_cycle(n, tails[selected], heads[selected])]
+        assert len(tour) == len(capitals), f"Tour does not include all capitals: {len(tour)} vs {len(capitals)}"
+    if stats is not None:
+        found = m.SolCount > 0
+        stats.update(status=m.Status, objective=m.ObjVal if found else None, bound=m.ObjBound,
+                     gap=m.MIPGap if found else None, runtime=m.Runtime, nodes=m.NodeCount,
+                     cuts=len(m._cuts))
+
+    # Dispose of the model, and of the default environment if that is what was used
     m.dispose()
-    gp.disposeDefaultEnv()
+    if env is None:
+        gp.disposeDefaultEnv()
 
     return tour
 
 
 def plot_solution_on_map(tour, coordinates):
     """
-    Plot the optimal TSP route on a map using Folium with different colored markers for each city.
+    Plot the optimal TSP route on a map using Folium (one GeoJSON layer for route and cities).
 
     Parameters:
         tour (list): Ordered list of cities representing the optimal tour.
@@ -115,73 +169,188 @@ def plot_solution_on_map(tour, coordinates):
     Returns:
         folium.Map: Map object with the plotted route.
     """
-    # Initialize the map centered around the first city in the tour
-    map = folium.Map(location=[coordinates[tour[0]][0], coordinates[tour[0]][1]], zoom_start=4)
-
-    # List of colors to choose from
-    colors = ['red', 'blue', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige',
-              'darkblue', 'darkgreen', 'cadetblue', 'darkpurple', 'white', 'pink', 'lightblue',
-              'lightgreen', 'gray', 'black', 'lightgray']
+    from route_map import render_route_map
 
-    points = []
-    for city in tour:
-        loc = coordinates[city]
-        points.append(loc)
-        # Randomly select a color for each city marker
-        color = random.choice(colors)
-        # Add city markers with tooltips and different colored map signs
-        folium.Marker(loc, tooltip=city, icon=folium.Icon(icon="map-sign", color=color)).add_to(map)
-    points.append(points[0])  # to create a closed loop
+    # Close the loop; coordinates is keyed by city name, so no index lookups are needed
+    return render_route_map(tour + tour[:1], coordinates, zoom_start=4)
 
-    # Draw the route
-    folium.PolyLine(points, color="blue", weight=2.5, opacity=1).add_to(map)
 
-    return map
+def prepare_callback(model, n, tails, heads, xlist, user_cuts=False, cut_node_limit=1000, cut_frequency=1,
+                     cut_rounds=5):
+    """
+    Attach the edge arrays and separation settings subtourelim reads from the model.
 
+    Parameters:
+        n (int): Number of cities.
+        tails, heads (numpy.ndarray): City indices of each edge, in the order of xlist.
+        xlist (list): Edge variables.
 
-def distance(city1, city2, coordinates):
+    The node sets of every cut added are collected in model._cuts; model._lazy_cuts counts the
+    ones added as lazy constraints.
     """
-    Calculate the Haversine distance between two cities based on their coordinates.
-    """
-    c1 = coordinates[city1]
-    c2 = coordinates[city2]
-    dist = round(hv.haversine(c1, c2, hv.Unit.KILOMETERS), 2)
-    return dist
+    model._n = n
+    model._xlist = xlist
+    model._tails, model._heads = tails, heads
+    model._cuts = []
+    model._lazy_cuts = 0
+    model.Params.lazyConstraints = 1
+    model._user_cuts = user_cuts
+    if user_cuts:
+        model.Params.PreCrush = 1
+        model._cut_node_limit, model._cut_frequency, model._cut_rounds = cut_node_limit, cut_frequency, cut_rounds
+        model._node_rounds = {}
 
 
 def subtourelim(model, where, capitals):
     """
     Callback function to eliminate subtours during optimization.
+
+    Every connected component of an integer solution that misses some city gets its own
+    lazy constraint, so one callback round removes all current subtours at once.
     """
     if where == GRB.Callback.MIPSOL:
         # Extract the solution
-        vals = model.cbGetSolution(model._vars)
-        selected = gp.tuplelist((i, j) for i, j in model._vars.keys() if vals[i, j] > 0.5)
-
-        # Find the shortest subtour
-        tour = subtour(selected, capitals)
-        if len(tour) < len(capitals):
-            # Add subtour elimination constraints
-            model.cbLazy(gp.quicksum(model._vars[i, j] for i, j in combinations(tour, 2))
-                         <= len(tour) - 1)
-
-
-def subtour(edges, capitals):
-    """
-    Given a tuplelist of edges, find the shortest subtour.
-    """
-    unvisited = capitals[:]
-    cycle = capitals[:]  # Dummy - guaranteed to be replaced
-    while unvisited:  # true if list is non-empty
-        thiscycle = []
-        neighbors = unvisited
-        while neighbors:
-            current = neighbors[0]
-            thiscycle.append(current)
-            unvisited.remove(current)
-            neighbors = [j for i, j in edges.select(current, '*') if j in unvisited]
-        if len(thiscycle) <= len(cycle):
-            cycle = thiscycle  # New shortest subtour
+        vals = np.array(model.cbGetSolution(model._xlist))
+        selected = vals > 0.5
+
+        components = connected_components(len(capitals), model._tails[selected], model._heads[selected])
+        if len(components) > 1:
+            for component in components:
+                # Add subtour elimination constraints
+                model.cbLazy(subtour_expr(model, component) <= len(component) - 1)
+                model._cuts.append(component)
+                model._lazy_cuts += 1
+
+    elif where == GRB.Callback.MIPNODE and model._user_cuts:
+        if model.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+            return
+        node = int(model.cbGet(GRB.Callback.MIPNODE_NODCNT))
+        if node > model._cut_node_limit or node % model._cut_frequency:
+            return
+        rounds = model._node_rounds.get(node, 0)
+        if rounds >= model._cut_rounds:
+            return
+        model._node_rounds[node] = rounds + 1
+
+        # Separate subtour inequalities violated by the fractional relaxation
+        vals = np.array(model.cbGetNodeRel(model._xlist))
+        for component in fractional_subtours(len(capitals), model._tails, model._heads, vals):
+            model.cbCut(subtour_expr(model, component) <= len(component) - 1)
+            model._cuts.append(component)
+
+
+def subtour_expr(model, component):
+    """
+    Sum of the edge variables with both ends inside component (city indices).
+    """
+    inside = np.zeros(model._n, dtype=bool)
+    inside[component] = True
+    positions = np.flatnonzero(inside[model._tails] & inside[model._heads])
+    return gp.LinExpr([1.0] * len(positions), [model._xlist[p] for p in positions])
+
+
+def connected_components(n, tails, heads):
+    """
+    Group cities 0..n-1 into connected components of the edges (tails[e], heads[e]).
+
+    Runs scipy's sparse graph traversal, so the cost is linear in n plus the number of edges.
+
+    Returns:
+        list: One array of city indices per component.
+    """
+    graph = sp.coo_matrix((np.ones(len(tails)), (tails, heads)), shape=(n, n))
+    _, labels = csgraph.connected_components(graph, directed=False)
+    order = np.argsort(labels, kind='stable')
+    splits = np.flatnonzero(np.diff(labels[order])) + 1
+    return np.split(order, splits)
+
+
+def fractional_subtours(n, tails, heads, vals, tol=1e-6):
+    """
+    Find node sets whose subtour inequality is violated by a fractional solution.
+
+    Only the support graph (edges with a positive value) is used. A disconnected support graph
+    yields every component. Otherwise every path of edges at value 1 is shrunk to one node,
+    which keeps a violated cut if there is one (Padberg-Rinaldi), and the global minimum cut of
+    the shrunk graph gives a violated set when its weight is below 2.
+
+    Returns:
+        list: Arrays of city indices, possibly empty.
+    """
+    support = vals > tol
+    tails, heads, vals = tails[support], heads[support], vals[support]
+    components = connected_components(n, tails, heads)
+    if len(components) > 1:
+        return components
+
+    one = vals >= 1 - tol
+    count, label = csgraph.connected_components(
+        sp.coo_matrix((np.ones(one.sum()), (tails[one], heads[one])), shape=(n, n)), directed=False)
+    if count < 2:
+        return []
+    a, b = label[tails], label[heads]
+    between = a != b
+    weights = sp.coo_matrix((vals[between], (a[between], b[between])), shape=(count, count)).tocsr()
+    cut_value, side = min_cut(weights + weights.T)
+    if cut_value < 2 - 1e-4:
+        side = np.flatnonzero(np.isin(label, side))
+        return [side if len(side) <= n // 2 else np.setdiff1d(np.arange(n), side)]
+    return []
+
+
+def min_cut(weights, scale=1e6):
+    """
+    Global minimum cut of a symmetric weighted graph given as a sparse matrix.
+
+    The weights are scaled to integers and the cut is the smallest of the maximum flows from
+    node 0 to every other node (scipy's Dinic implementation), so no dense n x n array is built.
+
+    Returns:
+        tuple: (cut weight, array of the nodes on the side of node 0).
+    """
+    weights = sp.csr_matrix(weights)
+    n = weights.shape[0]
+    capacity = weights.copy()
+    capacity.data = np.round(capacity.data * scale).astype(np.int64)
+    capacity.eliminate_zeros()
+    best_value, best_sink = np.inf, None
+    for sink in range(1, n):
+        value = csgraph.maximum_flow(capacity, 0, sink).flow_value
+        if value < best_value:
+            best_value, best_sink = value, sink
+    if best_sink is None:
+        return np.inf, np.arange(n)
+
+    # Source side: nodes reachable from 0 over edges with residual capacity
+    flow = csgraph.maximum_flow(capacity, 0, best_sink).flow
+    residual = capacity - flow
+    residual.data = np.maximum(residual.data, 0)
+    residual.eliminate_zeros()
+    side = csgraph.breadth_first_order(residual, 0, directed=True, return_predecessors=False)
+    return best_value / scale, np.sort(side)
+
+
+def ordered_cycle(n, tails, heads, start=0):
+    """
+    Walk the cycle through start in a solution where every city has two incident edges.
+
+    Returns:
+        list: City indices in visiting order.
+    """
+    adjacency = np.full((n, 2), -1, dtype=np.intp)
+    degree = np.zeros(n, dtype=np.intp)
+    for a, b in zip(tails.tolist(), heads.tolist()):
+        adjacency[a, degree[a]] = b
+        degree[a] += 1
+        adjacency[b, degree[b]] = a
+        degree[b] += 1
+
+    cycle = [start]
+    previous, current = start, adjacency[start, 0]
+    while current != start and current >= 0:
+        cycle.append(int(current))
+        nxt = adjacency[current, 0] if adjacency[current, 0] != previous else adjacency[current, 1]
+        previous, current = current, nxt
     return cycle
 
 
@@ -0,0 +1,125 @@
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+
+
+def tsp_arcs(n):
+    """
+    Enumerate the directed arcs (i, j), i != j, in row-major order.
+
+    Returns:
+        tuple: (tails, heads) integer arrays of length n * (n - 1).
+    """
+    tails = np.repeat(np.arange(n), n - 1)
+    offsets = np.tile(np.arange(n - 1), n)
+    heads = offsets + (offsets >= tails)  # Skip the diagonal
+    return tails, heads
+
+
+def arc_position(n, i, j):
+    """
+    Position of arc (i, j) in the tsp_arcs ordering; works element-wise on arrays.
+    """
+    i = np.asarray(i)
+    j = np.asarray(j)
+    return i * (n - 1) + j - (j > i)
+
+
+def tour_start_vector(n, tour):
+    """
+    0/1 start values for the arc variables from a tour given as a sequence of city indices.
+    """
+    tour = np.asarray(tour)
+    start = np.zeros(n * (n - 1))
+    start[arc_position(n, tour, np.roll(tour, -1))] = 1
+    return start
+
+
+def set_mip_starts(model, x, tours):
+    """
+    Pass several tours to Gurobi as MIP starts (NumStart / StartNumber), best first.
+    """
+    n = len(tours[0])
+    model.NumStart = len(tours)
+    for number, tour in enumerate(tours):
+        model.Params.StartNumber = number
+        x.Start = tour_start_vector(n, tour)
+    model.Params.StartNumber = 0
+
+
+def build_mtz_model(distance_matrix, name="TSP", env=None):
+    """
+    Build the MTZ TSP model with the matrix API.
+
+    No self-loop variables are created, the degree constraints and the MTZ rows are each added
+    as one sparse matrix, and the order variables u are bounded to [1, n - 1] (u[0] = 0).
+
+    Parameters:
+        distance_matrix: n x n array of travel distances.
+        env (gurobipy.Env): Environment to create the model in; defaults to the default environment.
+
+    Returns:
+        tuple: (model, x, u, arcs) where x is indexed like arcs = (tails, heads).
+    """
+    distance_matrix = np.asarray(distance_matrix)
+    n = len(distance_matrix)
+    tails, heads = tsp_arcs(n)
+    num_arcs = len(tails)
+    cols = np.arange(num_arcs)
+    ones = np.ones(num_arcs)
+
+    model = gp.Model(name, env=env)
+
+    # Decision variables: x[a] = 1 if arc a = (tails[a], heads[a]) is in the tour
+    x = model.addMVar(num_arcs, vtype=GRB.BINARY, obj=distance_matrix[tails, heads], name='x')
+
+    # Decision variables: u[i] is the position of city i in the tour
+    lower = np.ones(n)
+    upper = np.full(n, n - 1.0)
+    lower[0] = upper[0] = 0
+    u = model.addMVar(n, lb=lower, ub=upper, name='u')
+
+    # Objective function: minimize the total travel distance
+    model.ModelSense = GRB.MINIMIZE
+
+    # Constraints: Each city must be departed and arrived at exactly once
+    model.addMConstr(sp.csr_matrix((ones, (tails, cols)), shape=(n, num_arcs)), x, '=', np.ones(n), name='out')
+    model.addMConstr(sp.csr_matrix((ones, (heads, cols)), shape=(n, num_arcs)), x, '=', np.ones(n), name='in')
+
+    # Subtour elimination constraints (MTZ formulation): u[i] - u[j] + (n - 1) x[i, j] <= n - 2
+    mtz = np.flatnonzero((tails > 0) & (heads > 0))
+    rows = np.arange(len(mtz))
+    order = sp.csr_matrix((np.r_[np.ones(len(mtz)), -np.ones(len(mtz))],
+                           (np.r_[rows, rows], np.r_[tails[mtz], heads[mtz]])), shape=(len(mtz), n))
+    arcs = sp.csr_matrix((np.full(len(mtz), n - 1.0), (rows, mtz)), shape=(len(mtz), num_arcs))
+    model.addConstr(order @ u + arcs @ x <= n - 2, name='mtz')
+
+    return model, x, u, (tails, heads)
+
+
+def successors(x_values, arcs, n):
+    """
+    Successor of every city from the arc values; -1 where no outgoing arc is selected.
+    """
+    tails, heads = arcs
+    selected = np.asarray(x_values) > 0.5
+    succ = np.full(n, -1)
+    succ[tails[selected]] = heads[selected]
+    return succ
+
+
+def follow_successors(succ, start=0):
+    """
+    Walk a successor array from start until the tour closes or breaks off (succ = -1).
+
+    Returns:
+        list: City indices in visiting order, each at most once.
+    """
+    succ = np.asarray(succ).tolist()
+    tour = [start]
+    current = succ[start]
+    while current >= 0 and current != start and len(tour) < len(succ):
+        tour.append(current)
+        current = succ[current]
+    return tour
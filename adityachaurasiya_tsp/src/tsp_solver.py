@@ -1,8 +1,10 @@
+import numpy as np
 import pandas as pd
-import haversine
 import pulp
 from pulp import GLPK, GUROBI
-import folium
+from distance_matrix import calculate_distance_matrix
+from tsp_model import successors, follow_successors
+from route_map import save_route_map
 
 
 def read_data(file_path):
@@ -12,16 +14,6 @@ def read_data(file_path):
     return places, coordinates
 
 
-def calculate_distance_matrix(coordinates):
-    n = len(coordinates)
-    distance_matrix = [[0.0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = haversine(coordinates[i], coordinates[j])
-    return distance_matrix
-
-
 def build_model(places, distance_matrix):
     # instantiate the problem - Python PuLP model
     prob = pulp.LpProblem("TSP", pulp.LpMinimize)
@@ -76,34 +68,34 @@ def build_model(places, distance_matrix):
     return prob, x
 
 
-def solve_tsp(prob, x, places):
-    # Solve the problem
+def solve_tsp(prob, x, places, write_lp=True, time_limit=300):
+    # Solve the problem; a tour found before time_limit (seconds) is returned even if not proven optimal
     solver = 'GUROBI'  # Solver choice; 'CBC', 'GUROBI', 'GLPK'
     print('-' * 50)
     print('Optimization solver', solver, 'called')
-    prob.writeLP("../output/tsp1.lp")
+    if write_lp:
+        prob.writeLP("../output/tsp1.lp")
     if solver == 'CBC':
-        prob.solve(pulp.PULP_CBC_CMD())
+        prob.solve(pulp.PULP_CBC_CMD(timeLimit=time_limit))
     elif solver == 'GUROBI':
-        prob.solve(GUROBI((warmStart=True, timeLimit=300)))
+        prob.solve(GUROBI(warmStart=True, timeLimit=time_limit))
     elif solver == 'GLPK':
-        prob.solve(GLPK())
+        prob.solve(GLPK(timeLimit=time_limit))
     else:
         print(solver, ' not available')
         exit()
     print(f'Status: {pulp.LpStatus[prob.status]}')
 
-    if pulp.LpStatus[prob.status] == 'Optimal':
+    # PuLP reports a time limit as Not Solved, but the variables hold the incumbent if there is one
+    found = all(var.varValue is not None for var in x.values())
+    if pulp.LpStatus[prob.status] == 'Optimal' or (pulp.LpStatus[prob.status] == 'Not Solved' and found):
         n = len(places)
-        optimal_route = [places[0]]
-        for i in range(1, len(places) - 1):
-            for j in range(len(places)):
-                if i != j:
-                    if x[(places[i], places[j])].value() is not None:
-                        if x[(places[i], places[j])].value() > 0.5:
-                            optimal_route.append(places[j])
-                            break
-
+        # One pass over the variables into a successor array, then follow it from the first place
+        index = {place: i for i, place in enumerate(places)}
+        tails, heads = np.array([(index[i], index[j]) for i, j in x]).T
+        values = [var.varValue or 0.0 for var in x.values()]
+        tour = follow_successors(successors(values, (tails, heads), n))
+        optimal_route = [places[i] for i in tour]
         optimal_route.append(optimal_route[0])  # Return to the starting place
 
         total_distance = pulp.value(prob.objective)
@@ -117,25 +109,10 @@ def solve_tsp(prob, x, places):
         return None, None
 
 
-def plot_route(optimal_route, coordinates, places):
-    # Create a map centered around the first place
-    start_coord = coordinates[places.index(optimal_route[0])]
-    m = folium.Map(location=start_coord, zoom_start=6)
-
-    # Add markers for each place with tooltips
-    for idx in optimal_route:
-        folium.Marker(
-            location=coordinates[places.index(idx)],
-            popup=coordinates[places.index(idx)],
-            tooltip=coordinates[places.index(idx)]
-        ).add_to(m)
-
-    # Add lines to show the route
-    route_coords = [coordinates[places.index(i)] for i in optimal_route]
-    folium.PolyLine(locations=route_coords, color='blue').add_to(m)
-
-    # Save the map
-    m.save('../output/tsp_route.html')
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, '../output/tsp_route.html',
+                          background=background)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 import pandas as pd
-from haversine import haversine
 import gurobipy as gp
 from gurobipy import GRB
-import folium
+from distance_cache import cached_distance_matrix
+from route_map import save_route_map
 
 
 def read_data(file_path):
@@ -12,15 +12,6 @@ def read_data(file_path):
     return places, coordinates
 
 
-def calculate_distance_matrix(coordinates):
-    n = len(coordinates)
-    distance_matrix = [[0.0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = haversine(coordinates[i], coordinates[j])
-    return distance_matrix
-
 def nearest_neighbor_solution(places, distance_matrix):
     n = len(places)
     initial_solution = [[0] * n for _ in range(n)]
@@ -106,31 +97,16 @@ def solve_tsp(model, x, places):
         return None, None
 
 
-def plot_route(optimal_route, coordinates, places):
-    # Create a map centered around the first place
-    start_coord = coordinates[places.index(optimal_route[0])]
-    m = folium.Map(location=start_coord, zoom_start=6)
-
-    # Add markers for each place with tooltips
-    for idx in optimal_route:
-        folium.Marker(
-            location=coordinates[places.index(idx)],
-            popup=coordinates[places.index(idx)],
-            tooltip=coordinates[places.index(idx)]
-        ).add_to(m)
-
-    # Add lines to show the route
-    route_coords = [coordinates[places.index(i)] for i in optimal_route]
-    folium.PolyLine(locations=route_coords, color='blue').add_to(m)
-
-    # Save the map
-    m.save('../output/tsp_route_warm.html')
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, '../output/tsp_route_warm.html',
+                          background=background)
 
 
 if __name__ == "__main__":
     data_file_path = '../data/tsp_input.csv'
     places, coordinates = read_data(data_file_path)
-    distance_matrix = calculate_distance_matrix(coordinates)
+    distance_matrix = cached_distance_matrix(coordinates)
     model, x = build_model(places, distance_matrix)
     optimal_route, total_distance = solve_tsp(model, x, places)
 
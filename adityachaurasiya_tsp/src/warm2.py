@@ -1,12 +1,12 @@
 import pandas as pd
-from haversine import haversine
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 import gurobipy as gp
 from gurobipy import GRB
 import time
-import folium
 import os
+from distance_cache import cached_distance_matrix
+from route_map import save_route_map
 
 # Create the output directory if it doesn't exist
 if not os.path.exists("output"):
@@ -20,15 +20,6 @@ def read_data(file_path, num_places):
     coordinates = list(zip(df['Latitude'], df['Longitude']))
     return places, coordinates
 
-def calculate_distance_matrix(coordinates):
-    n = len(coordinates)
-    distance_matrix = [[0.0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = haversine(coordinates[i], coordinates[j])
-    return distance_matrix
-
 def solve_tsp_ortools(distance_matrix):
     """Solves the TSP problem using OR-Tools and returns the solution."""
     # Create the routing index manager.
@@ -68,7 +59,7 @@ def solve_tsp_ortools(distance_matrix):
     else:
         return None, None
 
-def build_gurobi_model(places, distance_matrix, initial_solution):
+def build_gurobi_model(places, distance_matrix, initial_solution, write_lp=True):
     """Build the TSP model using Gurobi with an initial solution as a warm start."""
     n = len(places)
     model = gp.Model('TSP')
@@ -92,7 +83,8 @@ def build_gurobi_model(places, distance_matrix, initial_solution):
         x[initial_solution[-1], initial_solution[0]].start = 1
 
     # Save the formulation to a file
-    model.write("tsp2.lp")
+    if write_lp:
+        model.write("tsp2.lp")
 
     return model, x
 
@@ -111,33 +103,18 @@ def extract_solution(model, x, n):
         print("No optimal solution found.")
         return None
 
-def plot_route(optimal_route, coordinates, places):
-    # Create a map centered around the first place
-    start_coord = coordinates[places.index(optimal_route[0])]
-    m = folium.Map(location=start_coord, zoom_start=6)
-
-    # Add markers for each place with tooltips
-    for idx in optimal_route:
-        folium.Marker(
-            location=coordinates[places.index(idx)],
-            popup=coordinates[places.index(idx)],
-            tooltip=coordinates[places.index(idx)]
-        ).add_to(m)
-
-    # Add lines to show the route
-    route_coords = [coordinates[places.index(i)] for i in optimal_route]
-    folium.PolyLine(locations=route_coords, color='blue').add_to(m)
-
-    # Save the map
-    m.save('output/tsp_route_warm2.html')
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, 'output/tsp_route_warm2.html',
+                          background=background)
 
 if __name__ == '__main__':
-    data_file_path = r'C:\Users\adity\tsp\tsp\data\tsp_input.csv'
+    data_file_path = '../data/tsp_input.csv'
     num_places = 50
 
     start_time = time.time()  # Start timing
     places, coordinates = read_data(data_file_path, num_places)
-    distance_matrix = calculate_distance_matrix(coordinates)
+    distance_matrix = cached_distance_matrix(coordinates)
     initial_solution_indices, total_distance = solve_tsp_ortools(distance_matrix)
 
     if initial_solution_indices:
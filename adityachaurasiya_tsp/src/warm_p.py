@@ -1,9 +1,13 @@
+import numpy as np
 import pandas as pd
-from haversine import haversine
-import gurobipy as gp
 from gurobipy import GRB
-import folium
 import time
+from distance_cache import cached_distance_matrix
+from tsp_model import build_mtz_model, successors, follow_successors, set_mip_starts
+from local_search import improve_matrix_tour, report_start_gap
+from construction import multi_start_tours
+from portfolio import solve_portfolio
+from route_map import save_route_map
 
 # Define functions
 def read_data(file_path, num_places):
@@ -13,88 +17,37 @@ def read_data(file_path, num_places):
     coordinates = list(zip(df['Latitude'], df['Longitude']))
     return places, coordinates
 
-def calculate_distance_matrix(coordinates):
-    n = len(coordinates)
-    distance_matrix = [[0.0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = haversine(coordinates[i], coordinates[j])
-    return distance_matrix
-
-def nearest_neighbor_solution(places, distance_matrix):
-    n = len(places)
-    initial_solution = [[0] * n for _ in range(n)]
-    visited = [False] * n
-    current_city = 0
-    visited[current_city] = True
-    for _ in range(1, n):
-        nearest_city = None
-        nearest_distance = float('inf')
-        for j in range(n):
-            if not visited[j] and distance_matrix[current_city][j] < nearest_distance:
-                nearest_city = j
-                nearest_distance = distance_matrix[current_city][j]
-        initial_solution[current_city][nearest_city] = 1
-        visited[nearest_city] = True
-        current_city = nearest_city
-    initial_solution[current_city][0] = 1  # Return to start
-    return initial_solution
-
-def build_model(places, distance_matrix, warmstart=True):
-    n = len(places)
-    model = gp.Model("TSP")
-
-    # Decision variables: x[i,j] = 1 if edge (i,j) is in the tour
-    x = model.addVars(n, n, vtype=GRB.BINARY, name='x')
-
-    # Decision variables: s[i] for MTZ formulation
-    s = model.addVars(n, vtype=GRB.INTEGER, name='s')
-
-    # Objective function: minimize the total travel distance
-    model.setObjective(gp.quicksum(distance_matrix[i][j] * x[i, j] for i in range(n) for j in range(n)), GRB.MINIMIZE)
-
-    # Constraints: Each city must be left and entered exactly once
-    model.addConstrs(gp.quicksum(x[i, j] for j in range(n) if i != j) == 1 for i in range(n))
-    model.addConstrs(gp.quicksum(x[i, j] for i in range(n) if i != j) == 1 for j in range(n))
-
-    # Subtour elimination constraints
-    model.addConstrs((s[i] - s[j] + n * x[i, j] <= n - 1) for i in range(1, n) for j in range(1, n) if i != j)
+def build_model(places, distance_matrix, warmstart=True, construction_time=10, num_starts=3):
+    # MTZ model over the n * (n - 1) arcs, built with sparse degree and MTZ blocks
+    model, x, s, arcs = build_mtz_model(distance_matrix)
 
     # Set MIPFocus parameter
     model.setParam('MIPFocus', 1)
 
     # Warm start
     if warmstart:
-        initial_solution = nearest_neighbor_solution(places, distance_matrix)
-        for i in range(n):
-            for j in range(n):
-                x[i, j].start = initial_solution[i][j]
+        # Multi-start construction portfolio; the best num_starts tours become MIP starts
+        tours = [tour for _, tour in multi_start_tours(distance_matrix, construction_time, top_k=num_starts)]
+        warmstart = bool(tours)
+        if warmstart:
+            # Polish the best tour with 2-opt / Or-opt before handing it to Gurobi
+            tours[0], start_objective = improve_matrix_tour(tours[0], distance_matrix, time_budget=2)
+            set_mip_starts(model, x, tours)
 
     # Optimize the model
     model.optimize()
+    if warmstart and model.SolCount:
+        report_start_gap(start_objective, model.ObjVal)
 
-    return model, x
+    return model, x, arcs
 
-def solve_tsp(model, x, places):
+def solve_tsp(model, x, arcs, places):
     if model.status == GRB.OPTIMAL:
         n = len(places)
-        optimal_route = []
-        start = 0
-        current = start
-        while True:
-            optimal_route.append(places[current])
-            next_city = None
-            for j in range(n):
-                if x[current, j].X > 0.5:
-                    next_city = j
-                    break
-            if next_city is None:
-                break
-            current = next_city
-            if current == start:
-                break
-        optimal_route.append(places[start])  # Return to the starting place
+        # All arc values in one call, thresholded into a successor array
+        tour = follow_successors(successors(x.X, arcs, n))
+        optimal_route = [places[i] for i in tour]
+        optimal_route.append(places[tour[0]])  # Return to the starting place
 
         total_distance = model.objVal
 
@@ -106,35 +59,39 @@ def solve_tsp(model, x, places):
         print("No optimal solution found.")
         return None, None
 
-def plot_route(optimal_route, coordinates, places):
-    # Create a map centered around the first place
-    start_coord = coordinates[places.index(optimal_route[0])]
-    m = folium.Map(location=start_coord, zoom_start=6)
-
-    # Add markers for each place with tooltips
-    for idx in optimal_route:
-        folium.Marker(
-            location=coordinates[places.index(idx)],
-            popup=coordinates[places.index(idx)],
-            tooltip=coordinates[places.index(idx)]
-        ).add_to(m)
+def solve_tsp_portfolio(places, distance_matrix, time_limit=300, construction_time=10):
+    # Same MTZ model solved with several parameter sets in parallel; the first to finish stops the rest
+    tours = multi_start_tours(distance_matrix, construction_time)
+    tour, total_distance, bound, _ = solve_portfolio(distance_matrix, time_limit=time_limit,
+                                                     start_tour=tours[0][1] if tours else None)
+    if tour is None:
+        print("No solution found.")
+        return None, None
 
-    # Add lines to show the route
-    route_coords = [coordinates[places.index(i)] for i in optimal_route]
-    folium.PolyLine(locations=route_coords, color='blue').add_to(m)
+    optimal_route = [places[i] for i in tour] + [places[tour[0]]]
+    print("Optimal Route:", " -> ".join(optimal_route))
+    print("Total Distance:", total_distance, "Best Bound:", bound)
+    return optimal_route, total_distance
 
-    # Save the map
-    m.save('output/tsp_route_warm_p.html')
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, 'output/tsp_route_warm_p.html',
+                          background=background)
 
 if __name__ == "__main__":
-    data_file_path = r'C:\Users\adity\tsp\tsp\data\tsp_input.csv'
+    data_file_path = '../data/tsp_input.csv'
     num_places = 40
+    # Parameter portfolio instead of a single hardcoded MIPFocus setting
+    portfolio = True
 
     start_time = time.time()  # Start timing
     places, coordinates = read_data(data_file_path, num_places)
-    distance_matrix = calculate_distance_matrix(coordinates)
-    model, x = build_model(places, distance_matrix)
-    optimal_route, total_distance = solve_tsp(model, x, places)
+    distance_matrix = cached_distance_matrix(coordinates)
+    if portfolio:
+        optimal_route, total_distance = solve_tsp_portfolio(places, distance_matrix)
+    else:
+        model, x, arcs = build_model(places, distance_matrix)
+        optimal_route, total_distance = solve_tsp(model, x, arcs, places)
 
     if optimal_route:
         plot_route(optimal_route, coordinates, places)
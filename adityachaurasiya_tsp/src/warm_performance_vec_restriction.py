@@ -1,8 +1,12 @@
-import folium
+import numpy as np
 import gurobipy as gp
 import pandas as pd
 from gurobipy import GRB
-from haversine import haversine
+from distance_cache import cached_distance_matrix
+from local_search import improve_matrix_tour, tour_from_matrix, matrix_from_tour, report_start_gap, tour_within
+from candidate_graph import solve_candidate_tsp
+from tsp_model import successors, follow_successors
+from route_map import save_route_map
 
 
 def read_data(file_path):
@@ -12,16 +16,6 @@ def read_data(file_path):
     return places, coordinates
 
 
-def calculate_distance_matrix(coordinates):
-    n = len(coordinates)
-    distance_matrix = [[0.0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i != j:
-                distance_matrix[i][j] = haversine(coordinates[i], coordinates[j])
-    return distance_matrix
-
-
 def vechical_restriction(places, distance_matrix):
     n = len(places)
     initial_solution = [[0] * n for _ in range(n)]
@@ -46,31 +40,40 @@ def build_model(places, distance_matrix, max_distance = 500, warmstart=True, tim
     n = len(places)
     model = gp.Model("TSP")
 
-    # Decision variables: x[i,j] = 1 if edge (i,j) is in the tour
-    x = model.addVars(n, n, vtype=GRB.BINARY, name='x')
+    # Decision variables: x[i,j] = 1 if edge (i,j) is in the tour, only for arcs within max_distance
+    arcs = gp.tuplelist((i, j) for i in range(n) for j in range(n)
+                        if i != j and distance_matrix[i][j] <= max_distance)
+    x = model.addVars(arcs, vtype=GRB.BINARY, name='x')
 
     # Decision variables: s[i] for MTZ formulation
     s = model.addVars(n, vtype=GRB.INTEGER, name='s')
 
     # Objective function: minimize the total travel distance
-    model.setObjective(gp.quicksum(distance_matrix[i][j] * x[i, j] for i in range(n) for j in range(n) if distance_matrix[i][j] <= max_distance), GRB.MINIMIZE)
+    model.setObjective(gp.quicksum(distance_matrix[i][j] * x[i, j] for i, j in arcs), GRB.MINIMIZE)
 
     # Constraints: Each city must be departed exactly once
-    model.addConstrs(gp.quicksum(x[i, j] for j in range(n) if i != j and distance_matrix[i][j] <= max_distance) == 1 for i in range(n))
+    model.addConstrs(x.sum(i, '*') == 1 for i in range(n))
 
     # Constraints: Each city must be arrived at exactly once
-    model.addConstrs(gp.quicksum(x[i, j] for i in range(n) if i != j and distance_matrix[i][j] <= max_distance) == 1 for j in range(n))
+    model.addConstrs(x.sum('*', j) == 1 for j in range(n))
 
     # Subtour elimination constraints
-    model.addConstrs((s[i] - s[j] + n * x[i, j] <= n - 1) for i in range(1, n) for j in range(1, n) if i != j and distance_matrix[i][j] <= max_distance)
+    model.addConstrs((s[i] - s[j] + n * x[i, j] <= n - 1) for i, j in arcs if i != 0 and j != 0)
 
     # warm start
+    start_objective = None
     if warmstart:
         initial_solution = vechical_restriction(places, distance_matrix)
-        for i in range(n):
-            for j in range(n):
-                if distance_matrix[i][j] <= max_distance:
-                    x[i, j].start = initial_solution[i][j]
+        # Polish the greedy tour with 2-opt / Or-opt on the allowed arcs before handing it to Gurobi
+        tour, start_objective = improve_matrix_tour(tour_from_matrix(initial_solution), distance_matrix,
+                                                    time_budget=2, max_distance=max_distance)
+        if tour_within(tour, distance_matrix, max_distance):
+            initial_solution = matrix_from_tour(tour, n)
+            for i, j in arcs:
+                x[i, j].start = initial_solution[i][j]
+        else:
+            print(f"Warm start skipped: the polished tour still uses arcs longer than {max_distance}")
+            start_objective = None
 
     # Set the time limit
     model.setParam('TimeLimit', time_limit)
@@ -82,6 +85,8 @@ def build_model(places, distance_matrix, max_distance = 500, warmstart=True, tim
     model.setParam('Presolve', 2)
     # Optimize the model
     model.optimize()
+    if start_objective is not None and model.SolCount:
+        report_start_gap(start_objective, model.ObjVal)
 
     return model, x
 
@@ -89,22 +94,12 @@ def build_model(places, distance_matrix, max_distance = 500, warmstart=True, tim
 def solve_tsp(model, x, places):
     if model.status == GRB.OPTIMAL:
         n = len(places)
-        optimal_route = []
-        start = 0
-        current = start
-        while True:
-            optimal_route.append(places[current])
-            next_city = None
-            for j in range(n):
-                if x[current, j].X > 0.5:
-                    next_city = j
-                    break
-            if next_city is None:
-                break
-            current = next_city
-            if current == start:
-                break
-        optimal_route.append(places[start])  # Return to the starting place
+        # Read all x values with one getAttr call and threshold them into a successor array
+        tails, heads = np.array(list(x.keys())).T
+        values = model.getAttr('X', list(x.values()))
+        tour = follow_successors(successors(values, (tails, heads), n))
+        optimal_route = [places[i] for i in tour]
+        optimal_route.append(places[tour[0]])  # Return to the starting place
 
         total_distance = model.objVal
 
@@ -117,33 +112,26 @@ def solve_tsp(model, x, places):
         return None, None
 
 
-def plot_route(optimal_route, coordinates, places):
-    # Create a map centered around the first place
-    start_coord = coordinates[places.index(optimal_route[0])]
-    m = folium.Map(location=start_coord, zoom_start=6)
-
-    # Add markers for each place with tooltips
-    for idx in optimal_route:
-        folium.Marker(
-            location=coordinates[places.index(idx)],
-            popup=coordinates[places.index(idx)],
-            tooltip=coordinates[places.index(idx)]
-        ).add_to(m)
-
-    # Add lines to show the route
-    route_coords = [coordinates[places.index(i)] for i in optimal_route]
-    folium.PolyLine(locations=route_coords, color='blue').add_to(m)
-
-    # Save the map
-    m.save('../output/tsp_route_warm_tunning_vec.html')
+def plot_route(optimal_route, coordinates, places, background=False):
+    # Route and stops as one GeoJSON layer; background=True writes the HTML in a thread
+    return save_route_map(optimal_route, coordinates, places, '../output/tsp_route_warm_tunning_vec.html',
+                          background=background)
 
 
 if __name__ == "__main__":
     data_file_path = '../data/tsp_input.csv'
+    # Candidate-graph mode: k nearest neighbours per city plus edge pricing, proven optimal
+    # on the complete graph. Set to None to use the max_distance MTZ model instead.
+    candidate_k = 8
     places, coordinates = read_data(data_file_path)
-    distance_matrix = calculate_distance_matrix(coordinates)
-    model, x = build_model(places, distance_matrix)
-    optimal_route, total_distance = solve_tsp(model, x, places)
+    if candidate_k:
+        optimal_route, total_distance = solve_candidate_tsp(places, coordinates, k=candidate_k)
+        print("Optimal Route:", " -> ".join(optimal_route))
+        print("Total Distance:", total_distance)
+    else:
+        distance_matrix = cached_distance_matrix(coordinates)
+        model, x = build_model(places, distance_matrix)
+        optimal_route, total_distance = solve_tsp(model, x, places)
 
     if optimal_route:
         plot_route(optimal_route, coordinates, places)
@@ -0,0 +1,53 @@
+import os
+import sys
+import csv
+
+import numpy as np
+import pytest
+
+# The scripts import each other as top-level modules from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    Run every test from a scratch src/ directory, so caches, maps and LP files written to '..'
+    land in tmp_path.
+    """
+    path = tmp_path / 'src'
+    path.mkdir()
+    monkeypatch.chdir(path)
+    return path
+
+
+@pytest.fixture
+def cities():
+    """
+    Places and (Latitude, Longitude) of 25 random cities in southern India.
+    """
+    rng = np.random.default_rng(7)
+    coordinates = np.column_stack([rng.uniform(8, 16, 25), rng.uniform(74, 80, 25)])
+    places = [f"City {i}" for i in range(25)]
+    return places, [tuple(c) for c in coordinates]
+
+
+@pytest.fixture
+def cities_csv(cities, tmp_path):
+    """
+    The cities written as a Place_Name / Latitude / Longitude input file.
+    """
+    places, coordinates = cities
+    path = tmp_path / 'cities.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Place_Name', 'Latitude', 'Longitude'])
+        writer.writerows((place, lat, lon) for place, (lat, lon) in zip(places, coordinates))
+    return str(path)
+
+
+@pytest.fixture
+def distance_matrix(cities):
+    from distance_matrix import calculate_distance_matrix
+
+    return np.asarray(calculate_distance_matrix(cities[1]))
@@ -0,0 +1,16 @@
+import pytest
+
+import batch
+
+
+@pytest.mark.parametrize('backend', ['lazy', 'mtz'])
+def test_status_follows_solver(cities_csv, backend):
+    batch.init_worker(backend, threads=1, time_limit=60)
+    solved = batch.solve_instance(cities_csv)
+    assert solved['status'] == 'optimal'
+    assert solved['route'][0] == solved['route'][-1] and len(solved['route']) == solved['cities'] + 1
+
+    batch.init_worker(backend, threads=1, time_limit=0)
+    stopped = batch.solve_instance(cities_csv)
+    assert stopped['status'] in ('no_solution', 'time_limit')
+    assert ('route' in stopped) == (stopped['status'] == 'time_limit')
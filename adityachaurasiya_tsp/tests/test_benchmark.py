@@ -0,0 +1,48 @@
+import sys
+
+import benchmark
+from benchmark import compare_with_baseline
+
+
+def record(solver='mtz', dataset='sample_tsp_20city.csv', **values):
+    return dict({'solver': solver, 'dataset': dataset, 'objective': 100.0, 'total_time': 10.0}, **values)
+
+
+def test_unchanged_run_has_no_regressions():
+    baseline = [record(), record(solver='lazy_dfj')]
+    # Timer noise within the tolerance and a case missing from the baseline are fine
+    assert compare_with_baseline([record(total_time=12.0), record(solver='candidate', total_time=99.0)],
+                                 baseline) == []
+
+
+def test_slower_run_is_a_regression():
+    (regression,) = compare_with_baseline([record(total_time=20.0)], [record()])
+    assert regression.startswith('mtz on sample_tsp_20city.csv') and '20.00s vs 10.00s' in regression
+
+
+def test_longer_tour_is_a_regression():
+    (regression,) = compare_with_baseline([record(objective=100.5)], [record()])
+    assert 'objective 100.5 vs 100.00' in regression
+    (regression,) = compare_with_baseline([record(objective=None)], [record()])
+    assert 'objective None' in regression
+
+
+def test_failed_case_is_a_regression():
+    (regression,) = compare_with_baseline([record(error='timeout')], [record()])
+    assert regression == 'mtz on sample_tsp_20city.csv: timeout'
+    # A case that already failed in the baseline is not compared
+    assert compare_with_baseline([record(error='timeout')], [record(error='failed')]) == []
+
+
+def test_missing_baseline_fails(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(benchmark, 'run_isolated', lambda solver, dataset, *args: record(solver, dataset))
+    baseline = str(tmp_path / 'baseline.json')
+    argv = ['benchmark.py', '--solvers', 'mtz', '--datasets', 'sample_tsp_20city.csv', '--baseline', baseline]
+    monkeypatch.setattr(sys, 'argv', argv)
+    assert benchmark.main() == 1
+    assert 'no baseline' in capsys.readouterr().err
+
+    monkeypatch.setattr(sys, 'argv', argv + ['--save-baseline'])
+    assert benchmark.main() == 0
+    monkeypatch.setattr(sys, 'argv', argv)
+    assert benchmark.main() == 0
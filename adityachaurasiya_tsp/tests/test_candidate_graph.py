@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pytest
+import gurobipy as gp
+from gurobipy import GRB
+
+import candidate_graph
+from candidate_graph import solve_candidate_tsp, knn_candidate_edges, edge_distances, lp_duals
+from incremental import IncrementalTSP
+
+
+def test_pricing_reaches_complete_graph_optimum(cities):
+    places, coordinates = cities
+    stats = {}
+    # A sparse graph, so edges have to be priced back in
+    route, objective = solve_candidate_tsp(places, coordinates, k=3, stats=stats)
+
+    tsp = IncrementalTSP(places, coordinates)
+    tsp.solve()
+    assert objective == pytest.approx(tsp.objective)
+    tsp.dispose()
+    assert route[0] == route[-1] and sorted(route[:-1]) == sorted(places)
+    assert stats['proven'] and stats['gap'] == 0.0 and stats['bound'] == pytest.approx(objective)
+
+
+def test_time_limit_does_not_claim_optimality(cities, monkeypatch):
+    places, coordinates = cities
+    solve_sparse_model = candidate_graph.solve_sparse_model
+
+    # Whether a tiny time limit stops before or after the first tour depends on the machine,
+    # so report the sparse solve as stopped on the limit instead
+    def stopped(*args, **kwargs):
+        tour, objective, cuts, status, gap = solve_sparse_model(*args, **kwargs)
+        return tour, objective, cuts, GRB.TIME_LIMIT, 0.05
+
+    def no_pricing(*args, **kwargs):
+        raise AssertionError("duals of a non-optimal sparse model must not be priced")
+
+    monkeypatch.setattr(candidate_graph, 'solve_sparse_model', stopped)
+    monkeypatch.setattr(candidate_graph, 'lp_duals', no_pricing)
+    stats = {}
+    route, objective = solve_candidate_tsp(places, coordinates, k=3, stats=stats)
+
+    assert sorted(route[:-1]) == sorted(places)
+    assert np.isfinite(objective)
+    assert stats['status'] == GRB.TIME_LIMIT and not stats['proven']
+    assert stats['bound'] is None and stats['gap'] == 0.05
+
+
+def test_lp_duals_scale_to_a_thousand_cities():
+    rng = np.random.default_rng(3)
+    coordinates = np.column_stack([rng.uniform(8, 30, 1000), rng.uniform(70, 90, 1000)])
+    tails, heads = knn_candidate_edges(coordinates, k=8)
+    costs = edge_distances(coordinates, tails, heads)
+
+    start = time.perf_counter()
+    try:
+        duals, objective, cuts = lp_duals(1000, tails, heads, costs, [])
+    except gp.GurobiError as e:
+        if e.errno == GRB.Error.SIZE_LIMIT_EXCEEDED:
+            pytest.skip("Gurobi license is too small for the 1000-city LP")
+        raise
+    assert time.perf_counter() - start < 60
+    assert len(duals) == 1000 and np.isfinite(objective)
+    assert all(2 <= len(cut) <= 500 for cut in cuts)
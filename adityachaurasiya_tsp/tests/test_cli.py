@@ -0,0 +1,9 @@
+import cli
+
+
+def test_lazy_time_limit(cities_csv, capsys):
+    assert cli.main(['lazy', '--input', cities_csv, '--no-write', '--time-limit', '0']) == 1
+    assert "No solution found." in capsys.readouterr().out
+
+    assert cli.main(['lazy', '--input', cities_csv, '--no-write', '--time-limit', '60']) == 0
+    assert "Total Distance:" in capsys.readouterr().out
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from construction import multi_start_tours, tour_cost
+
+
+def test_multi_start_returns_distinct_tours(distance_matrix):
+    n = len(distance_matrix)
+    tours = multi_start_tours(distance_matrix, time_limit=20, num_starts=5, top_k=4, max_workers=2)
+
+    assert len(tours) == 4
+    lengths = [length for length, _ in tours]
+    assert lengths == sorted(lengths)
+    cycles = set()
+    for length, tour in tours:
+        assert sorted(tour) == list(range(n))
+        assert length == pytest.approx(tour_cost(distance_matrix, tour))
+        cycles.add(frozenset(map(frozenset, zip(tour.tolist(), np.roll(tour, -1).tolist()))))
+    # The same cycle from another start city or direction counts once
+    assert len(cycles) == 4
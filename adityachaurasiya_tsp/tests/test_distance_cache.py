@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pytest
+
+from distance_cache import DistanceMatrixCache, cached_distance_matrix, coordinate_fingerprint
+from distance_matrix import calculate_distance_matrix
+
+
+def test_cached_matrix_is_shared_and_read_only(cities, tmp_path):
+    _, coordinates = cities
+    cache_dir = str(tmp_path / 'distances')
+    first = cached_distance_matrix(coordinates, cache_dir=cache_dir)
+    second = cached_distance_matrix(coordinates, cache_dir=cache_dir)
+
+    assert np.allclose(first, calculate_distance_matrix(coordinates))
+    assert isinstance(second, np.memmap) and not second.flags.writeable
+    assert len(os.listdir(cache_dir)) == 1
+    with pytest.raises(ValueError):
+        second[0, 1] = 0
+
+
+def test_key_depends_on_unit_and_dtype(cities):
+    _, coordinates = cities
+    keys = {coordinate_fingerprint(coordinates), coordinate_fingerprint(coordinates, unit='mi'),
+            coordinate_fingerprint(coordinates, dtype=np.float32), coordinate_fingerprint(coordinates[1:])}
+    assert len(keys) == 4
+
+
+def test_store_evicts_least_recently_used(cities, tmp_path):
+    _, coordinates = cities
+    size = calculate_distance_matrix(coordinates).nbytes + 1024  # Matrix plus .npy header
+    cache = DistanceMatrixCache(str(tmp_path / 'distances'), max_bytes=2 * size)
+    cache.get_or_compute(coordinates[:25])
+    cache.get_or_compute(coordinates[:24])
+    old, recent = (cache.path(coordinate_fingerprint(c)) for c in (coordinates[:25], coordinates[:24]))
+    os.utime(old, (0, 0))
+    os.utime(recent, (1, 1))
+    cache.get_or_compute(coordinates[:25])  # A hit marks it as recently used
+    cache.get_or_compute(coordinates[:23])
+
+    assert os.path.exists(old) and not os.path.exists(recent)
@@ -0,0 +1,23 @@
+import time
+
+import pytest
+
+from heuristic_solver import solve_heuristic_tsp
+
+
+def test_heuristic_tour_within_budget(cities, distance_matrix):
+    places, coordinates = cities
+    start = time.perf_counter()
+    route, total_distance, stats = solve_heuristic_tsp(places, coordinates, time_budget=2)
+
+    # The budget includes construction; allow for the last repair run to finish
+    assert time.perf_counter() - start < 3
+    assert stats['seconds'] < 3 and stats['iterations'] > 0
+    assert route[0] == route[-1]
+    assert sorted(route[:-1]) == sorted(places)
+    tour = [places.index(place) for place in route]
+    assert total_distance == pytest.approx(sum(distance_matrix[i, j] for i, j in zip(tour, tour[1:])))
+    # The trace only records improvements
+    objectives = [objective for _, objective in stats['trace']]
+    assert objectives == sorted(objectives, reverse=True)
+    assert objectives[-1] == pytest.approx(total_distance)
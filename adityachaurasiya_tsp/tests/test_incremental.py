@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from incremental import IncrementalTSP
+
+
+def fresh_objective(places, coordinates):
+    tsp = IncrementalTSP(places, coordinates)
+    tsp.solve()
+    objective = tsp.objective
+    tsp.dispose()
+    return objective
+
+
+def test_add_and_remove_match_fresh_solve(cities):
+    places, coordinates = cities
+    tsp = IncrementalTSP(places[:15], coordinates[:15])
+    tsp.solve()
+    tsp.add_cities(places[15:18], coordinates[15:18])
+    tsp.remove_cities(places[1:3])
+    tour = tsp.solve()
+
+    remaining = places[:1] + places[3:18]
+    assert sorted(tour) == sorted(remaining)
+    assert tsp.objective == pytest.approx(fresh_objective(remaining, coordinates[:1] + coordinates[3:18]))
+    tsp.dispose()
+
+
+def test_remove_all_cities_outside_a_cut(cities):
+    places, coordinates = cities
+    tsp = IncrementalTSP(places[:8], coordinates[:8])
+    kept = frozenset(places[:5])
+    tsp.add_cuts([kept])
+    assert kept in tsp.cuts
+
+    # The cut set becomes the whole city set, which no tour satisfies
+    tsp.remove_cities(places[5:8])
+    assert kept not in tsp.cuts
+    assert all(3 <= len(cut) <= len(tsp.places) - 1 for cut in tsp.cuts)
+    tour = tsp.solve()
+    assert sorted(tour) == sorted(kept)
+    assert np.isfinite(tsp.objective)
+    tsp.dispose()
+
+
+def test_save_and_load_keep_cuts(cities, tmp_path):
+    places, coordinates = cities
+    tsp = IncrementalTSP(places[:12], coordinates[:12])
+    tsp.solve()
+    path = str(tmp_path / 'state.json')
+    tsp.save(path)
+
+    loaded = IncrementalTSP.load(path)
+    assert set(loaded.cuts) == set(tsp.cuts)
+    assert loaded.tour == tsp.tour
+    loaded.solve()
+    assert loaded.objective == pytest.approx(tsp.objective)
+    tsp.dispose()
+    loaded.dispose()
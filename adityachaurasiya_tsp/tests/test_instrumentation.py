@@ -0,0 +1,59 @@
+import csv
+import json
+import time
+
+import pytest
+
+from instrumentation import PhaseTimer, ProgressRecorder
+from tsp_lazy import solve_tsp_model
+
+
+def test_phase_timer_accumulates():
+    timer = PhaseTimer(enabled=True)
+    for _ in range(2):
+        with timer.phase('build'):
+            time.sleep(0.01)
+    timer.add('optimize', 1.5)
+    assert timer.timings['build'] >= 0.02
+    assert timer.timings['optimize'] == 1.5
+
+    disabled = PhaseTimer(enabled=False)
+    assert disabled.phase('build') is disabled.phase('optimize')
+    with disabled.phase('build'):
+        pass
+    disabled.add('optimize', 1.5)
+    assert disabled.timings == {}
+
+
+def read_rows(path):
+    with open(path) as f:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('extension', ['jsonl', 'csv'])
+def test_progress_rows_parse(cities, tmp_path, extension):
+    places, coordinates = cities
+    path = str(tmp_path / 'progress' / f'lazy.{extension}')
+    progress = ProgressRecorder(path, interval=0)
+    timer = PhaseTimer(enabled=True)
+    stats = {}
+    solve_tsp_model(places, dict(zip(places, coordinates)), timer=timer, progress=progress, stats=stats)
+    progress.close()
+
+    assert set(timer.timings) == {'distance', 'build', 'optimize', 'extract'}
+    rows = read_rows(path)
+    assert rows and all(set(row) == set(ProgressRecorder.FIELDS) for row in rows)
+    assert {row['event'] for row in rows} <= {'progress', 'solution'}
+    assert any(row['event'] == 'solution' for row in rows)
+    # CSV writes None as an empty field
+    value = (lambda v: None if v in ('', None) else float(v))
+    times = [value(row['time']) for row in rows]
+    assert times == sorted(times)
+    lazy_cuts = [value(row['lazy_cuts']) for row in rows]
+    assert lazy_cuts == sorted(lazy_cuts) and lazy_cuts[-1] <= stats['cuts']
+    incumbents = [value(row['incumbent']) for row in rows if value(row['incumbent']) is not None]
+    assert incumbents == sorted(incumbents, reverse=True)
+    assert incumbents[-1] >= stats['objective'] - 1e-6
+    assert all(0 <= value(row['gap']) <= 1 for row in rows if value(row['gap']) is not None)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from local_search import (TourSearch, improve_matrix_tour, matrix_distance, matrix_neighbours, tour_length,
+                          tour_within)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_tour_search_improves_a_random_tour(distance_matrix, seed):
+    start = np.random.default_rng(seed).permutation(len(distance_matrix))
+    dist = matrix_distance(distance_matrix)
+    search = TourSearch(start, dist, matrix_neighbours(distance_matrix, 8))
+    tour = search.run(time_budget=5)
+
+    assert sorted(tour) == list(range(len(distance_matrix)))
+    assert tour_length(tour, dist) <= tour_length(start, dist)
+    assert tour_length(tour, dist) == pytest.approx(tour_length(start, dist) + search.delta)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_improve_matrix_tour_keeps_to_allowed_arcs(distance_matrix, seed):
+    # A random start uses plenty of arcs over 400 km; the polished tour must drop all of them
+    start = np.random.default_rng(seed).permutation(len(distance_matrix))
+    assert not tour_within(start, distance_matrix, 400)
+
+    tour, length = improve_matrix_tour(start, distance_matrix, time_budget=5, max_distance=400)
+    assert sorted(tour) == list(range(len(distance_matrix)))
+    assert tour_within(tour, distance_matrix, 400)
+    # The length is the real one, not the penalised search objective
+    assert length == pytest.approx(tour_length(tour, matrix_distance(distance_matrix)))
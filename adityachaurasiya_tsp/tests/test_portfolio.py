@@ -0,0 +1,13 @@
+import numpy as np
+
+from portfolio import solve_portfolio
+
+
+def test_portfolio_without_start_tour(distance_matrix):
+    tour, objective, bound, results = solve_portfolio(distance_matrix, time_limit=30, max_workers=2)
+
+    assert tour is not None and sorted(tour) == list(range(len(distance_matrix)))
+    assert np.isfinite(objective)
+    assert np.isclose(distance_matrix[tour, np.roll(tour, -1)].sum(), objective)
+    assert bound <= objective + 1e-6
+    assert any(objective_i < float('inf') for _, _, objective_i, _, _ in results)
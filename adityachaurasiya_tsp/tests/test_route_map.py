@@ -0,0 +1,41 @@
+import os
+import importlib.util
+
+import pytest
+
+from route_map import route_points, route_geojson, save_route_map
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def test_geojson_has_route_and_one_point_per_stop(cities):
+    places, coordinates = cities
+    route = places[:4] + places[:1]
+    points = route_points(route, coordinates, places)
+    assert points == route_points(route, dict(zip(places, coordinates)))
+
+    features = route_geojson(route, points)['features']
+    assert features[0]['geometry']['type'] == 'LineString'
+    assert len(features[0]['geometry']['coordinates']) == 5
+    assert [feature['properties']['name'] for feature in features[1:]] == places[:4]
+    lat, lon = coordinates[0]
+    assert features[1]['geometry']['coordinates'] == [lon, lat]
+
+
+def test_background_writer(cities, workdir):
+    places, coordinates = cities
+    path = os.path.join('..', 'output', 'route.html')
+    save_route_map(places + places[:1], coordinates, places, path, background=True).join()
+    assert os.path.getsize(path) > 0
+
+
+@pytest.mark.parametrize('script, output', [('warm Start.py', 'tsp_route_warm.html'),
+                                            ('warm + parameter+time.py', 'tsp_route_warm_tunning.html')])
+def test_script_plot_route(cities, workdir, script, output):
+    spec = importlib.util.spec_from_file_location('warm_script', os.path.join(SRC, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    places, coordinates = cities
+    module.plot_route(places + places[:1], coordinates, places)
+    assert os.path.getsize(os.path.join('..', 'output', output)) > 0
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from solution_cache import SolutionCache, cached_lazy_tsp, solution_fingerprint
+from tsp_lazy import solve_tsp_model
+
+
+def test_no_tour_within_time_limit(cities, tmp_path):
+    places, coordinates = cities
+    coordinates = dict(zip(places, coordinates))
+    stats = {}
+    assert solve_tsp_model(places, coordinates, time_limit=0, stats=stats) is None
+    assert stats['objective'] is None and stats['gap'] is None
+
+    cache = SolutionCache(str(tmp_path / 'solutions'))
+    entry = cached_lazy_tsp(places, coordinates, time_limit=0, cache=cache)
+    assert entry['tour'] is None and entry['status'] != 'optimal'
+    assert not [name for name in os.listdir(cache.cache_dir) if name.endswith('.json')]
+
+
+def test_optimal_entry_is_reused(cities, tmp_path):
+    places, coordinates = cities
+    coordinates = dict(zip(places, coordinates))
+    cache = SolutionCache(str(tmp_path / 'solutions'))
+    first = cached_lazy_tsp(places, coordinates, cache=cache, user_cuts=True)
+    assert first['status'] == 'optimal' and not first['cached']
+    assert sorted(first['tour']) == list(range(len(places)))
+
+    # Another time limit does not matter once the entry is optimal
+    second = cached_lazy_tsp(places, coordinates, time_limit=5, cache=cache, user_cuts=True)
+    assert second['cached'] and second['tour'] == first['tour']
+    # Different settings are a different key
+    third = cached_lazy_tsp(places, coordinates, cache=cache, user_cuts=False)
+    assert not third['cached'] and third['objective'] == pytest.approx(first['objective'])
+
+
+def test_non_optimal_entry_becomes_start(cities, tmp_path):
+    places, coordinates = cities
+    coordinates = dict(zip(places, coordinates))
+    cache = SolutionCache(str(tmp_path / 'solutions'))
+    key = solution_fingerprint(places, [coordinates[c] for c in places], 'lazy_dfj', {})
+    tour = list(range(len(places)))
+    cache.store(key, {'tour': tour, 'objective': 1e9, 'status': '9', 'bound': 0, 'gap': 1, 'time_limit': 1})
+
+    assert cached_lazy_tsp(places, coordinates, time_limit=1, cache=cache)['cached']
+    entry = cached_lazy_tsp(places, coordinates, time_limit=None, cache=cache)
+    assert not entry['cached'] and entry['status'] == 'optimal'
+    assert cache.load(key)['objective'] == pytest.approx(entry['objective'])
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'solutions'), max_bytes=300)  # Room for two entries
+    entry = {'tour': list(range(20)), 'objective': 1.0, 'status': 'optimal', 'bound': 1.0, 'gap': 0.0}
+    cache.store('a', entry)
+    cache.store('b', entry)
+    os.utime(cache.path('a'), (0, 0))
+    os.utime(cache.path('b'), (1, 1))
+    cache.load('a')  # Now the most recently used
+    cache.store('c', entry)
+
+    assert cache.load('a') is not None and cache.load('c') is not None
+    assert cache.load('b') is None
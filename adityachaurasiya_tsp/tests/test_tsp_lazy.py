@@ -0,0 +1,101 @@
+import os
+import time
+import tracemalloc
+from itertools import combinations
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import gurobipy as gp
+
+from gurobipy import GRB
+
+from tsp_lazy import connected_components, fractional_subtours, prepare_callback, solve_tsp_model, subtourelim
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+
+def two_cycles(n, split):
+    # Cities 0..split-1 and split..n-1 each form their own cycle
+    a, b = np.arange(split), np.arange(split, n)
+    return np.r_[a, b], np.r_[np.roll(a, -1), np.roll(b, -1)]
+
+
+def test_connected_components_of_two_cycles():
+    tails, heads = two_cycles(10, 4)
+    components = connected_components(10, tails, heads)
+    assert sorted(map(sorted, components)) == [[0, 1, 2, 3], [4, 5, 6, 7, 8, 9]]
+    # Closing the gap between the cycles joins them
+    assert len(connected_components(10, np.r_[tails, 3], np.r_[heads, 4])) == 1
+
+
+def test_subtourelim_cuts_every_cycle():
+    n = 10
+    edges = list(combinations(range(n), 2))
+    xlist = list(gp.Model().addVars(len(edges)).values())
+    tails, heads = (np.array(side) for side in zip(*edges))
+    cycle_tails, cycle_heads = two_cycles(n, 4)
+    selected = {tuple(sorted(edge)) for edge in zip(cycle_tails, cycle_heads)}
+    vals = [1.0 if edge in selected else 0.0 for edge in edges]
+
+    lazy = []
+    model = SimpleNamespace(Params=SimpleNamespace(), cbGetSolution=lambda xs: vals, cbLazy=lazy.append)
+    prepare_callback(model, n, tails, heads, xlist)
+    subtourelim(model, GRB.Callback.MIPSOL, list(range(n)))
+
+    # One lazy constraint per cycle in the same callback, not only for the one through city 0
+    assert sorted(map(sorted, model._cuts)) == [[0, 1, 2, 3], [4, 5, 6, 7, 8, 9]]
+    assert len(lazy) == model._lazy_cuts == 2
+
+
+def test_fractional_subtours_finds_weak_cut():
+    # Two paths at value 1, closed and joined by four edges at 0.5: every degree is 2, but
+    # only 1 crosses between the halves
+    a, b = np.arange(0, 6), np.arange(6, 12)
+    tails = np.r_[a[:-1], b[:-1], a[0], b[0], a[0], a[-1]]
+    heads = np.r_[a[1:], b[1:], a[-1], b[-1], b[0], b[-1]]
+    vals = np.r_[np.ones(10), np.full(4, 0.5)]
+
+    (side,) = fractional_subtours(12, tails, heads, vals)
+    assert sorted(side) in (a.tolist(), b.tolist())
+    # A feasible tour has no violated subtour inequality
+    tour = np.arange(12)
+    assert fractional_subtours(12, tour, np.roll(tour, -1), np.ones(12)) == []
+
+
+def test_fractional_subtours_stay_sparse():
+    # Two random tours at 0.5: nothing shrinks and no cut is violated, the worst case
+    n = 1000
+    rng = np.random.default_rng(0)
+    first, second = rng.permutation(n), rng.permutation(n)
+    tails, heads = np.r_[first, second], np.r_[np.roll(first, -1), np.roll(second, -1)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    assert fractional_subtours(n, tails, heads, np.full(2 * n, 0.5)) == []
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert elapsed < 10
+    assert peak < n * n * 8 / 4  # Well below one dense n x n matrix
+
+
+def test_user_cuts_reduce_nodes_on_99_city_input():
+    from cli import read_places
+
+    places, coordinates = read_places(os.path.join(DATA, 'tsp_input.csv'))
+    coordinates = dict(zip(places, coordinates))
+    runs = {}
+    for user_cuts in (False, True):
+        stats = {}
+        try:
+            solve_tsp_model(places, coordinates, user_cuts=user_cuts, time_limit=600, stats=stats)
+        except gp.GurobiError as e:
+            if e.errno == gp.GRB.Error.SIZE_LIMIT_EXCEEDED:
+                pytest.skip("Gurobi license is too small for the 99-city model")
+            raise
+        runs[user_cuts] = stats
+
+    assert runs[True]['objective'] == pytest.approx(runs[False]['objective'])
+    assert runs[True]['cuts'] > runs[False]['cuts']
+    assert runs[True]['nodes'] <= runs[False]['nodes']
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from tsp_lazy import solve_tsp_model
+from tsp_model import build_mtz_model, successors, follow_successors
+
+
+def test_mtz_matches_lazy_dfj_optimum(cities, distance_matrix):
+    places, coordinates = cities
+    n = len(places)
+    model, x, u, arcs = build_mtz_model(distance_matrix)
+    model.Params.OutputFlag = 0
+    model.optimize()
+    tour = follow_successors(successors(x.X, arcs, n))
+    assert sorted(tour) == list(range(n))
+
+    stats = {}
+    lazy_tour = solve_tsp_model(places, dict(zip(places, coordinates)), stats=stats)
+    lazy = [places.index(place) for place in lazy_tour]
+    # The lazy model prices edges rounded to 2 decimals, so compare on the unrounded matrix;
+    # both stop at Gurobi's default 0.01% gap
+    lazy_length = distance_matrix[lazy, np.roll(lazy, -1)].sum()
+    assert model.ObjVal == pytest.approx(lazy_length, rel=1e-4)
+    assert distance_matrix[tour, np.roll(tour, -1)].sum() == pytest.approx(model.ObjVal)
@@ -0,0 +1,15 @@
+import time
+
+import tsp_solver
+
+
+def test_time_limit_returns_incumbent(cities, distance_matrix):
+    places, _ = cities
+    problem, x = tsp_solver.build_model(places, distance_matrix)
+    start = time.perf_counter()
+    # The MTZ model needs several seconds to prove this instance optimal
+    route, total_distance = tsp_solver.solve_tsp(problem, x, places, write_lp=False, time_limit=1)
+
+    assert time.perf_counter() - start < 5
+    assert route[0] == route[-1] and sorted(route[:-1]) == sorted(places)
+    assert total_distance > 0
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from warm_performance_vec_restriction import build_model, solve_tsp
+
+
+def test_solve_tsp_reads_only_allowed_arcs(cities, distance_matrix):
+    # Ten cities keep the MTZ model to a fraction of a second; 400 km prunes 44 of the 90 arcs
+    places = cities[0][:10]
+    dist = distance_matrix[:10, :10]
+    max_distance = 400
+    allowed = (dist <= max_distance) & ~np.eye(10, dtype=bool)
+
+    model, x = build_model(places, dist, max_distance=max_distance, time_limit=60)
+    # No diagonal or pruned arcs: they would sit in no constraint at zero cost
+    assert len(x) == allowed.sum()
+    assert model.NumVars == allowed.sum() + 10
+
+    route, total_distance = solve_tsp(model, x, places)
+    assert route[0] == route[-1]
+    assert sorted(route[:-1]) == sorted(places)
+    tour = [places.index(place) for place in route]
+    assert all(allowed[i, j] for i, j in zip(tour, tour[1:]))
+    assert sum(dist[i, j] for i, j in zip(tour, tour[1:])) == pytest.approx(total_distance)